@@ -1,14 +1,19 @@
 # Aplicativo streamlit que carrega os 3 artefatos gerados em models/ 
 # e cria uma interface simples que só pede ao usuário as features e mostra
 # as previsões
+# Para abrir rápido, o início só lê o diretório de jogadores e o último vetor de
+# features (ambos gerados pelo build_features.py); os modelos e a tabela de defesa
+# são carregados na primeira predição e compartilhados entre as sessões.
+# As previsões ficam num cache compartilhado (jogador, oponente, mando + versões
+# dos dados e do modelo): repetir um confronto não roda os modelos de novo, e
+# publicar novos dados ou modelos recarrega os artefatos e invalida o cache.
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import joblib
-import os
 import logging
-from nba_api.stats.static import players
+import json
+from nba_stat_predictor import storage
+from nba_stat_predictor.modeling.cache import PredictionCache, prediction_key, version_of
 
 # Configuração inicial e loading dos artefatos
 
@@ -16,22 +21,28 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 
 # Diretórios
 MODEL_DIR = 'models'
-DATA_PATH = 'data/processed/nba_player_gamelogs_processed.csv'
-RAW_DATA_PATH = 'data/raw/nba_player_gamelogs_raw.csv' # Para buscar nomes de jogadores
+# Manifest do artefato de inferência compilado (oponentes vistos no treino, entre outros)
+COMPILED_MANIFEST_PATH = 'models/compiled/manifest.json'
+# Último vetor de features de cada jogador, gerado pelo build_features.py
+LATEST_FEATURES_PATH = 'data/processed/player_latest_features.parquet'
+# Nomes dos jogadores do dataset, já ordenados (também gerado pelo build_features.py)
+PLAYER_DIRECTORY_PATH = 'data/processed/player_directory.parquet'
+# Estatísticas de defesa por (temporada, time), também geradas pelo build_features.py
+DEFENSE_TABLE_PATH = 'data/processed/defense_table.npz'
 
 # Configuração da página do stre2amlit
 st.set_page_config(page_title="NBA Player Stat Predictor", page_icon="🏀", layout="wide")
 
-@st.cache_data
-def load_artifacts():
-    """Carrega o pré-processador e os modelos treinados."""
+@st.cache_resource(max_entries=1)
+def load_artifacts(model_version, data_version):
+    """Carrega o artefato de inferência compilado e a tabela de defesa (uma vez por versão)."""
+    # Import adiado: joblib e os modelos só entram em memória na primeira predição
+    from nba_stat_predictor.modeling.predict import load_defense_table, load_models
+
     logging.info("Carregando artefatos do modelo...")
     try:
-        preprocessor = joblib.load(os.path.join(MODEL_DIR, 'preprocessor.joblib'))
-        reg_model = joblib.load(os.path.join(MODEL_DIR, 'reg_model_ridge.joblib'))
-        clf_model = joblib.load(os.path.join(MODEL_DIR, 'clf_model_rf.joblib'))
+        predictor = load_models(MODEL_DIR)
         logging.info("Artefatos carregados com sucesso.")
-        return preprocessor, reg_model, clf_model
     except FileNotFoundError:
         st.error(f"ERRO: Artefatos do modelo não encontrados na pasta '{MODEL_DIR}'.")
         st.error("Por favor, execute 'make train' (ou 'python src/models/train_model.py') primeiro.")
@@ -39,74 +50,91 @@ def load_artifacts():
     except Exception as e:
         st.error(f"Erro ao carregar artefatos: {e}")
         st.stop()
+    # Tabela densa de defesa: as features OPP_ passam a ser as do oponente escolhido
+    return predictor, load_defense_table(DEFENSE_TABLE_PATH)
+
+@st.cache_resource(max_entries=1)
+def load_latest_features(data_version):
+    """Último vetor de features de cada jogador, indexado por Player_ID.
 
-@st.cache_data
-def load_data():
-    """Carrega os dados processados e a lista de jogadores/times."""
-    logging.info("Carregando dados processados...")
+    Compartilhado entre as sessões (somente leitura): a memória por sessão não
+    cresce com o número de jogadores. Recarregado quando a versão dos dados muda.
+    """
+    logging.info("Carregando features mais recentes dos jogadores...")
     try:
-        df = pd.read_csv(DATA_PATH, parse_dates=['GAME_DATE'])
-        # Ordena por data para pegarmos facilmente o "último jogo"
-        df = df.sort_values(by=['Player_ID', 'GAME_DATE'])
-        
-        # Pega a lista de oponentes
-        opponent_teams = sorted(df['OPPONENT'].unique())
-        
-        # Pega a lista de IDs de jogadores QUE ESTÃO NO NOSSO DATASET
-        player_ids_in_data = sorted(df['Player_ID'].unique())
-
-        # Busca os nomes usando nba_api.stats.static.players
-        player_map = {}
-        try:
-            logging.info("Buscando mapa de nomes de jogadores da NBA API (static)...")
-            all_players_list = players.get_players() # Retorna uma lista de dicionários
-            
-            player_map = {player['id']: player['full_name'] for player in all_players_list}
-            
-            # Cria a lista de IDs que deve mostrar, 
-            player_ids_to_show = [pid for pid in player_ids_in_data if pid in player_map]
-            player_list_sorted_by_name = sorted(player_ids_to_show, key=lambda x: player_map[x])
-
-            if not player_list_sorted_by_name:
-                 raise ValueError("Nenhum jogador do dataset foi encontrado no mapa estático da API.")
-            
-            logging.info("Mapa de nomes de jogadores criado com sucesso.")
-
-        except Exception as e:
-            # FALLBACK FINAL: Se a chamada da API falhar
-            logging.warning(f"Erro ao buscar nomes estáticos da API ({e}). Usando Player_ID como nome.")
-            player_map = {pid: str(pid) for pid in player_ids_in_data}
-            player_list_sorted_by_name = player_ids_in_data
-            
-        return df, player_list_sorted_by_name, player_map, opponent_teams
-    
+        return storage.read_table(LATEST_FEATURES_PATH).set_index('Player_ID')
     except FileNotFoundError:
-        st.error(f"ERRO: Arquivo de dados processados não encontrado em '{DATA_PATH}'.")
-        st.error("Por favor, execute o notebook 02 (ou 'make data') primeiro.")
+        st.error(f"ERRO: Arquivo de dados processados não encontrado em '{LATEST_FEATURES_PATH}'.")
+        st.error("Por favor, execute 'make process_data' primeiro.")
         st.stop()
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         st.stop()
 
-# Carregamento principal
-preprocessor, reg_model, clf_model = load_artifacts()
-df_processed, player_list, player_map, opponent_list = load_data()
+@st.cache_data(max_entries=1)
+def load_player_directory(data_version):
+    """IDs dos jogadores ordenados por nome, e os mapas ID -> nome e ID -> rótulo."""
+    try:
+        directory = storage.read_table(PLAYER_DIRECTORY_PATH)
+    except FileNotFoundError:
+        # Dados processados antes do diretório existir: monta a partir do último vetor
+        logging.warning(f"Diretório de jogadores não encontrado em '{PLAYER_DIRECTORY_PATH}'; "
+                        "montando a partir das features (rode 'make process_data' para gerá-lo).")
+        from nba_stat_predictor.directory import build_player_directory
+        directory = build_player_directory(load_latest_features(data_version).index)
+    player_ids = directory['Player_ID'].astype(int).tolist()
+    return (player_ids, dict(zip(player_ids, directory['PLAYER_NAME'])),
+            dict(zip(player_ids, directory['LABEL'])))
+
+@st.cache_resource
+def load_prediction_cache():
+    """Cache de previsões compartilhado entre as sessões (ver nba_stat_predictor/modeling/cache.py)."""
+    return PredictionCache()
+
+@st.cache_data(max_entries=1)
+def load_opponent_options(model_version, data_version):
+    """Oponentes que o modelo conhece: as categorias de OPPONENT do treino.
+
+    Lidas do manifest do artefato compilado (só JSON, sem carregar os modelos).
+    """
+    try:
+        with open(COMPILED_MANIFEST_PATH) as f:
+            return sorted(json.load(f)['opponents'])
+    except (FileNotFoundError, KeyError):
+        # Modelos antigos, sem artefato compilado: os últimos oponentes do dataset são só uma
+        # aproximação (o OPPONENT do último jogo de cada jogador não cobre todos os times)
+        logging.warning(f"'{COMPILED_MANIFEST_PATH}' não encontrado; oponentes tirados dos dados "
+                        "(rode 'make train' para gerar o artefato compilado).")
+        opponents = load_latest_features(data_version)['OPPONENT']
+        return sorted(str(team) for team in opponents.dropna().unique())
+
+# Versões dos dados processados e dos modelos publicados (só os.stat, a cada execução):
+# quando mudam, os loaders acima recarregam e o cache de previsões é esvaziado
+data_version = version_of(LATEST_FEATURES_PATH, PLAYER_DIRECTORY_PATH, DEFENSE_TABLE_PATH)
+model_version = version_of(MODEL_DIR)
+prediction_cache = load_prediction_cache()
+if prediction_cache.sync_versions(data_version, model_version):
+    logging.info(f"Nova versão publicada (dados {data_version}, modelo {model_version}); cache de previsões invalidado.")
+
+# Carregamento principal (sem modelos: eles só são carregados ao prever)
+df_latest = load_latest_features(data_version)
+player_list, player_map, player_labels = load_player_directory(data_version)
+
+# Oponentes conhecidos pelo modelo (categorias de OPPONENT do treino)
+opponent_list = load_opponent_options(model_version, data_version)
 
 
 # UI na Sidebar
 st.sidebar.title("Previsão de Jogo da NBA!!")
 st.sidebar.markdown("Selecione os parâmetros para o próximo jogo:")
 
-# Formata a lista de jogadores para "Nome (ID)"
-player_display_list = [f"{player_map[pid]} ({pid})" for pid in player_list]
-
-selected_player_display = st.sidebar.selectbox(
+# Jogadores exibidos como "Nome (ID)", rótulo já gravado no diretório
+selected_player_id = st.sidebar.selectbox(
     "Selecione o Jogador:",
-    options=player_display_list,
+    options=player_list,
+    format_func=player_labels.get,
     help="O app buscará as estatísticas (médias, etc.) do último jogo deste jogador."
 )
-# Extrai o ID do nome selecionado
-selected_player_id = int(selected_player_display.split('(')[-1].replace(')', ''))
 
 
 selected_opponent = st.sidebar.selectbox(
@@ -128,37 +156,30 @@ if st.sidebar.button("Prever Estatísticas"):
     logging.info(f"Iniciando predição para PlayerID: {selected_player_id} vs {selected_opponent}")
     
     try:
-        # 5.1: Encontra o último jogo do jogador
-        last_game = df_processed[df_processed['Player_ID'] == selected_player_id].iloc[-1]
-        
-        # 5.2: Pega as colunas de features (mesma ordem do train_model.py)
-        feature_cols = [
-            'MIN', 'HOME', 'DAYS_REST', 'IS_B2B', 'WIN_LAST_GAME', 'OPPONENT'
-        ] + [col for col in df_processed.columns if '_MA_' in col]
-        
-        opp_cols = [col for col in df_processed.columns if col.startswith('OPP_')]
-        feature_cols.extend(opp_cols)
-        feature_cols = list(dict.fromkeys(feature_cols))
-
-        # 5.3: Cria o DataFrame de 1 linha para a predição
-        input_data = {}
-        for col in feature_cols:
-            if col == 'OPPONENT':
-                input_data[col] = selected_opponent
-            elif col == 'HOME':
-                input_data[col] = home_feature
-            else:
-                # Pega a estatística do último jogo do jogador
-                input_data[col] = last_game[col]
-        
-        input_df = pd.DataFrame([input_data])
-        
-        # 5.4: Pré-processa os dados (OneHotEncode do 'OPPONENT')
-        input_processed = preprocessor.transform(input_df[feature_cols])
-        
-        # 5.5: Faz as predições
-        reg_preds = reg_model.predict(input_processed)
-        clf_probs = clf_model.predict_proba(input_processed)
+        # Import adiado junto com os modelos (primeira predição do processo)
+        from nba_stat_predictor.modeling.predict import build_feature_frame, predict_features
+        predictor, defense = load_artifacts(model_version, data_version)
+
+        cache_key = prediction_key(selected_player_id, selected_opponent, home_feature,
+                                   data_version, model_version)
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            # Confronto já previsto com os mesmos dados e modelo
+            preds, input_df = cached
+        else:
+            # 5.1: Monta o vetor de features (último jogo do jogador + confronto escolhido),
+            # com a mesma função usada na predição em lote
+            slate = pd.DataFrame({'PLAYER_ID': [selected_player_id],
+                                  'OPPONENT': [selected_opponent],
+                                  'HOME': [home_feature]})
+            input_df, found = build_feature_frame(slate, df_latest, defense)
+            if not found[0]:
+                raise KeyError(selected_player_id)
+
+            # 5.2: Pré-processa (OneHotEncode do 'OPPONENT') e faz as predições
+            preds = predict_features(input_df, predictor)
+            prediction_cache.put(cache_key, (preds, input_df))
+        reg_preds, prob_dd = preds[:, :4], preds[0, 4]
         
         # --- 6. Exibição dos Resultados ---
         st.title(f"Previsões para {player_map[selected_player_id]} vs. {selected_opponent}")
@@ -171,16 +192,21 @@ if st.sidebar.button("Prever Estatísticas"):
         col4.metric("Bolas de 3 (FG3M)", f"{reg_preds[0][3]:.1f}")
         
         st.subheader("Probabilidade de Double-Double")
-        prob_dd = clf_probs[0][1] # Probabilidade da classe '1' (DD)
         st.progress(prob_dd, text=f"{prob_dd*100:.1f}% de Chance")
 
+        # Defesa do oponente escolhido na temporada mais recente (consulta direta na tabela)
+        opp_stats = defense.lookup(selected_opponent) if defense is not None else None
+        if opp_stats is not None:
+            resumo = ", ".join(f"{col.replace('OPP_', '')} {value:.3g}" for col, value in opp_stats.items())
+            st.caption(f"Defesa de {selected_opponent} ({defense.latest_season}): {resumo}")
+
         # Expansor para transparência (mostra as features usadas)
         with st.expander("Ver features usadas para a predição (baseadas no último jogo)"):
             lookup_features = input_df.drop(columns=['OPPONENT', 'HOME']).T
             lookup_features.columns = ['Valor da Feature']
             st.dataframe(lookup_features)
 
-    except IndexError:
+    except KeyError:
         st.error(f"Erro: Player ID {selected_player_id} ({player_map[selected_player_id]}) não foi encontrado nos dados processados.")
     except Exception as e:
         st.error(f"Ocorreu um erro durante a predição: {e}")
@@ -188,4 +214,10 @@ if st.sidebar.button("Prever Estatísticas"):
         st.exception(e)
 
 else:
-    st.info("Preencha os dados na barra lateral e clique em 'Prever Estatísticas' para começar.")
\ No newline at end of file
+    st.info("Preencha os dados na barra lateral e clique em 'Prever Estatísticas' para começar.")
+
+# Contadores do cache de previsões (compartilhado entre as sessões)
+cache_stats = prediction_cache.stats()
+st.sidebar.caption(f"Cache de previsões: {cache_stats['hits']} acertos em "
+                   f"{cache_stats['hits'] + cache_stats['misses']} consultas "
+                   f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']} confrontos guardados.")
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""Benchmark: codificação da matriz de treino (one-hot denso, esparso ou compacta).
+
+Gera game logs sintéticos, roda o build_features.py sobre eles e, para cada
+codificação, mede o pré-processamento e o treino de cada modelo de
+train.DEFAULT_SPECS (em um processo, n_jobs=1):
+
+- onehot: ColumnTransformer com one-hot denso, matriz float64 (caminho antigo);
+- sparse: o mesmo ColumnTransformer com saída CSR;
+- compact: CompactEncoder, matriz float32 [código do OPPONENT | numéricas],
+  com o Ridge pelas equações normais e a floresta no código ordinal
+  (nba_stat_predictor/modeling/encoding.py).
+
+O tempo é o melhor de --repeat execuções. O pico de memória vem do
+tracemalloc, em uma execução à parte: memória alocada durante a etapa, além
+da matriz de entrada (o treino do scikit-learn aloca pelo NumPy, então as
+cópias internas de X entram na conta). O pico total da codificação é a
+matriz mais o maior pico de treino. Nos modelos de regressão, "desvio" é a
+maior diferença absoluta das previsões em relação ao one-hot denso.
+
+    python benchmarks/bench_encoding.py --players 500 --seasons 5 --games 70
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loguru import logger  # noqa: E402
+from sklearn.base import clone, is_regressor  # noqa: E402
+from sklearn.compose import ColumnTransformer  # noqa: E402
+from sklearn.preprocessing import OneHotEncoder  # noqa: E402
+
+from nba_stat_predictor import synthetic  # noqa: E402
+from nba_stat_predictor.defense import DefenseTable  # noqa: E402
+from nba_stat_predictor.features import get_feature_columns  # noqa: E402
+from nba_stat_predictor.modeling import encoding, train  # noqa: E402
+from nba_stat_predictor.modeling.compiled import CATEGORICAL_COL  # noqa: E402
+from src.features import build_features as bf  # noqa: E402
+
+OPTIONS = ('onehot', 'sparse', 'compact')
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def traced_peak_mb(fn):
+    """Pico de memória (MB) alocado durante fn, medido pelo tracemalloc."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+
+
+def matrix_mb(X):
+    if sparse.issparse(X):
+        return (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1024 ** 2
+    return X.nbytes / 1024 ** 2
+
+
+def encode(option, X):
+    """(pré-processador, matriz) da codificação."""
+    if option == 'sparse':
+        preprocessor = ColumnTransformer(
+            transformers=[('cat', OneHotEncoder(handle_unknown='ignore'), [CATEGORICAL_COL])],
+            remainder='passthrough', sparse_threshold=1.0)
+        return preprocessor, sparse.csr_matrix(preprocessor.fit_transform(X), dtype=np.float64)
+    return train.fit_preprocessor(X, encoding=option)
+
+
+def fit(option, spec, preprocessor, X, y):
+    estimator = clone(spec.estimator)
+    if option == 'compact':
+        return encoding.fit_compact(estimator, X, y, preprocessor.n_categories)
+    return estimator.fit(X, y)
+
+
+def single_thread(specs):
+    result = []
+    for spec in specs:
+        estimator = clone(spec.estimator)
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=1)
+        result.append(train.ModelSpec(spec.name, estimator, spec.targets))
+    return result
+
+
+def run(df_features, options=OPTIONS, specs=train.DEFAULT_SPECS, repeat=1):
+    """Mede cada codificação.
+
+    Returns:
+        dict codificação -> {"matrix_mb", "peak_mb", "steps": [{step, seconds, peak_mb, max_abs_diff}]}.
+    """
+    X = df_features[get_feature_columns(df_features.columns)]
+    specs = single_thread(specs)
+    targets = train.build_targets(df_features, train.required_targets(specs))
+    X_onehot = None
+    results = {}
+    for option in options:
+        seconds, (preprocessor, X_encoded) = best_of(lambda: encode(option, X), repeat)
+        steps = [{'step': 'encode', 'seconds': seconds,
+                  'peak_mb': traced_peak_mb(lambda: encode(option, X)), 'max_abs_diff': None}]
+        if option == 'compact':
+            X_dense = encoding.onehot_matrix(X_encoded, preprocessor.n_categories)
+        else:
+            X_dense = X_encoded.toarray() if sparse.issparse(X_encoded) else X_encoded
+        X_onehot = X_dense if X_onehot is None and option == 'onehot' else X_onehot
+
+        for spec in specs:
+            y = targets[list(spec.targets)].to_numpy()
+            y = y.ravel() if len(spec.targets) == 1 else y
+            seconds, model = best_of(lambda: fit(option, spec, preprocessor, X_encoded, y), repeat)
+            diff = None
+            if is_regressor(model) and X_onehot is not None:
+                reference = fit('onehot', spec, None, X_onehot, y)
+                diff = float(np.abs(model.predict(X_dense) - reference.predict(X_onehot)).max())
+            steps.append({'step': spec.name, 'seconds': seconds, 'max_abs_diff': diff,
+                          'peak_mb': traced_peak_mb(lambda: fit(option, spec, preprocessor, X_encoded, y))})
+        del X_dense
+        size = matrix_mb(X_encoded)
+        results[option] = {
+            'matrix_mb': size,
+            'peak_mb': max(steps[0]['peak_mb'], size + max(step['peak_mb'] for step in steps[1:])),
+            'steps': steps,
+        }
+    return results
+
+
+def print_report(results, n_rows):
+    print(f"\n{n_rows} linhas")
+    print(f"{'codificação':<12} {'etapa':<18} {'tempo':>9} {'pico':>10} {'desvio':>9}")
+    for option, result in results.items():
+        for step in result['steps']:
+            diff = f"{step['max_abs_diff']:9.1e}" if step['max_abs_diff'] is not None else f"{'-':>9}"
+            print(f"{option:<12} {step['step']:<18} {step['seconds']:8.2f}s "
+                  f"{step['peak_mb']:7.1f} MB {diff}")
+        print(f"{option:<12} {'matriz / total':<18} {'':>9} {result['matrix_mb']:7.1f} MB "
+              f"(pico total {result['peak_mb']:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--seasons', type=int, default=3)
+    parser.add_argument('--games', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--options', nargs='+', choices=OPTIONS, default=list(OPTIONS))
+    parser.add_argument('--output', help='Grava os resultados em JSON.')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    logger.disable('nba_stat_predictor')
+    seasons = synthetic.season_labels(args.seasons)
+    df_features = bf.build_features(synthetic.make_gamelogs(args.players, seasons, args.games),
+                                    DefenseTable.from_frame(synthetic.make_defense_stats(seasons)))
+    # O one-hot denso é a referência do desvio: roda primeiro
+    options = sorted(args.options, key=OPTIONS.index)
+    results = run(df_features, options, repeat=args.repeat)
+    print_report(results, len(df_features))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rows': len(df_features), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark: extração de OPPONENT/HOME do MATCHUP e da temporada a partir da data.
+
+Compara os .apply linha a linha do build_features.py (extrair_adversario,
+lambda 'vs.', get_season_from_date) com parse_matchups e season_from_dates
+de nba_stat_predictor.features.
+
+    python benchmarks/bench_parsing.py --players 2000 --seasons 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from nba_stat_predictor import synthetic  # noqa: E402
+from nba_stat_predictor.features import parse_matchups, season_from_dates  # noqa: E402
+from src.features.build_features import extrair_adversario, get_season_from_date  # noqa: E402
+
+
+def apply_original(df):
+    opponent = df['MATCHUP'].apply(extrair_adversario)
+    home = df['MATCHUP'].apply(lambda x: 1 if 'vs.' in x else 0)
+    season = df['GAME_DATE'].apply(get_season_from_date)
+    return opponent, home, season
+
+
+def vectorized(df):
+    opponent, home = parse_matchups(df['MATCHUP'])
+    return opponent, home, season_from_dates(df['GAME_DATE'])
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--seasons', type=int, default=5)
+    parser.add_argument('--games', type=int, default=70)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    seasons = [f"{y}-{str(y + 1)[-2:]}" for y in range(2024 - args.seasons + 1, 2025)]
+    df = synthetic.make_gamelogs(args.players, seasons, args.games)
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'], format='%b %d, %Y')
+    df_category = df.assign(MATCHUP=df['MATCHUP'].astype('category'))
+
+    print(f"\n{len(df)} linhas, {df['MATCHUP'].nunique()} MATCHUPs e "
+          f"{df['GAME_DATE'].nunique()} datas distintas")
+    t_apply, expected = best_of(lambda: apply_original(df), args.repeat)
+    t_vec, result = best_of(lambda: vectorized(df), args.repeat)
+    t_cat, result_cat = best_of(lambda: vectorized(df_category), args.repeat)
+
+    for got in (result, result_cat):
+        assert got[0].astype(object).tolist() == expected[0].tolist()
+        assert got[1].tolist() == expected[1].tolist()
+        assert got[2].astype(str).tolist() == expected[2].tolist()
+    print(f"{'apply linha a linha':<32} {t_apply * 1000:8.1f} ms")
+    print(f"{'vetorizado (MATCHUP object)':<32} {t_vec * 1000:8.1f} ms  ({t_apply / t_vec:.0f}x)")
+    print(f"{'vetorizado (MATCHUP category)':<32} {t_cat * 1000:8.1f} ms  ({t_apply / t_cat:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
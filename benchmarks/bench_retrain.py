@@ -0,0 +1,178 @@
+"""Benchmark: retreino incremental (retrain.py) contra o treino completo.
+
+Gera game logs sintéticos, roda o build_features.py sobre eles e simula o
+ciclo noturno: um treino completo sobre o histórico e, a cada "noite", os
+jogos seguintes anexados à tabela processada (como o build incremental faz)
+seguidos de retrain.update. Quando a política pede um
+treino completo, ele é feito (como o train_model.py --incremental).
+
+Cada noite acrescenta os próximos --update-fraction das linhas, em ordem de
+GAME_DATE (0,3% é ~1 dia de NBA numa temporada). No fim, os modelos do
+incremental e os de um treino completo sobre as mesmas linhas são avaliados
+nos jogos seguintes (os últimos --holdout-fraction das linhas, que nenhum
+dos dois viu): MAE de cada alvo do Ridge e ROC AUC / log loss da floresta.
+Os modelos são os de train.DEFAULT_SPECS, em n_jobs=1.
+
+    python benchmarks/bench_retrain.py --players 300 --seasons 3 --games 70 --updates 7
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loguru import logger  # noqa: E402
+from sklearn.base import clone  # noqa: E402
+from sklearn.metrics import log_loss, mean_absolute_error, roc_auc_score  # noqa: E402
+
+from nba_stat_predictor import storage, synthetic  # noqa: E402
+from nba_stat_predictor.defense import DefenseTable  # noqa: E402
+from nba_stat_predictor.features import get_feature_columns  # noqa: E402
+from nba_stat_predictor.modeling import retrain, train  # noqa: E402
+from nba_stat_predictor.modeling.compiled import CompiledPredictor  # noqa: E402
+from src.features import build_features as bf  # noqa: E402
+
+
+def single_thread(specs):
+    result = []
+    for spec in specs:
+        estimator = clone(spec.estimator)
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=1)
+        result.append(train.ModelSpec(spec.name, estimator, spec.targets))
+    return tuple(result)
+
+
+def full_train(table_path, models_dir, specs, feature_cols, policy):
+    """Treino completo sobre a tabela, salvo com o registro do incremental; devolve os segundos."""
+    start = time.perf_counter()
+    files = storage.table_files(table_path)
+    targets = train.required_targets(specs)
+    columns = list(dict.fromkeys(feature_cols + train.target_source_columns(targets) + ['GAME_DATE']))
+    df = storage.read_table(table_path, columns=columns, files=files)
+    preprocessor, X = train.fit_preprocessor(df[feature_cols], encoding='compact')
+    df_targets = train.build_targets(df, targets)
+    fitted = train.fit_models(X, df_targets, specs, n_jobs=1, encoder=preprocessor)
+    train.save_artifacts(models_dir, preprocessor, fitted, specs, feature_cols,
+                         extra=retrain.training_record(files, specs, df_targets, df['GAME_DATE'],
+                                                       policy.recent_fraction))
+    return time.perf_counter() - start, CompiledPredictor.from_models(
+        preprocessor, fitted['reg_model_ridge'][0], fitted['clf_model_rf'][0])
+
+
+def scores(predictor, df_holdout, feature_cols):
+    preds = predictor.predict_frame(df_holdout[feature_cols])
+    y_dd = train.build_targets(df_holdout, ['DOUBLE_DOUBLE'])['DOUBLE_DOUBLE']
+    result = {f'MAE_{target}': float(mean_absolute_error(df_holdout[target], preds[:, i]))
+              for i, target in enumerate(train.REG_TARGETS)}
+    result['AUC_DOUBLE_DOUBLE'] = float(roc_auc_score(y_dd, preds[:, 4]))
+    result['LOGLOSS_DOUBLE_DOUBLE'] = float(log_loss(y_dd, np.clip(preds[:, 4], 1e-6, 1 - 1e-6)))
+    return result
+
+
+def run(df_features, updates=5, update_fraction=0.003, holdout_fraction=0.05,
+        specs=train.DEFAULT_SPECS, policy=None):
+    """Simula `updates` noites de retreino incremental e compara com o treino completo.
+
+    Returns:
+        dict com os tempos, o número de treinos completos pedidos pela
+        política e as métricas no holdout ("incremental" e "full").
+    """
+    specs = single_thread(specs)
+    policy = retrain.RetrainPolicy() if policy is None else policy
+    feature_cols = get_feature_columns(df_features.columns)
+    df_features = df_features.sort_values('GAME_DATE', kind='stable').reset_index(drop=True)
+    holdout_start = len(df_features) - round(holdout_fraction * len(df_features))
+    update_rows = max(1, round(update_fraction * len(df_features)))
+    first_new = holdout_start - updates * update_rows
+    df_holdout = df_features.iloc[holdout_start:]
+
+    with tempfile.TemporaryDirectory(prefix='bench_retrain_') as tmp:
+        table_path = os.path.join(tmp, 'processed.parquet')
+        models_dir = os.path.join(tmp, 'models')
+        storage.write_table(df_features.iloc[:first_new], table_path, 'Season')
+        base_seconds, _ = full_train(table_path, models_dir, specs, feature_cols, policy)
+
+        update_seconds, full_refits, new_rows = [], 0, 0
+        for night in range(updates):
+            start_row = first_new + night * update_rows
+            df_night = df_features.iloc[start_row:start_row + update_rows]
+            storage.append_table(df_night, table_path, 'Season')
+            new_rows += len(df_night)
+            start = time.perf_counter()
+            result = retrain.update(models_dir, table_path, specs, feature_cols, policy)
+            if result.status == 'updated':
+                train.save_artifacts(models_dir, result.preprocessor, result.fitted, specs, feature_cols,
+                                     extra=result.record)
+                predictor = CompiledPredictor.from_models(
+                    result.preprocessor, result.fitted['reg_model_ridge'][0], result.fitted['clf_model_rf'][0])
+            else:
+                logger.info(f"Noite {night + 1}: treino completo ({result.reason})")
+                full_refits += 1
+                _, predictor = full_train(table_path, models_dir, specs, feature_cols, policy)
+            update_seconds.append(time.perf_counter() - start)
+
+        full_seconds, full_predictor = full_train(table_path, os.path.join(tmp, 'full'), specs, feature_cols,
+                                                  policy)
+        n_trees = predictor.forest.n_trees
+
+    return {
+        'rows': int(holdout_start),
+        'new_rows': int(new_rows),
+        'holdout_rows': int(len(df_holdout)),
+        'base_train_s': base_seconds,
+        'full_train_s': full_seconds,
+        'update_s': update_seconds,
+        'full_refits': full_refits,
+        'n_trees': int(n_trees),
+        'incremental': scores(predictor, df_holdout, feature_cols),
+        'full': scores(full_predictor, df_holdout, feature_cols),
+    }
+
+
+def print_report(results):
+    print(f"\n{results['rows']} linhas de treino, {results['new_rows']} novas em "
+          f"{len(results['update_s'])} atualizações, {results['holdout_rows']} no holdout")
+    print(f"treino completo: {results['full_train_s']:.2f}s; atualização incremental: "
+          f"média {np.mean(results['update_s']):.2f}s, máx {np.max(results['update_s']):.2f}s "
+          f"({results['full_refits']} treinos completos pedidos pela política, "
+          f"floresta com {results['n_trees']} árvores)")
+    print(f"{'métrica':<24} {'completo':>10} {'incremental':>12} {'diferença':>10}")
+    for metric, full in results['full'].items():
+        incremental = results['incremental'][metric]
+        print(f"{metric:<24} {full:10.4f} {incremental:12.4f} {incremental - full:+10.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--seasons', type=int, default=3)
+    parser.add_argument('--games', type=int, default=60)
+    parser.add_argument('--updates', type=int, default=5)
+    parser.add_argument('--update-fraction', type=float, default=0.003)
+    parser.add_argument('--holdout-fraction', type=float, default=0.05)
+    parser.add_argument('--output', help='Grava os resultados em JSON.')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    logger.disable('nba_stat_predictor')
+    seasons = synthetic.season_labels(args.seasons)
+    df_features = bf.build_features(synthetic.make_gamelogs(args.players, seasons, args.games),
+                                    DefenseTable.from_frame(synthetic.make_defense_stats(seasons)))
+    results = run(df_features, args.updates, args.update_fraction, args.holdout_fraction)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
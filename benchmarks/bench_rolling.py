@@ -0,0 +1,84 @@
+"""Benchmark: médias móveis defasadas do build_features.py.
+
+Compara o laço original (uma passada por coluna e janela, sem agrupar o
+rolling), o rolling agrupado do pandas e nba_stat_predictor.features.lagged_rolling_means.
+
+    python benchmarks/bench_rolling.py --players 2000 --seasons 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from nba_stat_predictor import synthetic  # noqa: E402
+from nba_stat_predictor.features import lagged_rolling_means  # noqa: E402
+from src.features.build_features import MA_WINDOWS, STATS_COLS_MA  # noqa: E402
+
+
+def loop_original(df, cols, windows):
+    """Laço original: rolling aplicado à Series já deslocada, sem agrupar (cruza jogadores)."""
+    out = {}
+    grouped = df.groupby('Player_ID')
+    for window in windows:
+        for col in cols:
+            out[f'{col}_MA_{window}'] = grouped[col].shift(1).rolling(window, min_periods=1).mean()
+    return pd.DataFrame(out)
+
+
+def pandas_grouped(df, cols, windows):
+    """Referência correta com pandas: shift + rolling dentro de cada jogador."""
+    out = {}
+    shifted = df.groupby('Player_ID')[cols].shift(1)
+    shifted['Player_ID'] = df['Player_ID']
+    grouped = shifted.groupby('Player_ID')
+    for window in windows:
+        rolled = grouped[cols].rolling(window, min_periods=1).mean().droplevel(0).sort_index()
+        for col in cols:
+            out[f'{col}_MA_{window}'] = rolled[col]
+    return pd.DataFrame(out)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=2000)
+    parser.add_argument('--seasons', type=int, default=5)
+    parser.add_argument('--games', type=int, default=70)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    seasons = [f"{y}-{str(y + 1)[-2:]}" for y in range(2024 - args.seasons + 1, 2025)]
+    df = synthetic.make_gamelogs(args.players, seasons, args.games)
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'], format='%b %d, %Y')
+    df = df.sort_values(['Player_ID', 'GAME_DATE']).reset_index(drop=True)
+    cols = [col for col in STATS_COLS_MA if col in df.columns]
+
+    print(f"\n{len(df)} linhas, {len(cols)} colunas x janelas {MA_WINDOWS}")
+    t_loop, _ = best_of(lambda: loop_original(df, cols, MA_WINDOWS), args.repeat)
+    t_pandas, expected = best_of(lambda: pandas_grouped(df, cols, MA_WINDOWS), args.repeat)
+    t_engine, result = best_of(
+        lambda: lagged_rolling_means(df, 'Player_ID', cols, MA_WINDOWS), args.repeat)
+
+    assert np.allclose(result.to_numpy(), expected[result.columns].to_numpy(), equal_nan=True)
+    print(f"{'laço original (incorreto)':<28} {t_loop * 1000:8.1f} ms")
+    print(f"{'pandas agrupado':<28} {t_pandas * 1000:8.1f} ms")
+    print(f"{'lagged_rolling_means':<28} {t_engine * 1000:8.1f} ms  "
+          f"({t_loop / t_engine:.1f}x vs. original, {t_pandas / t_engine:.1f}x vs. pandas)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark: leitura da tabela processada em CSV vs. Parquet (storage.py).
+
+Gera game logs sintéticos, roda o build_features.py real sobre eles e mede
+o tempo de carga nos padrões de acesso do train_model.py e do app.py.
+
+    python benchmarks/bench_storage.py --players 500 --seasons 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from nba_stat_predictor import storage, synthetic  # noqa: E402
+from nba_stat_predictor.features import get_feature_columns  # noqa: E402
+from src.features import build_features  # noqa: E402
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--seasons', type=int, default=5)
+    parser.add_argument('--games', type=int, default=70)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    seasons = [f"{y}-{str(y + 1)[-2:]}" for y in range(2024 - args.seasons + 1, 2025)]
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = os.path.join(tmp, 'raw.parquet')
+        defense_path = os.path.join(tmp, 'defense.parquet')
+        processed_path = os.path.join(tmp, 'processed.parquet')
+        csv_path = os.path.join(tmp, 'processed.csv')
+
+        storage.write_table(synthetic.make_gamelogs(args.players, seasons, args.games),
+                            raw_path, partition_col='SEASON_ID')
+        storage.write_table(synthetic.make_defense_stats(seasons), defense_path,
+                            partition_col='Season')
+        build_features.RAW_GAMELOG_PATH = raw_path
+        build_features.RAW_DEFENSE_PATH = defense_path
+        build_features.PROCESSED_DIR = tmp
+        build_features.PROCESSED_FILE_PATH = processed_path
+        build_features.main()
+
+        df = storage.read_table(processed_path)
+        df.to_csv(csv_path, index=False)
+        feature_cols = get_feature_columns(df.columns)
+        train_cols = list(dict.fromkeys(feature_cols + ['PTS', 'AST', 'REB', 'FG3M', 'STL', 'BLK']))
+        app_cols = ['Player_ID', 'GAME_DATE'] + feature_cols
+
+        cases = {
+            'csv (completo, parse_dates)':
+                lambda: pd.read_csv(csv_path, parse_dates=['GAME_DATE']),
+            'parquet (completo)':
+                lambda: storage.read_table(processed_path),
+            'parquet (colunas do treino)':
+                lambda: storage.read_table(processed_path, columns=train_cols),
+            'parquet (colunas do app)':
+                lambda: storage.read_table(processed_path, columns=app_cols),
+            'parquet (última temporada)':
+                lambda: storage.read_table(processed_path, partitions=[seasons[-1]]),
+        }
+
+        print(f"\n{len(df)} linhas x {df.shape[1]} colunas | "
+              f"CSV {os.path.getsize(csv_path) / 1e6:.1f} MB | "
+              f"Parquet {storage.table_nbytes(processed_path) / 1e6:.1f} MB")
+        baseline = None
+        for name, fn in cases.items():
+            elapsed = best_of(fn, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{name:<32} {elapsed * 1000:8.1f} ms  ({baseline / elapsed:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
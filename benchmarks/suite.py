@@ -0,0 +1,280 @@
+"""Suíte de benchmarks do pipeline sobre dados sintéticos, comparada a um baseline.
+
+Gera game logs e estatísticas de defesa no schema da nba_api
+(nba_stat_predictor/synthetic.py) na escala pedida (jogadores x temporadas x
+jogos) e mede, no mesmo processo:
+
+- ingest: schema dos dados brutos + limpeza (datas, MATCHUP, temporada);
+- build_features: o build_features.py completo sobre os dados brutos;
+- train: pré-processador + modelos de train.DEFAULT_SPECS, em um processo;
+- predict_single: um confronto por chamada (caminho do serviço), tempo por chamada;
+- predict_batch: predict_slate sobre um slate de --slate confrontos.
+
+Cada tempo é o melhor de --repeat execuções. Para comparar máquinas
+diferentes, os tempos são divididos pelo de uma carga fixa de calibração
+(NumPy + pandas) medida na mesma execução. Uma etapa mais de --tolerance
+(padrão 50%) mais lenta que benchmarks/baseline.json falha a suíte (código
+de saída 1).
+
+    python benchmarks/suite.py                    # escala padrão, compara com o baseline
+    python benchmarks/suite.py --players 500 --seasons 5 --games 70
+    python benchmarks/suite.py --update-baseline  # regrava o baseline desta escala
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loguru import logger  # noqa: E402
+from sklearn.base import clone  # noqa: E402
+
+from nba_stat_predictor import schema, synthetic  # noqa: E402
+from nba_stat_predictor.defense import DefenseTable  # noqa: E402
+from nba_stat_predictor.features import get_feature_columns, latest_feature_rows  # noqa: E402
+from nba_stat_predictor.modeling import train  # noqa: E402
+from nba_stat_predictor.modeling.compiled import CompiledPredictor  # noqa: E402
+from nba_stat_predictor.modeling.predict import (build_feature_frame, predict_features,  # noqa: E402
+                                                 predict_slate)
+from src.features import build_features as bf  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_TOLERANCE = 0.5
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def scale_key(players, seasons, games):
+    return f"{players}x{seasons}x{games}"
+
+
+def calibrate(repeat=5):
+    """Tempo de uma carga fixa (ordenação NumPy + groupby pandas) nesta máquina."""
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=2_000_000)
+    df = pd.DataFrame({'key': rng.integers(0, 1000, 1_000_000), 'value': rng.normal(size=1_000_000)})
+
+    def workload():
+        np.sort(values)
+        df.groupby('key')['value'].mean()
+
+    return best_of(workload, repeat)[0]
+
+
+def single_thread_specs(specs):
+    """Specs com n_jobs=1 nos estimadores, para tempos comparáveis entre máquinas."""
+    result = []
+    for spec in specs:
+        estimator = clone(spec.estimator)
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=1)
+        result.append(train.ModelSpec(spec.name, estimator, spec.targets))
+    return result
+
+
+def train_predictor(df_features, specs):
+    feature_cols = get_feature_columns(df_features.columns)
+    targets = train.build_targets(df_features, train.required_targets(specs))
+    preprocessor, X_processed = train.fit_preprocessor(df_features[feature_cols],
+                                                       encoding=train.DEFAULT_ENCODING)
+    encoder = preprocessor if train.DEFAULT_ENCODING == 'compact' else None
+    fitted = train.fit_models(X_processed, targets, specs, n_jobs=1, encoder=encoder)
+    return CompiledPredictor.from_models(
+        preprocessor, fitted['reg_model_ridge'][0], fitted['clf_model_rf'][0], train.REG_TARGETS)
+
+
+def make_slate(player_ids, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'PLAYER_ID': rng.choice(player_ids, n_rows),
+        'OPPONENT': rng.choice(synthetic.TEAM_ABBRS, n_rows),
+        'HOME': rng.integers(0, 2, n_rows),
+    })
+
+
+def run_suite(players, seasons, games, repeat=3, slate_rows=20_000, single_calls=200):
+    """Roda todas as etapas na escala pedida.
+
+    Returns:
+        dict etapa -> {"seconds": melhor tempo, "rows": linhas processadas};
+        em predict_single, "seconds" é o tempo por chamada.
+    """
+    season_list = synthetic.season_labels(seasons)
+    raw_api = synthetic.make_gamelogs(players, season_list, games)
+    df_defense = synthetic.make_defense_stats(season_list)
+    # Os scripts seguintes leem os dados brutos já no schema gravado pelo make_dataset.py
+    df_raw = schema.apply_schema(raw_api, schema.RAW_GAMELOG_DTYPES)
+    defense = DefenseTable.from_frame(df_defense)
+    results = {}
+
+    seconds, _ = best_of(
+        lambda: bf.clean_gamelogs(schema.apply_schema(raw_api, schema.RAW_GAMELOG_DTYPES)), repeat)
+    results['ingest'] = {'seconds': seconds, 'rows': len(raw_api)}
+
+    seconds, df_features = best_of(lambda: bf.build_features(df_raw, defense), repeat)
+    results['build_features'] = {'seconds': seconds, 'rows': len(df_features)}
+
+    specs = single_thread_specs(train.DEFAULT_SPECS)
+    seconds, predictor = best_of(lambda: train_predictor(df_features, specs), repeat)
+    results['train'] = {'seconds': seconds, 'rows': len(df_features)}
+
+    df_latest = latest_feature_rows(df_features)
+    single = make_slate(df_latest.index.to_numpy(), single_calls, seed=1)
+    rows = [single.iloc[[i]].reset_index(drop=True) for i in range(len(single))]
+
+    def predict_each():
+        for slate in rows:
+            X, _ = build_feature_frame(slate, df_latest, defense)
+            predict_features(X, predictor)
+
+    seconds, _ = best_of(predict_each, repeat)
+    results['predict_single'] = {'seconds': seconds / single_calls, 'rows': single_calls}
+
+    slate = make_slate(df_latest.index.to_numpy(), slate_rows, seed=2)
+    seconds, _ = best_of(lambda: sum(len(c) for c in predict_slate(slate, df_latest, predictor,
+                                                                    defense=defense)), repeat)
+    results['predict_batch'] = {'seconds': seconds, 'rows': slate_rows}
+    return results
+
+
+def compare(results, calibration_s, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compara os tempos normalizados pela calibração com os do baseline.
+
+    Args:
+        results: saída de run_suite.
+        calibration_s: tempo de calibrate() nesta execução.
+        baseline: entrada do baseline para a mesma escala ({"calibration_s", "cases"}), ou None.
+        tolerance: fração de lentidão aceita (0.5 = até 50% mais lento).
+
+    Returns:
+        lista de dicts (case, seconds, baseline_seconds, ratio, status), com
+        status "ok", "regression" ou "new" (etapa sem baseline).
+    """
+    rows = []
+    for case, result in results.items():
+        reference = (baseline or {}).get('cases', {}).get(case)
+        if reference is None:
+            rows.append({'case': case, 'seconds': result['seconds'], 'baseline_seconds': None,
+                         'ratio': None, 'status': 'new'})
+            continue
+        ratio = (result['seconds'] / calibration_s) / (reference['seconds'] / baseline['calibration_s'])
+        rows.append({'case': case, 'seconds': result['seconds'],
+                     'baseline_seconds': reference['seconds'], 'ratio': ratio,
+                     'status': 'regression' if ratio > 1 + tolerance else 'ok'})
+    return rows
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {'scales': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(baseline, key, results, calibration_s, path=BASELINE_PATH):
+    baseline.setdefault('scales', {})[key] = {
+        'calibration_s': round(calibration_s, 6),
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': f"{platform.machine()} / Python {platform.python_version()} / "
+                   f"numpy {np.__version__} / pandas {pd.__version__}",
+        'cases': {case: {'seconds': round(r['seconds'], 6), 'rows': r['rows']}
+                  for case, r in results.items()},
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def print_table(rows, results):
+    print(f"\n{'etapa':<16} {'linhas':>8} {'tempo':>11} {'baseline':>11} {'razão':>7}")
+    for row in rows:
+        seconds = row['seconds']
+        fmt = (lambda s: f"{s * 1e3:8.3f} ms") if row['case'] == 'predict_single' else \
+            (lambda s: f"{s:9.3f} s")
+        baseline = fmt(row['baseline_seconds']) if row['baseline_seconds'] is not None else '-'
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else '-'
+        flag = '  <-- REGRESSÃO' if row['status'] == 'regression' else ''
+        print(f"{row['case']:<16} {results[row['case']]['rows']:>8} {fmt(seconds):>11} "
+              f"{baseline:>11} {ratio:>7}{flag}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--seasons', type=int, default=3)
+    parser.add_argument('--games', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--slate', type=int, default=20_000, help='Confrontos do predict_batch.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Lentidão aceita em relação ao baseline (0.5 = 50%%).')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Grava os tempos desta execução como baseline da escala.')
+    parser.add_argument('--output', help='Grava os resultados e a comparação em JSON.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    key = scale_key(args.players, args.seasons, args.games)
+    print(f"Escala {key} (jogadores x temporadas x jogos) = "
+          f"{args.players * args.seasons * args.games} linhas, melhor de {args.repeat}")
+
+    # Os logs das etapas atrapalham a leitura da tabela
+    logging.disable(logging.INFO)
+    logger.disable('nba_stat_predictor')
+    try:
+        calibration_s = calibrate()
+        results = run_suite(args.players, args.seasons, args.games, args.repeat, args.slate)
+    finally:
+        logging.disable(logging.NOTSET)
+        logger.enable('nba_stat_predictor')
+
+    baseline = load_baseline(args.baseline)
+    reference = baseline['scales'].get(key)
+    rows = compare(results, calibration_s, reference, args.tolerance)
+    print_table(rows, results)
+    print(f"\ncalibração: {calibration_s * 1e3:.1f} ms"
+          + (f" (baseline: {reference['calibration_s'] * 1e3:.1f} ms, {reference['machine']})"
+             if reference else ''))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'scale': key, 'calibration_s': calibration_s, 'results': results,
+                       'comparison': rows}, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(baseline, key, results, calibration_s, args.baseline)
+        print(f"Baseline da escala {key} gravado em {args.baseline}")
+        return 0
+    if reference is None:
+        print(f"Sem baseline para a escala {key}; rode com --update-baseline para criá-lo.")
+        return 0
+
+    regressions = [row for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"\nFALHA: {len(regressions)} etapa(s) mais de {args.tolerance:.0%} mais lenta(s) "
+              f"que o baseline: {', '.join(row['case'] for row in regressions)}", file=sys.stderr)
+        return 1
+    print(f"\nOK: nenhuma etapa mais de {args.tolerance:.0%} mais lenta que o baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""Tabela densa das estatísticas defensivas por (temporada, time).
+
+As estatísticas de defesa (fetch_defense_stats.py) são poucas linhas: uma por
+time e temporada. Em vez de mapear nomes e fazer merge por strings a cada
+build, elas viram um array ``values[season_code, team_code, col]`` com rótulos
+ordenados para temporadas e times:
+
+- no build, as features OPP_ de todos os jogos saem de um único gather pelos
+  códigos das categorias Season e OPPONENT;
+- no app e nos serviços, o confronto escolhido é consultado em O(1), então as
+  features OPP_ refletem o oponente selecionado e não o do último jogo.
+
+Combinações ausentes (time sem dados na temporada) ficam NaN, como no merge
+left que substituem.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from nba_stat_predictor.features import _codes_and_uniques
+
+DEFENSE_TABLE_FILE = "defense_table.npz"
+
+TEAM_NAME_MAP = {
+    "Atlanta Hawks": "ATL",
+    "Boston Celtics": "BOS",
+    "Brooklyn Nets": "BKN",
+    "Charlotte Hornets": "CHA",
+    "Chicago Bulls": "CHI",
+    "Cleveland Cavaliers": "CLE",
+    "Dallas Mavericks": "DAL",
+    "Denver Nuggets": "DEN",
+    "Detroit Pistons": "DET",
+    "Golden State Warriors": "GSW",
+    "Houston Rockets": "HOU",
+    "Indiana Pacers": "IND",
+    "LA Clippers": "LAC",
+    "Los Angeles Lakers": "LAL",
+    "Memphis Grizzlies": "MEM",
+    "Miami Heat": "MIA",
+    "Milwaukee Bucks": "MIL",
+    "Minnesota Timberwolves": "MIN",
+    "New Orleans Pelicans": "NOP",
+    "New York Knicks": "NYK",
+    "Oklahoma City Thunder": "OKC",
+    "Orlando Magic": "ORL",
+    "Philadelphia 76ers": "PHI",
+    "Phoenix Suns": "PHX",
+    "Portland Trail Blazers": "POR",
+    "Sacramento Kings": "SAC",
+    "San Antonio Spurs": "SAS",
+    "Toronto Raptors": "TOR",
+    "Utah Jazz": "UTA",
+    "Washington Wizards": "WAS",
+}
+
+# Colunas da tabela de defesa -> features do oponente (NB02, Célula 8eb271da)
+DEFENSE_COLUMNS = {
+    "PTS": "OPP_PTS_PER_G",
+    "FG_PCT": "OPP_FG_PCT",
+    "FG3_PCT": "OPP_FG3_PCT",
+    "AST": "OPP_AST_PER_G",
+    "REB": "OPP_REB_PER_G",
+    "STL": "OPP_STL_PER_G",
+    "BLK": "OPP_BLK_PER_G",
+}
+
+
+class DefenseTable:
+    """Estatísticas defensivas indexadas por códigos inteiros de temporada e time.
+
+    Attributes:
+        seasons: rótulos das temporadas ('2023-24'), em ordem.
+        teams: siglas dos times, em ordem.
+        columns: nomes das features (OPP_...), na ordem do último eixo de `values`.
+        values: array float32 (n_seasons, n_teams, n_columns), NaN onde não há dados.
+    """
+
+    def __init__(self, seasons, teams, columns, values):
+        self.seasons = [str(season) for season in seasons]
+        self.teams = [str(team) for team in teams]
+        self.columns = [str(col) for col in columns]
+        self.values = np.asarray(values, dtype=np.float32)
+        self.season_index = {season: i for i, season in enumerate(self.seasons)}
+        self.team_index = {team: i for i, team in enumerate(self.teams)}
+
+    @classmethod
+    def from_frame(cls, df_defense):
+        """Monta a tabela a partir das estatísticas brutas (uma linha por time e temporada)."""
+        team_col = "TEAM_NAME" if "TEAM_NAME" in df_defense.columns else "Team"
+        teams = df_defense[team_col].map(TEAM_NAME_MAP)
+        df_defense = df_defense[teams.notna()]
+        teams = teams[teams.notna()]
+        source_cols = [col for col in DEFENSE_COLUMNS if col in df_defense.columns]
+
+        season_codes, seasons = pd.factorize(df_defense["Season"].astype(str), sort=True)
+        team_codes, team_labels = pd.factorize(teams, sort=True)
+        values = np.full(
+            (len(seasons), len(team_labels), len(source_cols)), np.nan, dtype=np.float32
+        )
+        # Linhas repetidas do mesmo (temporada, time): vale a última
+        values[season_codes, team_codes] = df_defense[source_cols].to_numpy(dtype=np.float32)
+        return cls(seasons, team_labels, [DEFENSE_COLUMNS[col] for col in source_cols], values)
+
+    @property
+    def latest_season(self):
+        return self.seasons[-1]
+
+    def season_codes(self, seasons):
+        """Código de cada temporada da Series (-1 se não estiver na tabela)."""
+        return self._codes(seasons, self.season_index)
+
+    def team_codes(self, teams):
+        """Código de cada time da Series (-1 se não estiver na tabela)."""
+        return self._codes(teams, self.team_index)
+
+    @staticmethod
+    def _codes(series, index):
+        # Um acesso ao dicionário por valor distinto; as linhas só recebem um take pelos
+        # códigos (o -1 de NaN cai no último elemento, também -1)
+        codes, uniques = _codes_and_uniques(series)
+        lookup = np.array([index.get(str(value), -1) for value in uniques] + [-1], dtype=np.int64)
+        return lookup[codes]
+
+    def gather(self, season_codes, team_codes):
+        """Matriz (n, n_columns) com as estatísticas de cada par de códigos (NaN para -1)."""
+        season_codes = np.asarray(season_codes)
+        team_codes = np.asarray(team_codes)
+        valid = (season_codes >= 0) & (team_codes >= 0)
+        out = self.values[np.where(valid, season_codes, 0), np.where(valid, team_codes, 0)]
+        out[~valid] = np.nan
+        return out
+
+    def features_for(self, seasons, teams):
+        """DataFrame com as colunas OPP_ de cada linha, alinhado ao índice de `teams`."""
+        values = self.gather(self.season_codes(seasons), self.team_codes(teams))
+        return pd.DataFrame(values, index=teams.index, columns=self.columns)
+
+    def lookup(self, team, season=None):
+        """Estatísticas de um time em uma temporada (a mais recente por padrão), ou None."""
+        season_code = self.season_index.get(season if season is not None else self.latest_season)
+        team_code = self.team_index.get(team)
+        if season_code is None or team_code is None:
+            return None
+        return dict(zip(self.columns, self.values[season_code, team_code].tolist()))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            seasons=np.array(self.seasons),
+            teams=np.array(self.teams),
+            columns=np.array(self.columns),
+            values=self.values,
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["seasons"], data["teams"], data["columns"], data["values"])
@@ -0,0 +1,49 @@
+"""Diretório de jogadores (Player_ID -> nome) pré-calculado para o app.
+
+O build_features.py grava o diretório junto com o último vetor de features,
+uma linha por jogador do dataset, já ordenada por nome e com o rótulo
+exibido no app. Assim o app não importa a nba_api nem ordena a lista de
+jogadores a cada início.
+"""
+
+import numpy as np
+import pandas as pd
+
+PLAYER_DIRECTORY_FILE = "player_directory.parquet"
+DIRECTORY_COLUMNS = ["Player_ID", "PLAYER_NAME", "LABEL"]
+
+
+def static_player_names():
+    """{Player_ID: nome} da lista estática da nba_api (sem acesso à rede), ou {} se indisponível."""
+    try:
+        from nba_api.stats.static import players
+    except ImportError:
+        return {}
+    return {player["id"]: player["full_name"] for player in players.get_players()}
+
+
+def build_player_directory(player_ids, names=None):
+    """Monta o diretório dos jogadores do dataset, ordenado por nome.
+
+    Args:
+        player_ids: IDs dos jogadores com features salvas.
+        names: {Player_ID: nome}; por padrão, a lista estática da nba_api.
+            Jogadores sem nome conhecido aparecem pelo próprio ID.
+
+    Returns:
+        DataFrame com DIRECTORY_COLUMNS; LABEL é "Nome (ID)".
+    """
+    names = static_player_names() if names is None else names
+    ids = pd.Series(np.asarray(player_ids, dtype=np.int64), name="Player_ID")
+    id_text = ids.astype(str)
+    player_names = ids.map(names).fillna(id_text).astype(str)
+    directory = pd.DataFrame(
+        {
+            "Player_ID": ids,
+            "PLAYER_NAME": player_names,
+            "LABEL": player_names + " (" + id_text + ")",
+        }
+    )
+    return directory.sort_values(["PLAYER_NAME", "Player_ID"], kind="stable").reset_index(
+        drop=True
+    )
@@ -1,29 +1,163 @@
-from pathlib import Path
+"""Funções de engenharia de features compartilhadas pelo pipeline e pelo app."""
 
-from loguru import logger
-from tqdm import tqdm
-import typer
+import numpy as np
+import pandas as pd
 
-from nba_stat_predictor.config import PROCESSED_DATA_DIR
+from nba_stat_predictor.schema import apply_schema
 
-app = typer.Typer()
+# Features fixas, na ordem usada pelo train_model.py
+BASE_FEATURE_COLS = ["MIN", "HOME", "DAYS_REST", "IS_B2B", "WIN_LAST_GAME", "OPPONENT"]
 
 
-@app.command()
-def main(
-    # ---- REPLACE DEFAULT PATHS AS APPROPRIATE ----
-    input_path: Path = PROCESSED_DATA_DIR / "dataset.csv",
-    output_path: Path = PROCESSED_DATA_DIR / "features.csv",
-    # -----------------------------------------
-):
-    # ---- REPLACE THIS WITH YOUR OWN CODE ----
-    logger.info("Generating features from dataset...")
-    for i in tqdm(range(10), total=10):
-        if i == 5:
-            logger.info("Something happened for iteration 5.")
-    logger.success("Features generation complete.")
-    # -----------------------------------------
+def get_feature_columns(columns):
+    """Monta a lista de features do modelo a partir das colunas da tabela processada.
 
+    A ordem é a mesma do treino: features fixas, médias móveis (_MA_) e
+    estatísticas defensivas do oponente (OPP_).
+    """
+    feature_cols = BASE_FEATURE_COLS + [col for col in columns if "_MA_" in col]
+    feature_cols.extend(col for col in columns if col.startswith("OPP_"))
+    return list(dict.fromkeys(feature_cols))
 
-if __name__ == "__main__":
-    app()
+
+def _codes_and_uniques(series):
+    """Códigos por linha (-1 para NaN) e valores únicos, sem recodificar categorias."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), pd.Index(series.cat.categories)
+    codes, uniques = pd.factorize(series, sort=False)
+    return codes, pd.Index(uniques)
+
+
+def _take_categorical(codes, labels, index):
+    """Categoria por linha a partir do rótulo de cada código único (NaN para -1 ou rótulo nulo)."""
+    label_codes, categories = pd.factorize(pd.Index(labels), sort=True)
+    row_codes = np.where(codes >= 0, label_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(row_codes, categories), index=index)
+
+
+def parse_matchups(matchups):
+    """Oponente e mando de quadra a partir da coluna MATCHUP ('LAL vs. BOS', 'LAL @ BOS').
+
+    Cada MATCHUP distinto é processado uma vez (há poucos milhares) com os
+    acessores .str, e o resultado é espalhado para as linhas pelos códigos.
+    Equivale a ``extrair_adversario`` e ``1 if 'vs.' in x else 0`` linha a linha.
+
+    Returns:
+        (opponent, home): Series categórica com a sigla do oponente (NaN se o
+        MATCHUP não tiver '@' nem 'vs.') e Series int8 com 1 para jogos em casa.
+    """
+    codes, uniques = _codes_and_uniques(matchups)
+    uniques = uniques.astype(str)
+    is_away = uniques.str.contains("@", regex=False)
+    is_home = uniques.str.contains("vs.", regex=False)
+    away_opp = uniques.str.split("@", n=2, regex=False).str[1]
+    home_opp = uniques.str.split("vs.", n=2, regex=False).str[1]
+    labels = np.where(is_away, away_opp, np.where(is_home, home_opp, None))
+    labels = pd.Index(labels, dtype=object).str.strip()
+
+    opponent = _take_categorical(codes, labels, matchups.index)
+    home = np.where(codes >= 0, np.asarray(is_home, dtype=np.int8)[codes], 0).astype(np.int8)
+    return opponent, pd.Series(home, index=matchups.index)
+
+
+def season_from_dates(dates):
+    """Temporada ('2023-24') de cada data: jogos a partir de outubro abrem a temporada.
+
+    Aritmética de datas vetorizada (ano - 1 antes de outubro); os rótulos são
+    montados uma vez por ano distinto. Retorna uma Series categórica.
+    """
+    dates = pd.to_datetime(dates)
+    start_year = dates.dt.year - (dates.dt.month < 10)
+    codes, years = pd.factorize(start_year, sort=True)
+    labels = [f"{int(year)}-{str(int(year) + 1)[-2:]}" for year in years]
+    return _take_categorical(codes, labels, dates.index)
+
+
+def lagged_rolling_means(df, group_col, cols, windows, min_periods=1, dtype=np.float64):
+    """Médias móveis defasadas (jogos anteriores) de várias colunas e janelas em uma passada.
+
+    Para cada linha, a média da janela `w` usa as `w` linhas anteriores do mesmo
+    grupo (a linha atual não entra), equivalente a
+    ``df.groupby(group_col)[col].transform(lambda s: s.shift(1).rolling(w, min_periods).mean())``,
+    mas sem nunca cruzar a fronteira entre grupos. NaNs são ignorados, como no
+    rolling do pandas.
+
+    O cálculo usa somas acumuladas sobre os segmentos contíguos de cada grupo:
+    a soma da janela é a diferença entre duas posições da soma acumulada, com o
+    início da janela limitado ao início do segmento do grupo. A ordem das linhas
+    dentro de cada grupo é a ordem do DataFrame (ordene por data antes).
+
+    As somas são sempre feitas em float64; `dtype` só define o tipo da saída.
+
+    Returns:
+        DataFrame com as colunas ``{col}_MA_{w}`` (janela mais externa), alinhado a df.index.
+    """
+    cols = list(cols)
+    n, k = len(df), len(cols)
+    codes = pd.factorize(df[group_col], sort=False)[0]
+    order = None
+    if n and (np.diff(codes) < 0).any():
+        # Grupos não contíguos: processa em ordem estável por grupo e devolve na ordem original
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+
+    # Somas acumuladas no layout (coluna, linha), com uma coluna de zeros à esquerda:
+    # cum_sum[j, i] = soma dos valores da estatística j nas linhas < i
+    cum_sum = np.zeros((k, n + 1))
+    cum_count = None
+    for j, col in enumerate(cols):
+        values = df[col].to_numpy(dtype=np.float64)
+        if order is not None:
+            values = values[order]
+        nan_mask = np.isnan(values)
+        if nan_mask.any():
+            if cum_count is None:
+                cum_count = np.tile(np.arange(n + 1, dtype=np.float64), (k, 1))
+            np.cumsum(~nan_mask, out=cum_count[j, 1:])
+            values = np.where(nan_mask, 0.0, values)
+        np.cumsum(values, out=cum_sum[j, 1:])
+
+    # Início do segmento (grupo) de cada linha
+    rows = np.arange(n)
+    is_start = np.ones(n, dtype=bool)
+    is_start[1:] = codes[1:] != codes[:-1]
+    segment_start = np.maximum.accumulate(np.where(is_start, rows, 0))
+
+    # Saída pré-alocada; cada janela preenche um bloco (coluna, linha) sem temporários grandes
+    out = np.empty((len(windows) * k, n))
+    for w, window in enumerate(windows):
+        block = out[w * k : (w + 1) * k]
+        lo = np.maximum(segment_start, rows - window)
+        np.take(cum_sum, lo, axis=1, out=block)
+        np.subtract(cum_sum[:, :-1], block, out=block)
+        if cum_count is None:
+            window_count = (rows - lo).astype(np.float64)
+        else:
+            window_count = cum_count[:, :-1] - np.take(cum_count, lo, axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            np.divide(block, window_count, out=block)
+        if cum_count is None:
+            block[:, window_count < min_periods] = np.nan
+        else:
+            block[window_count < min_periods] = np.nan
+
+    if order is not None:
+        unsorted = np.empty_like(out)
+        unsorted[:, order] = out
+        out = unsorted
+
+    names = [f"{col}_MA_{window}" for window in windows for col in cols]
+    return pd.DataFrame(out.T.astype(dtype, copy=False), index=df.index, columns=names)
+
+
+def latest_feature_rows(df_features):
+    """Último jogo de cada jogador, já nas colunas e na ordem de features do modelo.
+
+    Returns:
+        DataFrame indexado por Player_ID (uma linha por jogador), para consulta
+        direta com ``.loc[player_id]`` sem varrer o histórico.
+    """
+    feature_cols = get_feature_columns(df_features.columns)
+    df_sorted = df_features.sort_values(["Player_ID", "GAME_DATE"], kind="stable")
+    latest = df_sorted.groupby("Player_ID").tail(1).set_index("Player_ID")
+    return apply_schema(latest[feature_cols].sort_index())
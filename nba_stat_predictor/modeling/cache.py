@@ -0,0 +1,166 @@
+"""Cache das previsões por confronto (jogador, oponente, mando), com LRU e TTL.
+
+O app e o serviço recebem muitas vezes os mesmos poucos confrontos (os
+jogos do dia). Cada previsão depende só do confronto, do último vetor de
+features do jogador e do modelo, então a chave é
+
+    (Player_ID, OPPONENT, HOME, versão dos dados, versão do modelo)
+
+As versões (version_of) são uma impressão digital barata (os.stat) dos
+arquivos publicados: o build_features.py troca as tabelas de
+data/processed/ por diretórios novos e o treino regrava os artefatos de
+models/, então uma nova publicação muda a versão e as entradas antigas
+deixam de ser encontradas. sync_versions também descarta essas entradas de
+imediato, em vez de esperar o LRU empurrá-las para fora.
+
+O cache é limitado (max_entries, com descarte do menos usado) e cada
+entrada expira após ttl_seconds. Os contadores de acertos, faltas,
+descartes, expirações e invalidações saem em stats(). Seguro entre threads
+(o serviço prevê no threadpool; o app compartilha um cache entre as
+sessões).
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import time
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL_SECONDS = 3600.0
+
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return f"{path}:ausente"
+    return f"{path}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def version_of(*paths):
+    """Versão curta (hex) de arquivos/diretórios publicados, a partir do os.stat.
+
+    De um diretório entram ele próprio e as entradas de primeiro nível: as
+    tabelas são trocadas inteiras (novo diretório) e os artefatos de
+    models/ são regravados, então qualquer publicação muda a versão. Não lê
+    o conteúdo dos arquivos; caminhos ausentes também entram na versão.
+    """
+    signatures = []
+    for path in paths:
+        path = os.fspath(path)
+        signatures.append(_stat_signature(path))
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                signatures.extend(sorted(_stat_signature(entry.path) for entry in entries))
+    return hashlib.sha1("\n".join(signatures).encode()).hexdigest()[:12]
+
+
+def prediction_key(player_id, opponent, home, data_version, model_version):
+    """Chave de uma previsão no PredictionCache."""
+    return (int(player_id), str(opponent), int(home), data_version, model_version)
+
+
+class PredictionCache:
+    """Cache LRU com expiração para previsões, seguro entre threads.
+
+    Args:
+        max_entries: número máximo de entradas; acima dele sai a menos usada.
+        ttl_seconds: validade de cada entrada (None: sem expiração).
+        clock: função de tempo em segundos (injetável nos testes).
+    """
+
+    def __init__(
+        self,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        clock=time.monotonic,
+    ):
+        if max_entries < 1:
+            raise ValueError(f"max_entries deve ser positivo, recebido {max_entries}")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()  # chave -> (expira_em, valor)
+        self._versions = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def sync_versions(self, data_version, model_version):
+        """Registra as versões atuais; se mudaram, descarta todas as entradas.
+
+        Returns:
+            True se o cache foi invalidado.
+        """
+        versions = (data_version, model_version)
+        with self._lock:
+            if versions == self._versions:
+                return False
+            changed = self._versions is not None
+            self._versions = versions
+            if changed:
+                self._entries.clear()
+                self.invalidations += 1
+            return changed
+
+    def get(self, key):
+        """Valor guardado para a chave, ou None (falta ou entrada expirada)."""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """Valores das chaves (None nas faltas), com uma única aquisição do lock."""
+        now = self._clock()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] is not None and now >= entry[0]:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[1])
+        return values
+
+    def put(self, key, value):
+        self.put_many([(key, value)])
+
+    def put_many(self, items):
+        """Guarda pares (chave, valor), descartando as entradas menos usadas além de max_entries."""
+        expires_at = None if self.ttl_seconds is None else self._clock() + self.ttl_seconds
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Contadores do cache e taxa de acerto (hits / consultas)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
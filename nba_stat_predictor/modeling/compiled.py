@@ -0,0 +1,331 @@
+"""Artefato de inferência: pré-processador + Ridge + floresta "compilados" em arrays.
+
+O treino salva três artefatos (preprocessor, Ridge e RandomForest) e cada
+chamada precisava montar um DataFrame, passar pelo ColumnTransformer com
+OneHotEncoder denso e só então chamar os modelos. O CompiledPredictor guarda
+o mesmo cálculo em estruturas NumPy fixas:
+
+- o one-hot do OPPONENT vira uma tabela de índices (categoria -> coluna);
+- os coeficientes do Ridge ficam no layout (n_features, n_alvos) de `X @ W + b`;
+- a floresta vira arrays planos de nós (ForestArrays, ver forest.py).
+
+A matriz montada é idêntica à do ColumnTransformer e as operações são as
+mesmas do scikit-learn, então as previsões são bit a bit iguais às do
+caminho antigo (com a floresta em n_jobs=1, cuja soma tem ordem fixa).
+
+O artefato é gravado em models/compiled/: um .npy por array (pesos do
+Ridge e nós da floresta) e um manifest.json com a versão do formato, o
+sha256 de cada arquivo e o run_id do treino. load_compiled abre os .npy
+como memmap somente leitura, então a carga é quase instantânea e N
+processos de serviço compartilham uma única cópia no cache de páginas, em
+vez de cada um desserializar a floresta no próprio heap. A carga recusa
+(ValueError) um artefato de outra versão do formato, com arquivos
+corrompidos ou de um treino diferente do manifest.json/preprocessor.joblib
+ao lado (artefato desatualizado).
+
+Modelos treinados na codificação compacta (CompactEncoder, ver
+encoding.py) usam o mesmo Ridge; só a floresta recebe a matriz
+[código do OPPONENT | numéricas] em float32 (forest_encoding="ordinal").
+"""
+
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+
+import joblib
+import numpy as np
+
+from nba_stat_predictor.config import MODELS_DIR
+from nba_stat_predictor.modeling.forest import ForestArrays
+
+COMPILED_DIR = "compiled"
+COMPILED_MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+# Artefatos do train_model.py, ao lado do diretório compilado
+MANIFEST_FILE = "manifest.json"
+PREPROCESSOR_FILE = "preprocessor.joblib"
+CATEGORICAL_COL = "OPPONENT"
+REG_TARGETS = ["PTS", "AST", "REB", "FG3M"]
+
+
+class CompiledPredictor:
+    """Predição a partir de arrays NumPy ou dicionários, sem DataFrame nem ColumnTransformer.
+
+    Attributes:
+        feature_cols: colunas de entrada, na ordem do treino (inclui OPPONENT).
+        numeric_cols: colunas numéricas, na ordem em que entram na matriz.
+        opponents: categorias do one-hot (ordenadas), uma coluna da matriz cada.
+        reg_targets: alvos do Ridge, na ordem das colunas da previsão.
+        forest: ForestArrays da floresta de double-double.
+        forest_encoding: matriz de entrada da floresta, "onehot" ou "ordinal".
+    """
+
+    def __init__(
+        self,
+        feature_cols,
+        numeric_cols,
+        opponents,
+        weights,
+        intercept,
+        forest,
+        reg_targets=REG_TARGETS,
+        forest_encoding="onehot",
+    ):
+        self.feature_cols = list(feature_cols)
+        self.numeric_cols = list(numeric_cols)
+        self.opponents = np.asarray(opponents)
+        self.opponent_index = {opp: i for i, opp in enumerate(self.opponents.tolist())}
+        self.weights = weights
+        self.intercept = intercept
+        self.forest = forest
+        self.reg_targets = list(reg_targets)
+        self.forest_encoding = forest_encoding
+
+    @classmethod
+    def from_models(cls, preprocessor, reg_model, clf_model, reg_targets=REG_TARGETS):
+        """Compila os três artefatos do train_model.py.
+
+        Espera o layout do treino: OneHotEncoder em OPPONENT seguido das
+        demais colunas em passthrough, ou um CompactEncoder.
+        """
+        if hasattr(preprocessor, "numeric_cols_"):
+            # CompactEncoder: Ridge no layout one-hot, floresta no ordinal
+            numeric_cols = list(preprocessor.numeric_cols_)
+            if clf_model.n_features_in_ != 1 + len(numeric_cols):
+                raise ValueError("A floresta não foi treinada na matriz do CompactEncoder.")
+            return cls(
+                feature_cols=list(preprocessor.feature_names_in_),
+                numeric_cols=numeric_cols,
+                opponents=preprocessor.categories_,
+                weights=reg_model.coef_.T,
+                intercept=np.asarray(reg_model.intercept_, dtype=np.float64),
+                forest=ForestArrays.from_forest(clf_model),
+                reg_targets=reg_targets,
+                forest_encoding="ordinal",
+            )
+
+        (cat_name, encoder, cat_cols), (rest_name, _, rest_cols) = preprocessor.transformers_
+        if (cat_name, list(cat_cols), rest_name) != ("cat", [CATEGORICAL_COL], "remainder"):
+            raise ValueError(
+                f"Layout de pré-processador não suportado: {preprocessor.transformers_}"
+            )
+        if encoder.sparse_output or encoder.handle_unknown != "ignore" or encoder.drop is not None:
+            raise ValueError(
+                "O OneHotEncoder precisa ser denso, sem drop e com handle_unknown='ignore'."
+            )
+
+        feature_cols = list(preprocessor.feature_names_in_)
+        numeric_cols = [
+            feature_cols[i] if isinstance(i, (int, np.integer)) else i for i in rest_cols
+        ]
+        return cls(
+            feature_cols=feature_cols,
+            numeric_cols=numeric_cols,
+            opponents=encoder.categories_[0],
+            # Mesmo layout de memória do Ridge (coef_.T): o BLAS segue o mesmo
+            # caminho e a soma sai bit a bit igual à do reg_model.predict
+            weights=reg_model.coef_.T,
+            intercept=np.asarray(reg_model.intercept_, dtype=np.float64),
+            forest=ForestArrays.from_forest(clf_model),
+            reg_targets=reg_targets,
+        )
+
+    def encode_opponents(self, opponents):
+        """Códigos (colunas do one-hot) dos oponentes; -1 para desconhecidos."""
+        return np.fromiter(
+            (self.opponent_index.get(opp, -1) for opp in opponents),
+            dtype=np.intp,
+            count=len(opponents),
+        )
+
+    def design_matrix(self, numeric, opponent_codes):
+        """Matriz igual à saída do ColumnTransformer: [one-hot | numéricas]."""
+        numeric = np.asarray(numeric, dtype=np.float64)
+        n_rows, n_cat = len(numeric), len(self.opponents)
+        X = np.zeros((n_rows, n_cat + numeric.shape[1]), dtype=np.float64)
+        known = opponent_codes >= 0
+        X[np.flatnonzero(known), opponent_codes[known]] = 1.0
+        X[:, n_cat:] = numeric
+        return X
+
+    def ordinal_matrix(self, numeric, opponent_codes):
+        """Matriz do CompactEncoder: [código do OPPONENT | numéricas] em float32."""
+        numeric = np.asarray(numeric)
+        X = np.empty((len(numeric), 1 + numeric.shape[1]), dtype=np.float32)
+        X[:, 0] = opponent_codes
+        X[:, 1:] = numeric
+        return X
+
+    def predict_reg(self, X):
+        return X @ self.weights + self.intercept
+
+    def predict_dd_proba(self, X):
+        """Probabilidade de double-double: média das árvores, somadas na ordem."""
+        return self.forest.predict_positive(X)
+
+    def predict(self, numeric, opponents):
+        """Previsões para arrays já separados.
+
+        Args:
+            numeric: array (n, len(numeric_cols)) com as features numéricas.
+            opponents: n siglas de oponente.
+
+        Returns:
+            array (n, len(reg_targets) + 1): alvos do Ridge e a probabilidade de DD.
+        """
+        codes = self.encode_opponents(opponents)
+        X = self.design_matrix(numeric, codes)
+        X_forest = self.ordinal_matrix(numeric, codes) if self.forest_encoding == "ordinal" else X
+        return np.column_stack([self.predict_reg(X), self.predict_dd_proba(X_forest)])
+
+    def predict_frame(self, df):
+        """Previsões para um DataFrame com as colunas de feature_cols."""
+        return self.predict(
+            df[self.numeric_cols].to_numpy(dtype=np.float64), df[CATEGORICAL_COL].to_numpy()
+        )
+
+    def predict_dict(self, features):
+        """Previsão de uma linha a partir de um dicionário {feature: valor}."""
+        numeric = np.array([[features[col] for col in self.numeric_cols]], dtype=np.float64)
+        return self.predict(numeric, [features[CATEGORICAL_COL]])[0]
+
+    def arrays(self):
+        return {"weights": self.weights, "intercept": self.intercept, **self.forest.arrays()}
+
+    def save(self, models_dir=MODELS_DIR):
+        """Grava o artefato em <models_dir>/compiled/ (um .npy por array + manifest.json).
+
+        O run_id do manifest.json do treino e o sha256 do preprocessor.joblib
+        em models_dir, se existirem, vão para o manifest do artefato. O
+        diretório é montado ao lado e trocado no fim: quem carrega nunca vê
+        um artefato pela metade.
+
+        Returns:
+            Caminho do diretório.
+        """
+        models_dir = Path(models_dir)
+        target = models_dir / COMPILED_DIR
+        staging = models_dir / f".{COMPILED_DIR}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        arrays = {}
+        for name, array in self.arrays().items():
+            file_name = f"{name}.npy"
+            np.save(staging / file_name, np.asarray(array))
+            arrays[name] = {
+                "file": file_name,
+                "dtype": str(array.dtype),
+                "shape": list(array.shape),
+                "sha256": _sha256(staging / file_name),
+            }
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **_training_identity(models_dir),
+            "feature_cols": self.feature_cols,
+            "numeric_cols": self.numeric_cols,
+            "opponents": self.opponents.tolist(),
+            "reg_targets": self.reg_targets,
+            "forest_encoding": self.forest_encoding,
+            "forest": self.forest.metadata(),
+            "arrays": arrays,
+        }
+        (staging / COMPILED_MANIFEST).write_text(
+            json.dumps(manifest, indent=2, ensure_ascii=False)
+        )
+
+        previous = models_dir / f".{COMPILED_DIR}.old-{os.getpid()}"
+        if target.exists():
+            target.rename(previous)
+        staging.rename(target)
+        shutil.rmtree(previous, ignore_errors=True)
+        return target
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _training_identity(models_dir):
+    """run_id do treino e sha256 do pré-processador em models_dir (None se não existirem)."""
+    manifest_path = models_dir / MANIFEST_FILE
+    preprocessor_path = models_dir / PREPROCESSOR_FILE
+    run_id = (
+        json.loads(manifest_path.read_text()).get("run_id") if manifest_path.exists() else None
+    )
+    return {
+        "run_id": run_id,
+        "preprocessor_sha256": _sha256(preprocessor_path) if preprocessor_path.exists() else None,
+    }
+
+
+def load_mapped(models_dir=MODELS_DIR, verify=True):
+    """Abre o artefato de <models_dir>/compiled/ com os arrays em memmap somente leitura.
+
+    Args:
+        models_dir: diretório dos modelos.
+        verify: confere o sha256 de cada .npy (lê os arquivos uma vez).
+
+    Raises:
+        ValueError: versão de formato diferente, arquivo corrompido ou
+            artefato de outro treino (run_id ou pré-processador diferente).
+    """
+    models_dir = Path(models_dir)
+    compiled_dir = models_dir / COMPILED_DIR
+    manifest = json.loads((compiled_dir / COMPILED_MANIFEST).read_text())
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"Artefato compilado no formato {manifest.get('format_version')}, esperado "
+            f"{FORMAT_VERSION}: rode 'make train' para gerá-lo de novo."
+        )
+
+    current = _training_identity(models_dir)
+    for key, value in current.items():
+        if value is not None and manifest.get(key) != value:
+            raise ValueError(
+                f"Artefato compilado desatualizado ({key} diferente do treino em "
+                f"{models_dir}): rode 'make train' para gerá-lo de novo."
+            )
+
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        path = compiled_dir / entry["file"]
+        if verify and _sha256(path) != entry["sha256"]:
+            raise ValueError(f"Arquivo corrompido no artefato compilado: {path}")
+        array = np.load(path, mmap_mode="r")
+        if str(array.dtype) != entry["dtype"] or list(array.shape) != entry["shape"]:
+            raise ValueError(f"Arquivo corrompido no artefato compilado: {path}")
+        # View ndarray sobre o memmap: sem cópia, páginas compartilhadas entre processos
+        arrays[name] = np.asarray(array)
+
+    forest = ForestArrays.from_arrays(arrays, manifest["forest"])
+    return CompiledPredictor(
+        feature_cols=manifest["feature_cols"],
+        numeric_cols=manifest["numeric_cols"],
+        opponents=manifest["opponents"],
+        weights=arrays["weights"],
+        intercept=arrays["intercept"],
+        forest=forest,
+        reg_targets=manifest["reg_targets"],
+        forest_encoding=manifest["forest_encoding"],
+    )
+
+
+def load_compiled(models_dir=MODELS_DIR):
+    """Carrega o artefato compilado (memmap); se não existir, compila a partir dos três .joblib."""
+    models_dir = Path(models_dir)
+    if (models_dir / COMPILED_DIR / COMPILED_MANIFEST).exists():
+        return load_mapped(models_dir)
+    return CompiledPredictor.from_models(
+        joblib.load(models_dir / PREPROCESSOR_FILE),
+        joblib.load(models_dir / "reg_model_ridge.joblib"),
+        joblib.load(models_dir / "clf_model_rf.joblib"),
+    )
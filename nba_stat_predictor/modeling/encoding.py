@@ -0,0 +1,300 @@
+"""Codificação compacta das features para o treino: código do oponente no lugar do one-hot denso.
+
+O ColumnTransformer do treino gera uma matriz float64 densa
+[one-hot do OPPONENT | numéricas], com ~30 colunas quase todas zero em cada
+linha, e cada modelo ainda faz a sua cópia dela (o Ridge centraliza X em
+outra matriz float64, a floresta converte tudo para float32). Com o
+CompactEncoder a matriz de treino é uma só, em float32:
+
+    [código do OPPONENT | numéricas]
+
+e cada modelo a consome no formato que lhe é mais barato (compact_fit_mode):
+
+- árvores (RandomForest, GradientBoosting...) usam o código como feature
+  ordinal, direto da matriz, sem cópia;
+- o Ridge é resolvido pelas equações normais (X'X + alpha*I) w = X'y,
+  acumuladas em blocos de linhas, com o bloco one-hot como matriz esparsa
+  de indicadores. A matriz one-hot densa nunca é montada, e os coeficientes
+  são os do Ridge(solver='cholesky') sobre ela, no mesmo layout: o
+  CompiledPredictor usa os pesos sem mudança. As somas acumuladas
+  (NormalEquations) ficam no estimador para o retreino incremental;
+- os demais estimadores recebem a matriz one-hot densa montada a partir
+  dos códigos (onehot_matrix), igual à do ColumnTransformer.
+
+As features numéricas já são float32/int8/int16 no schema
+(nba_stat_predictor/schema.py), então a matriz float32 guarda exatamente os
+mesmos valores da float64.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+    GradientBoostingClassifier,
+    GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+from sklearn.linear_model import Ridge
+from sklearn.tree import BaseDecisionTree
+
+from nba_stat_predictor.modeling.compiled import CATEGORICAL_COL
+
+# Linhas por bloco nas equações normais do Ridge (~5 MB por bloco float64 com 40 colunas)
+CHUNK_ROWS = 16_384
+
+TREE_ESTIMATORS = (
+    BaseDecisionTree,
+    RandomForestClassifier,
+    RandomForestRegressor,
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+    GradientBoostingClassifier,
+    GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+)
+
+
+class CompactEncoder(TransformerMixin, BaseEstimator):
+    """Matriz float32 [código do OPPONENT | numéricas]; oponentes fora do treino viram -1.
+
+    Os códigos são as posições em `categories_`, as mesmas categorias
+    (presentes no treino, ordenadas) e na mesma ordem das colunas do
+    OneHotEncoder.
+    """
+
+    def __init__(self, categorical_col=CATEGORICAL_COL):
+        self.categorical_col = categorical_col
+
+    def fit(self, X, y=None):
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.numeric_cols_ = [col for col in X.columns if col != self.categorical_col]
+        self.categories_ = np.unique(np.asarray(X[self.categorical_col], dtype=object))
+        return self
+
+    @property
+    def n_categories(self):
+        return len(self.categories_)
+
+    def encode(self, values):
+        """Códigos das categorias; -1 para valores fora do treino."""
+        return pd.Index(self.categories_).get_indexer(np.asarray(values, dtype=object))
+
+    def transform(self, X):
+        # Coluna a coluna: evita a cópia intermediária de to_numpy() num DataFrame de vários dtypes
+        matrix = np.empty((len(X), 1 + len(self.numeric_cols_)), dtype=np.float32)
+        matrix[:, 0] = self.encode(X[self.categorical_col])
+        for j, col in enumerate(self.numeric_cols_, start=1):
+            matrix[:, j] = X[col].to_numpy()
+        return matrix
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray([self.categorical_col, *self.numeric_cols_], dtype=object)
+
+
+def onehot_matrix(X, n_categories):
+    """Matriz densa float64 [one-hot | numéricas] a partir da compacta (layout do ColumnTransformer)."""
+    codes = X[:, 0].astype(np.intp)
+    dense = np.zeros((len(X), n_categories + X.shape[1] - 1), dtype=np.float64)
+    known = np.flatnonzero(codes >= 0)
+    dense[known, codes[known]] = 1.0
+    dense[:, n_categories:] = X[:, 1:]
+    return dense
+
+
+def compact_fit_mode(estimator):
+    """Como o estimador treina sobre a matriz compacta: "ordinal", "normal_equations" ou "onehot"."""
+    if isinstance(estimator, TREE_ESTIMATORS):
+        return "ordinal"
+    if (
+        isinstance(estimator, Ridge)
+        and estimator.solver in ("auto", "cholesky")
+        and not estimator.positive
+    ):
+        return "normal_equations"
+    return "onehot"
+
+
+def _known_codes(codes):
+    """Códigos válidos; -1 (oponente fora do treino, NaN) é uma linha de zeros no one-hot."""
+    return codes[codes >= 0]
+
+
+def _indicators(codes, n_categories):
+    known = codes >= 0
+    indptr = np.concatenate([[0], np.cumsum(known)])
+    return sparse.csr_matrix(
+        (np.ones(known.sum()), codes[known], indptr), shape=(len(codes), n_categories)
+    )
+
+
+class NormalEquations:
+    """Estatísticas suficientes do Ridge sobre a matriz [one-hot | numéricas].
+
+    Guarda o número de linhas, as médias de X e de Y e os produtos
+    centralizados (X - média)'(X - média) e (X - média)'(Y - média): com
+    elas o Ridge de qualquer alpha sai sem reler os dados (solve). merge
+    combina as estatísticas de dois conjuntos de linhas como se tivessem sido
+    calculadas sobre a união (fórmula de Chan et al. para os produtos
+    centralizados), o que permite atualizar o modelo só com as linhas novas.
+    """
+
+    def __init__(self, n_rows, x_mean, y_mean, xx, xy, y_ndim):
+        self.n_rows = int(n_rows)
+        self.x_mean = x_mean
+        self.y_mean = y_mean
+        self.xx = xx
+        self.xy = xy
+        self.y_ndim = int(y_ndim)
+
+    @classmethod
+    def from_matrix(cls, X, y, n_categories, chunk_rows=CHUNK_ROWS):
+        """Estatísticas da matriz compacta X, acumuladas em blocos de linhas.
+
+        Uma primeira passada pelos blocos calcula as médias; a segunda acumula
+        os produtos centralizados, com o bloco one-hot como matriz esparsa de
+        indicadores (o one-hot centralizado é O - 1*média'). Linhas com código
+        -1 entram com o one-hot zerado, como em onehot_matrix.
+        """
+        y = np.asarray(y, dtype=np.float64)
+        Y = y.reshape(len(y), -1)
+        n_rows, n_numeric = len(X), X.shape[1] - 1
+        blocks = [slice(start, start + chunk_rows) for start in range(0, n_rows, chunk_rows)]
+
+        cat_offset, num_offset = np.zeros(n_categories), np.zeros(n_numeric)
+        for block in blocks:
+            codes = _known_codes(X[block, 0].astype(np.intp))
+            cat_offset += np.bincount(codes, minlength=n_categories)
+            num_offset += X[block, 1:].sum(axis=0, dtype=np.float64)
+        cat_offset /= max(n_rows, 1)
+        num_offset /= max(n_rows, 1)
+        y_offset = Y.mean(axis=0) if n_rows else np.zeros(Y.shape[1])
+
+        counts = np.zeros(n_categories)
+        cat_num = np.zeros((n_categories, n_numeric))
+        num_num = np.zeros((n_numeric, n_numeric))
+        cat_y = np.zeros((n_categories, Y.shape[1]))
+        num_y = np.zeros((n_numeric, Y.shape[1]))
+        num_sum, y_sum = np.zeros(n_numeric), np.zeros(Y.shape[1])
+        for block in blocks:
+            codes = X[block, 0].astype(np.intp)
+            onehot = _indicators(codes, n_categories)
+            Z = X[block, 1:].astype(np.float64)
+            Z -= num_offset
+            Yc = Y[block] - y_offset
+            counts += np.bincount(_known_codes(codes), minlength=n_categories)
+            cat_num += onehot.T @ Z
+            num_num += Z.T @ Z
+            cat_y += onehot.T @ Yc
+            num_y += Z.T @ Yc
+            num_sum += Z.sum(axis=0)
+            y_sum += Yc.sum(axis=0)
+
+        n_features = n_categories + n_numeric
+        xx = np.empty((n_features, n_features))
+        xx[:n_categories, :n_categories] = (
+            np.diag(counts)
+            - np.outer(counts, cat_offset)
+            - np.outer(cat_offset, counts)
+            + n_rows * np.outer(cat_offset, cat_offset)
+        )
+        xx[:n_categories, n_categories:] = cat_num - np.outer(cat_offset, num_sum)
+        xx[n_categories:, :n_categories] = xx[:n_categories, n_categories:].T
+        xx[n_categories:, n_categories:] = num_num
+        xy = np.vstack([cat_y - np.outer(cat_offset, y_sum), num_y])
+        return cls(n_rows, np.concatenate([cat_offset, num_offset]), y_offset, xx, xy, y.ndim)
+
+    def merge(self, other):
+        """Estatísticas da união das linhas de self e other."""
+        if self.xx.shape != other.xx.shape or self.xy.shape != other.xy.shape:
+            raise ValueError(f"Estatísticas incompatíveis: {self.xy.shape} e {other.xy.shape}.")
+        n_rows = self.n_rows + other.n_rows
+        if not self.n_rows or not other.n_rows:
+            return other if not self.n_rows else self
+        weight = self.n_rows * other.n_rows / n_rows
+        dx, dy = other.x_mean - self.x_mean, other.y_mean - self.y_mean
+        return NormalEquations(
+            n_rows,
+            self.x_mean + dx * (other.n_rows / n_rows),
+            self.y_mean + dy * (other.n_rows / n_rows),
+            self.xx + other.xx + weight * np.outer(dx, dx),
+            self.xy + other.xy + weight * np.outer(dx, dy),
+            self.y_ndim,
+        )
+
+    def solve(self, estimator):
+        """Resolve (X'X + alpha*I) W = X'Y como o solver 'cholesky' do scikit-learn.
+
+        Com fit_intercept os produtos já são os centralizados; sem ele, a
+        média volta para os produtos (X'X = centralizado + n*média*média').
+
+        Returns:
+            O próprio estimador, com coef_ e intercept_ no layout [one-hot | numéricas].
+        """
+        n_features, n_targets = self.xy.shape
+        if estimator.fit_intercept:
+            A, Xy = self.xx.copy(), self.xy
+        else:
+            A = self.xx + self.n_rows * np.outer(self.x_mean, self.x_mean)
+            Xy = self.xy + self.n_rows * np.outer(self.x_mean, self.y_mean)
+
+        alpha = np.atleast_1d(np.asarray(estimator.alpha, dtype=np.float64))
+        if alpha.size not in (1, n_targets):
+            raise ValueError(f"alpha com {alpha.size} valores para {n_targets} alvos.")
+        if alpha.size == 1:
+            A.flat[:: n_features + 1] += alpha[0]
+            coef = linalg.solve(A, Xy, assume_a="pos", overwrite_a=True).T
+        else:
+            coef = np.empty((n_targets, n_features))
+            for j, target_alpha in enumerate(alpha):
+                A_j = A.copy()
+                A_j.flat[:: n_features + 1] += target_alpha
+                coef[j] = linalg.solve(A_j, Xy[:, j], assume_a="pos", overwrite_a=True)
+
+        intercept = self.y_mean - self.x_mean @ coef.T
+        if self.y_ndim == 1:
+            coef, intercept = coef.ravel(), intercept[0]
+        estimator.coef_ = coef
+        estimator.intercept_ = intercept if estimator.fit_intercept else 0.0
+        estimator.n_features_in_ = n_features
+        estimator.n_iter_ = None
+        estimator.solver_ = "cholesky"
+        return estimator
+
+
+def fit_ridge_normal_equations(estimator, X, y, n_categories, chunk_rows=CHUNK_ROWS):
+    """Treina um Ridge sobre a matriz one-hot sem montá-la, como o solver 'cholesky'.
+
+    Igual ao scikit-learn: X e y são centralizados pelas médias (com
+    fit_intercept), A = X'X + alpha*I e W = A^-1 X'y. As estatísticas
+    (NormalEquations) ficam no estimador, em `normal_equations_`, para o
+    retreino incremental (ver retrain.py).
+
+    Returns:
+        O próprio estimador, com coef_ e intercept_ no layout [one-hot | numéricas].
+    """
+    statistics = NormalEquations.from_matrix(X, y, n_categories, chunk_rows)
+    statistics.solve(estimator)
+    estimator.normal_equations_ = statistics
+    return estimator
+
+
+def fit_compact(estimator, X, y, n_categories):
+    """Treina o estimador sobre a matriz compacta X no formato indicado por compact_fit_mode."""
+    mode = compact_fit_mode(estimator)
+    if mode == "ordinal":
+        return estimator.fit(X, y)
+    if mode == "normal_equations":
+        try:
+            return fit_ridge_normal_equations(estimator, X, y, n_categories)
+        except linalg.LinAlgError:
+            # Sistema singular: o scikit-learn cai para outro solver; aqui, para a matriz densa
+            pass
+    return estimator.fit(onehot_matrix(X, n_categories), y)
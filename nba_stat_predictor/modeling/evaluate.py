@@ -0,0 +1,514 @@
+"""Validação walk-forward e busca de hiperparâmetros na tabela processada.
+
+    python -m nba_stat_predictor.modeling.evaluate --workers 4 --n-splits 4
+
+Os folds seguem a ordem de GAME_DATE: cada fold treina com todos os jogos
+anteriores a uma data de corte e valida no bloco de datas seguinte, então
+nenhum jogo de validação é anterior a um jogo de treino (sem vazamento).
+
+- As matrizes de cada fold (pré-processador treinado só com o treino do
+  fold) são gravadas em .npy e reaproveitadas por todos os candidatos e
+  por execuções seguintes com os mesmos dados e a mesma codificação.
+- A codificação é a do treino (train.DEFAULT_ENCODING, "compact" por
+  padrão): na compacta cada candidato é treinado como em fit_models
+  (encoding.fit_compact), então os parâmetros escolhidos valem para a
+  mesma representação usada pelo train_model.py --tuned.
+- Candidatos e folds são avaliados em paralelo (joblib), com as matrizes
+  abertas como memmap somente leitura.
+- Com poda ligada, os folds são avaliados em rodadas e candidatos que
+  falham, ficam abaixo do baseline (DummyRegressor/DummyClassifier) ou
+  muito atrás do melhor são descartados antes dos folds seguintes.
+
+O relatório (reports/evaluation.json) traz a codificação, as métricas por
+alvo de cada candidato e os melhores parâmetros de cada modelo.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import pairwise
+import json
+from pathlib import Path
+import shutil
+import time
+
+import joblib
+from joblib import Parallel, delayed
+from loguru import logger
+import numpy as np
+from sklearn.base import clone, is_classifier
+from sklearn.dummy import DummyClassifier, DummyRegressor
+from sklearn.metrics import (
+    brier_score_loss,
+    log_loss,
+    mean_absolute_error,
+    r2_score,
+    roc_auc_score,
+    root_mean_squared_error,
+)
+from sklearn.model_selection import ParameterGrid
+import typer
+
+from nba_stat_predictor import storage
+from nba_stat_predictor.config import INTERIM_DATA_DIR, PROCESSED_DATA_DIR, REPORTS_DIR
+from nba_stat_predictor.features import get_feature_columns
+from nba_stat_predictor.modeling import train
+from nba_stat_predictor.modeling.encoding import compact_fit_mode, fit_compact, onehot_matrix
+
+app = typer.Typer()
+
+PROCESSED_FILE_PATH = PROCESSED_DATA_DIR / "nba_player_gamelogs_processed.parquet"
+FOLD_CACHE_DIR = INTERIM_DATA_DIR / "cv_folds"
+REPORT_PATH = REPORTS_DIR / "evaluation.json"
+DEFAULT_N_SPLITS = 4
+MIN_TRAIN_FRACTION = 0.4
+PRUNE_TOLERANCE = 0.05
+
+
+@dataclass(frozen=True)
+class SearchSpace:
+    """Modelo a avaliar: nome, estimador base, alvo(s) e grade de parâmetros."""
+
+    name: str
+    estimator: object
+    targets: tuple
+    param_grid: dict
+
+    def __post_init__(self):
+        targets = (self.targets,) if isinstance(self.targets, str) else tuple(self.targets)
+        object.__setattr__(self, "targets", targets)
+
+    @property
+    def is_classifier(self):
+        return is_classifier(self.estimator)
+
+
+# Grades em torno das escolhas dos notebooks; os demais parâmetros vêm de train.DEFAULT_SPECS
+DEFAULT_GRIDS = {
+    "reg_model_ridge": {"alpha": [0.1, 1.0, 10.0, 100.0]},
+    "clf_model_rf": {"max_depth": [8, 15, None], "min_samples_leaf": [5, 20]},
+}
+DEFAULT_SEARCH = tuple(
+    SearchSpace(spec.name, spec.estimator, spec.targets, DEFAULT_GRIDS[spec.name])
+    for spec in train.DEFAULT_SPECS
+)
+
+
+@dataclass(frozen=True)
+class Fold:
+    train_idx: np.ndarray
+    val_idx: np.ndarray
+    train_end: str
+    val_start: str
+    val_end: str
+
+
+def walk_forward_splits(dates, n_splits=DEFAULT_N_SPLITS, min_train_fraction=MIN_TRAIN_FRACTION):
+    """Folds walk-forward sobre as datas distintas.
+
+    As primeiras `min_train_fraction` datas só entram no treino; o restante é
+    dividido em `n_splits` blocos consecutivos de validação. Jogos da mesma
+    data nunca ficam em lados diferentes de um corte.
+    """
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    unique_dates = np.unique(dates)
+    first_val = int(len(unique_dates) * min_train_fraction)
+    if first_val < 1 or len(unique_dates) - first_val < n_splits:
+        raise ValueError(f"Datas insuficientes ({len(unique_dates)}) para {n_splits} folds.")
+
+    bounds = np.linspace(first_val, len(unique_dates), n_splits + 1).astype(int)
+
+    def day(value):
+        return str(np.datetime_as_string(value, unit="D"))
+
+    folds = []
+    for start, stop in pairwise(bounds):
+        val_start, val_end = unique_dates[start], unique_dates[stop - 1]
+        folds.append(
+            Fold(
+                train_idx=np.flatnonzero(dates < val_start),
+                val_idx=np.flatnonzero((dates >= val_start) & (dates <= val_end)),
+                train_end=day(unique_dates[start - 1]),
+                val_start=day(val_start),
+                val_end=day(val_end),
+            )
+        )
+    return folds
+
+
+def prepare_fold_matrices(X, folds, cache_dir=FOLD_CACHE_DIR, encoding=train.DEFAULT_ENCODING):
+    """Pré-processa cada fold uma vez e guarda as matrizes em disco.
+
+    O diretório do cache é identificado pelo hash dos dados, dos cortes e da
+    codificação, então execuções seguintes com os mesmos dados reaproveitam
+    as matrizes. Ao criar uma chave nova, as demais chaves de `cache_dir` são
+    apagadas (dados ou codificação antigos não voltam a ser lidos).
+
+    Returns:
+        Lista de (X_train, X_val, n_categories) com as matrizes como memmaps
+        somente leitura; n_categories (oponentes do treino do fold) só na
+        codificação compacta, None na one-hot.
+    """
+    key = joblib.hash((X, [(f.train_end, f.val_start, f.val_end) for f in folds], encoding))
+    cache_dir = Path(cache_dir)
+    fold_root = cache_dir / key
+    if not fold_root.exists() and cache_dir.exists():
+        for stale in cache_dir.iterdir():
+            if stale.is_dir():
+                logger.debug(f"Removendo folds de outra chave: {stale}")
+                shutil.rmtree(stale, ignore_errors=True)
+    matrices = []
+    for i, fold in enumerate(folds):
+        fold_dir = fold_root / f"fold_{i}"
+        train_path, val_path = fold_dir / "X_train.npy", fold_dir / "X_val.npy"
+        meta_path = fold_dir / "meta.json"
+        if not (train_path.exists() and val_path.exists() and meta_path.exists()):
+            fold_dir.mkdir(parents=True, exist_ok=True)
+            preprocessor, X_train = train.fit_preprocessor(X.iloc[fold.train_idx], encoding)
+            X_val = np.asarray(preprocessor.transform(X.iloc[fold.val_idx]), dtype=X_train.dtype)
+            n_categories = preprocessor.n_categories if encoding == "compact" else None
+            # Grava com nome temporário e renomeia: um cache pela metade nunca é lido
+            for path, matrix in ((val_path, X_val), (train_path, X_train)):
+                tmp_path = path.with_name(f".{path.stem}.tmp.npy")
+                np.save(tmp_path, matrix)
+                tmp_path.replace(path)
+            tmp_path = meta_path.with_name(f".{meta_path.name}.tmp")
+            tmp_path.write_text(json.dumps({"encoding": encoding, "n_categories": n_categories}))
+            tmp_path.replace(meta_path)
+        else:
+            logger.debug(f"Fold {i}: matrizes reaproveitadas de {fold_dir}")
+        n_categories = json.loads(meta_path.read_text())["n_categories"]
+        matrices.append(
+            (np.load(train_path, mmap_mode="r"), np.load(val_path, mmap_mode="r"), n_categories)
+        )
+    return matrices
+
+
+def _target_array(y):
+    return y[:, 0] if y.shape[1] == 1 else y
+
+
+def regression_metrics(y_true, y_pred, targets):
+    y_true = y_true.reshape(len(y_true), -1)
+    y_pred = y_pred.reshape(len(y_pred), -1)
+    metrics = {}
+    for j, target in enumerate(targets):
+        metrics[target] = {
+            "mae": float(mean_absolute_error(y_true[:, j], y_pred[:, j])),
+            "rmse": float(root_mean_squared_error(y_true[:, j], y_pred[:, j])),
+            "r2": float(r2_score(y_true[:, j], y_pred[:, j])),
+        }
+    return metrics
+
+
+def classification_metrics(y_true, proba, target):
+    y_true = y_true.ravel()
+    both_classes = len(np.unique(y_true)) == 2
+    return {
+        target: {
+            "roc_auc": float(roc_auc_score(y_true, proba)) if both_classes else float("nan"),
+            "log_loss": float(log_loss(y_true, proba, labels=[0, 1])),
+            "brier": float(brier_score_loss(y_true, proba)),
+            "accuracy": float(np.mean((proba >= 0.5) == y_true)),
+        }
+    }
+
+
+def selection_score(metrics, space):
+    """Score de seleção (maior é melhor): -MAE médio dos alvos ou ROC AUC."""
+    if space.is_classifier:
+        return metrics[space.targets[0]]["roc_auc"]
+    return -float(np.mean([metrics[target]["mae"] for target in space.targets]))
+
+
+def _evaluate(space, estimator, X_train, y_train, X_val, y_val, n_categories=None):
+    """Treina e avalia; com n_categories, X é a matriz compacta (treino como em fit_models)."""
+    start = time.perf_counter()
+    if n_categories is None:
+        estimator.fit(X_train, _target_array(y_train))
+    else:
+        fit_compact(estimator, X_train, _target_array(y_train), n_categories)
+        if compact_fit_mode(estimator) != "ordinal":
+            # Ridge e demais estimadores ficam no layout do one-hot
+            X_val = onehot_matrix(X_val, n_categories)
+    fit_seconds = time.perf_counter() - start
+    if space.is_classifier:
+        positive = (
+            int(np.flatnonzero(estimator.classes_ == 1)[0]) if 1 in estimator.classes_ else None
+        )
+        proba = (
+            estimator.predict_proba(X_val)[:, positive]
+            if positive is not None
+            else np.zeros(len(X_val))
+        )
+        metrics = classification_metrics(y_val, proba, space.targets[0])
+    else:
+        metrics = regression_metrics(y_val, estimator.predict(X_val), space.targets)
+    return metrics, fit_seconds
+
+
+def _evaluate_candidate(space, params, fold_id, X_train, y_train, X_val, y_val, n_categories=None):
+    """Treina e avalia um candidato em um fold. Erros de parâmetro ou de dados viram status 'failed'."""
+    estimator = clone(space.estimator)
+    if "n_jobs" in estimator.get_params():
+        # O paralelismo fica entre candidatos/folds, não dentro do estimador
+        estimator.set_params(n_jobs=1)
+    try:
+        estimator.set_params(**params)
+        metrics, fit_seconds = _evaluate(
+            space, estimator, X_train, y_train, X_val, y_val, n_categories
+        )
+    except (ValueError, TypeError) as e:  # parâmetros inválidos, fold degenerado, LinAlgError
+        return {"fold": fold_id, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+    return {
+        "fold": fold_id,
+        "status": "ok",
+        "metrics": metrics,
+        "score": selection_score(metrics, space),
+        "fit_seconds": fit_seconds,
+    }
+
+
+def _baseline(space):
+    return DummyClassifier(strategy="prior") if space.is_classifier else DummyRegressor()
+
+
+def _mean_metrics(fold_results):
+    targets = fold_results[0]["metrics"]
+    return {
+        target: {
+            name: float(np.nanmean([r["metrics"][target][name] for r in fold_results]))
+            for name in targets[target]
+        }
+        for target in targets
+    }
+
+
+def search(
+    space, matrices, targets_df, folds, n_jobs=-1, prune=True, prune_tolerance=PRUNE_TOLERANCE
+):
+    """Avalia todos os candidatos da grade de `space` nos folds.
+
+    Sem poda, todos os pares (candidato, fold) rodam em um único lote paralelo.
+    Com poda, cada rodada avalia um fold para os candidatos ainda vivos e
+    descarta os que falharam, ficaram abaixo do baseline ou a mais de
+    `prune_tolerance` (relativo) do melhor score médio.
+
+    Returns:
+        dict com o baseline, os candidatos (parâmetros, status, métricas médias
+        por alvo) e os melhores parâmetros.
+    """
+    y = targets_df[list(space.targets)].to_numpy()
+    fold_y = [(y[fold.train_idx], y[fold.val_idx]) for fold in folds]
+    candidates = list(ParameterGrid(space.param_grid))
+
+    baseline_folds = []
+    for (X_train, X_val, _), (y_train, y_val) in zip(matrices, fold_y):
+        # O baseline ignora as features: não precisa do formato do one-hot
+        metrics, _ = _evaluate(space, _baseline(space), X_train, y_train, X_val, y_val)
+        baseline_folds.append({"metrics": metrics, "score": selection_score(metrics, space)})
+
+    results = {i: [] for i in range(len(candidates))}
+    status = {i: "ok" for i in range(len(candidates))}
+    rounds = [list(range(len(folds)))] if not prune else [[k] for k in range(len(folds))]
+    parallel = Parallel(n_jobs=n_jobs, max_nbytes=None)
+
+    done = 0
+    for round_folds in rounds:
+        done += len(round_folds)
+        alive = [i for i in status if status[i] == "ok"]
+        tasks = [(i, k) for i in alive for k in round_folds]
+        outputs = parallel(
+            delayed(_evaluate_candidate)(
+                space,
+                candidates[i],
+                k,
+                matrices[k][0],
+                fold_y[k][0],
+                matrices[k][1],
+                fold_y[k][1],
+                matrices[k][2],
+            )
+            for i, k in tasks
+        )
+        for (i, _), output in zip(tasks, outputs):
+            if output["status"] == "failed":
+                status[i] = "failed"
+                results[i].append(output)
+            elif status[i] == "ok":
+                results[i].append(output)
+
+        if not prune:
+            continue
+        baseline_score = float(np.nanmean([b["score"] for b in baseline_folds[:done]]))
+        means = {
+            i: float(np.nanmean([r["score"] for r in results[i]]))
+            for i in alive
+            if status[i] == "ok"
+        }
+        if not means:
+            break
+        best = max(means.values())
+        for i, mean in means.items():
+            if mean < baseline_score:
+                status[i] = "below_baseline"
+            elif mean < best - prune_tolerance * abs(best):
+                status[i] = "pruned"
+
+    report_candidates = []
+    for i, params in enumerate(candidates):
+        ok_results = [r for r in results[i] if r["status"] == "ok"]
+        entry = {"params": params, "status": status[i], "folds_evaluated": len(ok_results)}
+        if ok_results:
+            entry["score"] = float(np.nanmean([r["score"] for r in ok_results]))
+            entry["metrics"] = _mean_metrics(ok_results)
+            entry["fit_seconds"] = float(np.sum([r["fit_seconds"] for r in ok_results]))
+        errors = [r["error"] for r in results[i] if r["status"] == "failed"]
+        if errors:
+            entry["error"] = errors[0]
+        report_candidates.append(entry)
+
+    complete = [
+        c for c in report_candidates if c["status"] == "ok" and c["folds_evaluated"] == len(folds)
+    ]
+    best_entry = max(complete, key=lambda c: c["score"]) if complete else None
+    return {
+        "targets": list(space.targets),
+        "task": "classification" if space.is_classifier else "regression",
+        "baseline": {
+            "score": float(np.nanmean([b["score"] for b in baseline_folds])),
+            "metrics": _mean_metrics(baseline_folds),
+        },
+        "best_params": best_entry["params"] if best_entry else None,
+        "best_score": best_entry["score"] if best_entry else None,
+        "best_metrics": best_entry["metrics"] if best_entry else None,
+        "candidates": report_candidates,
+    }
+
+
+def evaluate(
+    df,
+    search_spaces=DEFAULT_SEARCH,
+    n_splits=DEFAULT_N_SPLITS,
+    n_jobs=-1,
+    prune=True,
+    cache_dir=FOLD_CACHE_DIR,
+    encoding=train.DEFAULT_ENCODING,
+):
+    """Roda a busca de todos os modelos e monta o relatório completo.
+
+    `encoding` é a codificação da matriz de treino (a mesma do train_model.py).
+    """
+    feature_cols = get_feature_columns(df.columns)
+    targets = train.build_targets(
+        df, list(dict.fromkeys(t for space in search_spaces for t in space.targets))
+    )
+    folds = walk_forward_splits(df["GAME_DATE"], n_splits)
+    matrices = prepare_fold_matrices(df[feature_cols], folds, cache_dir, encoding)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "n_rows": len(df),
+        "encoding": encoding,
+        "folds": [
+            {
+                "train_end": f.train_end,
+                "val_start": f.val_start,
+                "val_end": f.val_end,
+                "n_train": len(f.train_idx),
+                "n_val": len(f.val_idx),
+            }
+            for f in folds
+        ],
+        "models": {},
+    }
+    for space in search_spaces:
+        start = time.perf_counter()
+        report["models"][space.name] = search(space, matrices, targets, folds, n_jobs, prune)
+        report["models"][space.name]["search_seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def tuned_specs(specs, report, encoding=train.DEFAULT_ENCODING):
+    """Aplica os melhores parâmetros do relatório às ModelSpecs de mesmo nome.
+
+    Raises:
+        ValueError: o relatório avaliou outra codificação (parâmetros não
+            validados na matriz do treino). Relatórios sem o campo são de
+            antes da codificação compacta, ou seja, one-hot.
+    """
+    report_encoding = report.get("encoding", "onehot")
+    if report_encoding != encoding:
+        raise ValueError(
+            f"Relatório de avaliação feito com a codificação {report_encoding}, treino com "
+            f"{encoding}: rode 'make evaluate' de novo "
+            f"(ou treine com --encoding {report_encoding})."
+        )
+    tuned = []
+    for spec in specs:
+        best = report["models"].get(spec.name, {}).get("best_params")
+        estimator = clone(spec.estimator).set_params(**best) if best else spec.estimator
+        tuned.append(train.ModelSpec(spec.name, estimator, spec.targets))
+    return tuple(tuned)
+
+
+def save_report(report, path=REPORT_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    return path
+
+
+def load_report(path=REPORT_PATH):
+    return json.loads(Path(path).read_text())
+
+
+def log_report(report):
+    for name, result in report["models"].items():
+        logger.info(
+            f"{name}: melhores parâmetros {result['best_params']} "
+            f"(score {result['best_score']}, baseline {result['baseline']['score']:.4f})"
+        )
+        for target, metrics in (result["best_metrics"] or {}).items():
+            values = ", ".join(f"{metric}={value:.4f}" for metric, value in metrics.items())
+            logger.info(f"  {target}: {values}")
+        counts = {}
+        for candidate in result["candidates"]:
+            counts[candidate["status"]] = counts.get(candidate["status"], 0) + 1
+        logger.info(f"  candidatos: {counts} em {result['search_seconds']:.1f}s")
+
+
+@app.command()
+def main(
+    processed_path: Path = PROCESSED_FILE_PATH,
+    report_path: Path = REPORT_PATH,
+    n_splits: int = DEFAULT_N_SPLITS,
+    workers: int = -1,
+    prune: bool = True,
+    encoding: str = train.DEFAULT_ENCODING,
+):
+    if encoding not in train.ENCODINGS:
+        raise typer.BadParameter(
+            f"Codificação desconhecida: {encoding} (opções: {', '.join(train.ENCODINGS)})",
+            param_hint="--encoding",
+        )
+    columns = storage.table_columns(processed_path)
+    feature_cols = get_feature_columns(columns)
+    target_cols = train.target_source_columns(
+        [t for space in DEFAULT_SEARCH for t in space.targets]
+    )
+    df = storage.read_table(
+        processed_path, columns=list(dict.fromkeys(feature_cols + target_cols + ["GAME_DATE"]))
+    )
+    df = df.sort_values("GAME_DATE", kind="stable").reset_index(drop=True)
+    logger.info(
+        f"Avaliando {len(df)} jogos em {n_splits} folds walk-forward ({workers} workers, "
+        f"codificação {encoding})..."
+    )
+
+    report = evaluate(df, DEFAULT_SEARCH, n_splits, workers, prune, encoding=encoding)
+    log_report(report)
+    logger.success(f"Relatório salvo em {save_report(report, report_path)}")
+
+
+if __name__ == "__main__":
+    app()
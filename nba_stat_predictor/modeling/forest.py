@@ -0,0 +1,216 @@
+"""Floresta de classificação em arrays planos, avaliada com NumPy.
+
+Cada processo que faz joblib.load de uma RandomForest desserializa as
+árvores no próprio heap. Aqui as árvores viram poucos arrays planos (nós de
+todas as árvores concatenados), que podem ser gravados em .npy e abertos
+como memmap somente leitura: vários processos compartilham a mesma cópia no
+cache de páginas do sistema.
+
+- roots: índice do nó raiz de cada árvore;
+- children: (n_nós, 2) filhos esquerdo e direito em índices globais; as
+  folhas apontam para si mesmas, então toda linha pode descer max_depth
+  níveis sem testar se chegou a uma folha;
+- feature, threshold, missing_left: o teste de cada nó, como no scikit-learn
+  (x <= threshold vai para a esquerda; NaN segue missing_left);
+- value: probabilidade da classe positiva em cada nó (tree_.value).
+
+Lotes pequenos (o caso do serviço e do app) descem todas as árvores de uma
+vez com NumPy, mais rápido que chamar as árvores do scikit-learn uma a uma.
+Em lotes de BATCH_ROWS linhas ou mais, o Cython do scikit-learn é mais rápido:
+as árvores são remontadas a partir dos arrays a cada chamada (~10 ms para
+100 árvores) e descartadas no fim, então um lote grande não deixa uma cópia
+privada da floresta no processo (só from_forest guarda as árvores, que já
+estão no heap). Os dois caminhos somam as árvores na mesma ordem e dão
+probabilidades bit a bit iguais às do predict_proba da floresta original.
+"""
+
+import numpy as np
+
+# A partir deste tamanho de lote, as árvores do scikit-learn são mais rápidas que o NumPy
+BATCH_ROWS = 128
+ARRAY_NAMES = ("roots", "children", "feature", "threshold", "missing_left", "value")
+_TREE_LEAF = -1
+_TREE_UNDEFINED = -2
+
+
+class ForestArrays:
+    """Probabilidade da classe positiva de uma RandomForestClassifier, a partir de arrays planos.
+
+    Attributes:
+        n_features: colunas da matriz de entrada.
+        n_classes: classes da floresta original (para remontar as árvores).
+        positive_class: coluna da classe positiva em predict_proba.
+        max_depth: maior profundidade entre as árvores.
+    """
+
+    def __init__(
+        self,
+        roots,
+        children,
+        feature,
+        threshold,
+        missing_left,
+        value,
+        n_features,
+        n_classes,
+        positive_class,
+        max_depth,
+        trees=None,
+    ):
+        self.roots = roots
+        self.children = children
+        self.feature = feature
+        self.threshold = threshold
+        self.missing_left = missing_left
+        self.value = value
+        self.n_features = int(n_features)
+        self.n_classes = int(n_classes)
+        self.positive_class = int(positive_class)
+        self.max_depth = int(max_depth)
+        self._trees = trees
+
+    @classmethod
+    def from_forest(cls, forest):
+        """Achata uma RandomForestClassifier (binária, um alvo) treinada.
+
+        Lê atributos internos de sklearn.tree._tree.Tree (missing_go_to_left,
+        value como frações da classe, desde o scikit-learn 1.4).
+
+        Raises:
+            ValueError: as folhas não guardam frações (value somando 1), ou
+                seja, um scikit-learn anterior ao 1.4.
+        """
+        positive_class = int(np.flatnonzero(forest.classes_ == 1)[0])
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+        children, feature, threshold, missing_left, value = [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            own = np.arange(tree.node_count) + offset
+            leaf = tree.children_left == _TREE_LEAF
+            leaf_sums = tree.value[leaf, 0, :].sum(axis=1)
+            if not np.allclose(leaf_sums, 1.0):
+                raise ValueError(
+                    "tree_.value das folhas não soma 1 (contagens em vez de frações): "
+                    "a compilação da floresta exige scikit-learn>=1.4."
+                )
+            children.append(
+                np.column_stack(
+                    [
+                        np.where(leaf, own, tree.children_left + offset),
+                        np.where(leaf, own, tree.children_right + offset),
+                    ]
+                )
+            )
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            missing_left.append(tree.missing_go_to_left)
+            value.append(tree.value[:, 0, positive_class])
+        return cls(
+            roots=offsets.astype(np.int32),
+            children=np.concatenate(children).astype(np.int32),
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            missing_left=np.concatenate(missing_left).astype(np.uint8),
+            value=np.concatenate(value).astype(np.float64),
+            n_features=forest.n_features_in_,
+            n_classes=forest.n_classes_,
+            positive_class=positive_class,
+            max_depth=max(tree.max_depth for tree in trees),
+            trees=trees,
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        """Monta a partir de arrays (ex.: memmaps) e de metadata()."""
+        return cls(
+            **{name: arrays[name] for name in ARRAY_NAMES},
+            **{key: value for key, value in metadata.items() if key != "n_trees"},
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def arrays(self):
+        """{nome: array} para gravar em disco (ver ARRAY_NAMES)."""
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    def metadata(self):
+        return {
+            "n_trees": self.n_trees,
+            "n_features": self.n_features,
+            "n_classes": self.n_classes,
+            "positive_class": self.positive_class,
+            "max_depth": self.max_depth,
+        }
+
+    def leaf_values(self, X):
+        """(n_árvores, n_linhas): valor da folha de cada linha em cada árvore."""
+        n_rows, n_cols = X.shape
+        flat = X.reshape(-1)
+        children = self.children.reshape(-1)
+        has_nan = bool(np.isnan(flat).any())
+        row_offsets = np.arange(n_rows, dtype=np.int64) * n_cols
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            x = flat[row_offsets + self.feature[node]]
+            go_right = x > self.threshold[node]
+            if has_nan:
+                go_right |= np.isnan(x) & (self.missing_left[node] == 0)
+            node = children[2 * node + go_right]
+        return self.value[node]
+
+    def trees(self):
+        """Árvores do scikit-learn (sklearn.tree._tree.Tree), uma a uma.
+
+        As de from_forest são reaproveitadas; as demais são remontadas dos
+        arrays a cada chamada, sem ficarem guardadas no objeto.
+        """
+        if self._trees is not None:
+            yield from self._trees
+        else:
+            for i in range(self.n_trees):
+                yield self._build_tree(i)
+
+    def _build_tree(self, i):
+        # Import tardio: o caminho NumPy (serviço, app) não carrega o scikit-learn
+        from sklearn.tree._tree import NODE_DTYPE, Tree
+
+        start = int(self.roots[i])
+        stop = int(self.roots[i + 1]) if i + 1 < self.n_trees else len(self.value)
+        own = np.arange(start, stop)
+        children = np.asarray(self.children[start:stop], dtype=np.int64)
+        leaf = children[:, 0] == own
+        nodes = np.zeros(stop - start, dtype=NODE_DTYPE)
+        nodes["left_child"] = np.where(leaf, _TREE_LEAF, children[:, 0] - start)
+        nodes["right_child"] = np.where(leaf, _TREE_LEAF, children[:, 1] - start)
+        nodes["feature"] = np.where(leaf, _TREE_UNDEFINED, self.feature[start:stop])
+        nodes["threshold"] = self.threshold[start:stop]
+        nodes["missing_go_to_left"] = self.missing_left[start:stop]
+        # Só a coluna da classe positiva é lida na predição
+        values = np.zeros((stop - start, 1, self.n_classes))
+        values[:, 0, self.positive_class] = self.value[start:stop]
+        tree = Tree(self.n_features, np.array([self.n_classes], dtype=np.intp), 1)
+        # max_depth da floresta: limite superior, não é usado na predição
+        tree.__setstate__(
+            {
+                "max_depth": self.max_depth,
+                "node_count": len(nodes),
+                "nodes": nodes,
+                "values": values,
+            }
+        )
+        return tree
+
+    def predict_positive(self, X):
+        """Probabilidade média (das árvores) da classe positiva para X float32 contíguo."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        proba = np.zeros(len(X), dtype=np.float64)
+        if len(X) < BATCH_ROWS:
+            for values in self.leaf_values(X):
+                proba += values
+        else:
+            for tree in self.trees():
+                proba += tree.predict(X)[:, self.positive_class]
+        proba /= self.n_trees
+        return proba
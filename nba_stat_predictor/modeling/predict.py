@@ -1,29 +1,160 @@
+"""Predição em lote para um slate de confrontos (jogador, oponente, mando de quadra).
+
+    python -m nba_stat_predictor.modeling.predict data/external/slate.csv
+
+O slate é um CSV com as colunas PLAYER_ID, OPPONENT e HOME (1 = em casa).
+As features de cada jogador vêm do último vetor salvo pelo build_features.py
+(player_latest_features.parquet), com as estatísticas OPP_ do oponente do
+confronto (defense_table.npz, temporada mais recente); a matriz inteira é montada de uma vez e os
+modelos são chamados uma vez por bloco de `chunk_size` linhas, com o
+resultado gravado em disco bloco a bloco.
+"""
+
 from pathlib import Path
+import time
+from typing import Annotated
 
 from loguru import logger
-from tqdm import tqdm
+import numpy as np
+import pandas as pd
 import typer
 
+from nba_stat_predictor import storage
 from nba_stat_predictor.config import MODELS_DIR, PROCESSED_DATA_DIR
+from nba_stat_predictor.defense import DEFENSE_TABLE_FILE, DefenseTable
+from nba_stat_predictor.modeling.compiled import REG_TARGETS, load_compiled
 
 app = typer.Typer()
 
+LATEST_FEATURES_PATH = PROCESSED_DATA_DIR / "player_latest_features.parquet"
+DEFENSE_TABLE_PATH = PROCESSED_DATA_DIR / DEFENSE_TABLE_FILE
+SLATE_COLUMNS = ["PLAYER_ID", "OPPONENT", "HOME"]
+PREDICTION_COLUMNS = [f"{target}_PRED" for target in REG_TARGETS] + ["DD_PROB"]
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def load_models(models_dir=MODELS_DIR):
+    """Carrega o artefato de inferência compilado (ver modeling/compiled.py)."""
+    return load_compiled(models_dir)
+
+
+def load_latest_features(path=LATEST_FEATURES_PATH):
+    """Último vetor de features de cada jogador, indexado por Player_ID."""
+    return storage.read_table(path).set_index("Player_ID")
+
+
+def load_defense_table(path=DEFENSE_TABLE_PATH):
+    """Tabela de defesa por (temporada, time), ou None se o build ainda não a gerou."""
+    if not Path(path).exists():
+        logger.warning(
+            f"Tabela de defesa não encontrada em {path}; "
+            "as features OPP_ serão as do último jogo de cada jogador."
+        )
+        return None
+    return DefenseTable.load(path)
+
+
+def build_feature_frame(slate, df_latest, defense=None):
+    """Monta as features de todos os confrontos do slate em uma única operação.
+
+    Cada linha recebe o último vetor do jogador (mesma regra do app) com
+    OPPONENT e HOME substituídos pelos do confronto. Com `defense`, as colunas
+    OPP_ passam a ser as do oponente do confronto na temporada mais recente da
+    tabela (um gather pelos códigos); oponentes fora da tabela mantêm as do
+    último jogo.
+
+    Returns:
+        (X, found): X na ordem de colunas do modelo e a máscara booleana dos
+        jogadores encontrados em df_latest. Linhas sem jogador ficam com NaN.
+    """
+    player_ids = slate["PLAYER_ID"].to_numpy()
+    positions = df_latest.index.get_indexer(player_ids)
+    found = positions >= 0
+    X = df_latest.reindex(player_ids).reset_index(drop=True)
+    X["OPPONENT"] = slate["OPPONENT"].to_numpy()
+    X["HOME"] = slate["HOME"].astype(int).to_numpy()
+    if defense is not None:
+        opp_cols = [col for col in defense.columns if col in X.columns]
+        team_codes = defense.team_codes(X["OPPONENT"])
+        known = team_codes >= 0
+        season_codes = np.full(len(X), defense.season_index[defense.latest_season])
+        values = defense.gather(season_codes, team_codes)[
+            :, [defense.columns.index(c) for c in opp_cols]
+        ]
+        X.loc[known, opp_cols] = values[known]
+    return X[df_latest.columns], found
+
+
+def predict_features(X, predictor):
+    """Roda os dois modelos uma única vez sobre X (alvos do Ridge + probabilidade de DD)."""
+    return predictor.predict_frame(X)
+
+
+def predict_slate(slate, df_latest, predictor, chunk_size=DEFAULT_CHUNK_SIZE, defense=None):
+    """Gera as previsões do slate em blocos de até `chunk_size` linhas.
+
+    Jogadores sem histórico recebem previsões NaN (e um aviso no log).
+
+    Yields:
+        DataFrames com as colunas do slate mais PREDICTION_COLUMNS.
+    """
+    slate = slate[SLATE_COLUMNS].reset_index(drop=True)
+    X, found = build_feature_frame(slate, df_latest, defense)
+    if not found.all():
+        missing = slate.loc[~found, "PLAYER_ID"].unique()
+        logger.warning(f"{len(missing)} jogadores sem features salvas: {list(missing[:10])}")
+
+    for start in range(0, len(slate), chunk_size):
+        stop = min(start + chunk_size, len(slate))
+        chunk_found = found[start:stop]
+        preds = np.full((stop - start, len(PREDICTION_COLUMNS)), np.nan)
+        if chunk_found.any():
+            X_chunk = X.iloc[start:stop][chunk_found]
+            preds[chunk_found] = predict_features(X_chunk, predictor)
+        result = slate.iloc[start:stop].copy()
+        result[PREDICTION_COLUMNS] = preds
+        yield result
+
+
+def write_predictions(chunks, predictions_path):
+    """Grava os blocos de previsões em CSV à medida que são gerados."""
+    predictions_path = Path(predictions_path)
+    predictions_path.parent.mkdir(parents=True, exist_ok=True)
+    n_rows = 0
+    with open(predictions_path, "w", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=(i == 0), index=False, float_format="%.4f")
+            n_rows += len(chunk)
+    return n_rows
+
 
 @app.command()
 def main(
-    # ---- REPLACE DEFAULT PATHS AS APPROPRIATE ----
-    features_path: Path = PROCESSED_DATA_DIR / "test_features.csv",
-    model_path: Path = MODELS_DIR / "model.pkl",
-    predictions_path: Path = PROCESSED_DATA_DIR / "test_predictions.csv",
-    # -----------------------------------------
+    slate_path: Annotated[
+        Path, typer.Argument(help="CSV com as colunas PLAYER_ID, OPPONENT, HOME.")
+    ],
+    latest_features_path: Path = LATEST_FEATURES_PATH,
+    defense_table_path: Path = DEFENSE_TABLE_PATH,
+    models_dir: Path = MODELS_DIR,
+    predictions_path: Path = PROCESSED_DATA_DIR / "predictions.csv",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
 ):
-    # ---- REPLACE THIS WITH YOUR OWN CODE ----
-    logger.info("Performing inference for model...")
-    for i in tqdm(range(10), total=10):
-        if i == 5:
-            logger.info("Something happened for iteration 5.")
-    logger.success("Inference complete.")
-    # -----------------------------------------
+    logger.info(f"Carregando slate de {slate_path}...")
+    slate = pd.read_csv(slate_path)
+    missing_cols = set(SLATE_COLUMNS) - set(slate.columns)
+    if missing_cols:
+        raise typer.BadParameter(f"Colunas ausentes no slate: {sorted(missing_cols)}")
+
+    predictor = load_models(models_dir)
+    df_latest = load_latest_features(latest_features_path)
+    defense = load_defense_table(defense_table_path)
+
+    start = time.perf_counter()
+    n_rows = write_predictions(
+        predict_slate(slate, df_latest, predictor, chunk_size, defense), predictions_path
+    )
+    elapsed = time.perf_counter() - start
+    logger.success(f"{n_rows} previsões gravadas em {predictions_path} ({elapsed * 1000:.0f} ms).")
 
 
 if __name__ == "__main__":
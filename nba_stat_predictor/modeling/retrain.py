@@ -0,0 +1,384 @@
+"""Retreino incremental: atualiza os modelos salvos só com as linhas novas da tabela processada.
+
+O build incremental (build_features.py --incremental) anexa os jogos novos
+em arquivos novos da tabela processada, sem reescrever os existentes
+(storage.append_table). O manifest.json de cada treino guarda a lista de
+arquivos lidos (storage.table_files), então as linhas novas são as dos
+arquivos que não estão nela. A partir delas:
+
+- o Ridge (treinado pelas equações normais, codificação compacta) guarda as
+  estatísticas suficientes (NormalEquations: médias, X'X e X'y
+  centralizados) no próprio estimador; as das linhas novas são somadas às
+  salvas e o sistema é resolvido de novo. O resultado é o de um treino
+  completo sobre todas as linhas, a menos de arredondamento;
+- a floresta ganha árvores novas (warm_start) treinadas na janela de jogos
+  recentes (as linhas novas e os jogos mais recentes do histórico, até
+  RetrainPolicy.recent_fraction das linhas). O número de árvores novas é
+  proporcional às linhas novas.
+
+O manifest guarda também a data de início da janela recente e as contagens
+por classe dos classificadores, então update lê do histórico só os arquivos
+(e row groups) a partir dessa data, e os pesos class_weight="balanced" de
+todas as linhas saem das contagens, sem reler o histórico inteiro.
+
+O pré-processador não muda (as categorias de OPPONENT são as do último
+treino completo). RetrainPolicy define quando o incremental não serve e é
+preciso um treino completo (full_refit_reason e update devolvem o motivo):
+
+- não há treino anterior com registro incremental, ou a codificação, as
+  features ou os modelos (estimadores e parâmetros) mudaram;
+- algum modelo não tem atualização incremental (só Ridge pelas equações
+  normais e florestas do scikit-learn têm);
+- algum arquivo lido no último treino sumiu ou mudou (tabela reconstruída
+  pelo build completo: o histórico pode ter mudado);
+- apareceu um oponente fora das categorias do pré-processador;
+- as linhas novas desde o último treino completo passam de
+  max_new_fraction das linhas daquele treino, ou as árvores acrescentadas
+  passariam de max_forest_growth das árvores originais.
+
+Exemplo de uso (ver src/models/train_model.py --incremental):
+
+    result = update(MODELS_DIR, PROCESSED_PATH, specs, feature_cols)
+    if result.status == "updated":
+        save_artifacts(MODELS_DIR, result.preprocessor, result.fitted, specs, feature_cols,
+                       extra=result.record)
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+import math
+from pathlib import Path
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone, is_classifier
+from sklearn.ensemble import (
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+
+from nba_stat_predictor import storage
+from nba_stat_predictor.modeling.compiled import CATEGORICAL_COL, MANIFEST_FILE, PREPROCESSOR_FILE
+from nba_stat_predictor.modeling.encoding import NormalEquations, compact_fit_mode
+from nba_stat_predictor.modeling.train import (
+    build_targets,
+    json_params,
+    load_manifest,
+    required_targets,
+    target_array,
+    target_source_columns,
+)
+
+FORESTS = (
+    RandomForestClassifier,
+    RandomForestRegressor,
+    ExtraTreesClassifier,
+    ExtraTreesRegressor,
+)
+DATE_COL = "GAME_DATE"
+# Parâmetros que não mudam o modelo treinado
+RUNTIME_PARAMS = ("n_jobs", "verbose", "warm_start")
+
+
+@dataclass(frozen=True)
+class RetrainPolicy:
+    """Limites do retreino incremental (acima deles, treino completo).
+
+    Attributes:
+        max_new_fraction: linhas novas acumuladas desde o último treino
+            completo, como fração das linhas daquele treino.
+        max_forest_growth: árvores acrescentadas desde o último treino
+            completo, como fração das árvores originais.
+        recent_fraction: tamanho da janela de jogos recentes em que as
+            árvores novas são treinadas, como fração de todas as linhas.
+        min_new_trees: árvores acrescentadas em cada atualização, no mínimo.
+    """
+
+    max_new_fraction: float = 0.2
+    max_forest_growth: float = 0.5
+    recent_fraction: float = 0.2
+    min_new_trees: int = 2
+
+
+@dataclass
+class RetrainResult:
+    """Resultado de update.
+
+    status: "updated" (modelos atualizados), "up_to_date" (nenhuma linha
+    nova) ou "full_refit" (o incremental não serve; ver `reason`).
+    """
+
+    status: str
+    reason: str = None
+    preprocessor: object = None
+    fitted: dict = field(default_factory=dict)
+    record: dict = field(default_factory=dict)
+    n_new_rows: int = 0
+
+
+def update_mode(estimator):
+    """Como o estimador é atualizado: "normal_equations", "warm_start" ou None (só treino completo)."""
+    if compact_fit_mode(estimator) == "normal_equations":
+        return "normal_equations"
+    if isinstance(estimator, FORESTS):
+        return "warm_start"
+    return None
+
+
+def _model_params(estimator):
+    params = {
+        key: value for key, value in json_params(estimator).items() if key not in RUNTIME_PARAMS
+    }
+    return {"estimator": type(estimator).__name__, **params}
+
+
+def _class_counts(y):
+    labels, counts = np.unique(y, return_counts=True)
+    return {str(label): int(count) for label, count in zip(labels, counts)}
+
+
+def _counted_specs(specs):
+    """Classificadores atualizados por warm_start: guardam as contagens por classe."""
+    return [
+        spec
+        for spec in specs
+        if update_mode(spec.estimator) == "warm_start" and is_classifier(spec.estimator)
+    ]
+
+
+def _window_record(dates, recent_fraction):
+    """Início (data do jogo mais antigo) dos ceil(recent_fraction * n) jogos mais recentes."""
+    dates = np.sort(np.asarray(dates, dtype="datetime64[ns]"))
+    n_window = min(len(dates), math.ceil(recent_fraction * len(dates)))
+    start = pd.Timestamp(dates[len(dates) - n_window]).isoformat() if n_window else None
+    return {"fraction": recent_fraction, "start": start}
+
+
+def training_record(files, specs, targets, dates, recent_fraction=RetrainPolicy.recent_fraction):
+    """Seção do manifest de um treino completo: arquivos lidos e ponto de partida do incremental.
+
+    Args:
+        files: arquivos lidos (storage.table_files).
+        targets: alvos do treino (train.build_targets), para as contagens por classe.
+        dates: GAME_DATE das linhas do treino, para o início da janela recente.
+    """
+    n_rows = len(targets)
+    return {
+        "n_rows": n_rows,
+        "training_data": {"files": dict(files)},
+        "incremental": {
+            "full_refit_rows": n_rows,
+            "new_rows": 0,
+            "updates": 0,
+            "spec_params": {spec.name: _model_params(spec.estimator) for spec in specs},
+            "base_estimators": {
+                spec.name: spec.estimator.n_estimators
+                for spec in specs
+                if update_mode(spec.estimator) == "warm_start"
+            },
+            "class_counts": {
+                spec.name: _class_counts(target_array(targets, spec))
+                for spec in _counted_specs(specs)
+            },
+            "recent_window": _window_record(dates, recent_fraction),
+        },
+    }
+
+
+def full_refit_reason(manifest, files, specs, feature_cols):
+    """Motivo para um treino completo, visível só pelo manifest e pela lista de arquivos (ou None)."""
+    if manifest is None:
+        return "nenhum treino anterior"
+    record = manifest.get("incremental")
+    if record is None or "training_data" not in manifest or "recent_window" not in record:
+        return "o último treino não tem registro incremental"
+    if manifest.get("encoding") != "compact":
+        return f"codificação {manifest.get('encoding')} (o incremental usa a compacta)"
+    if manifest.get("feature_cols") != list(feature_cols):
+        return "as features mudaram desde o último treino"
+    current = {spec.name: _model_params(spec.estimator) for spec in specs}
+    if current != record["spec_params"] or set(current) != set(manifest.get("models", {})):
+        return "os modelos ou os parâmetros mudaram desde o último treino"
+    for spec in specs:
+        if update_mode(spec.estimator) is None:
+            return f"{spec.name} ({type(spec.estimator).__name__}) não tem atualização incremental"
+    changed = [
+        name
+        for name, signature in manifest["training_data"]["files"].items()
+        if files.get(name) != signature
+    ]
+    if changed:
+        return f"a tabela processada foi reconstruída ({len(changed)} arquivos do último treino mudaram)"
+    return None
+
+
+def _recent_window(df_old, df_new, n_rows, recent_fraction):
+    """Linhas novas + os jogos mais recentes do histórico, até recent_fraction das n_rows linhas.
+
+    df_old pode ser só a parte recente do histórico (lida a partir do início
+    da janela anterior): os jogos escolhidos são os mesmos.
+    """
+    n_window = max(len(df_new), math.ceil(recent_fraction * n_rows))
+    n_old = min(n_window - len(df_new), len(df_old))
+    df_recent = df_old.sort_values(DATE_COL, kind="stable").iloc[len(df_old) - n_old :]
+    return pd.concat([df_recent, df_new], ignore_index=True)
+
+
+def _new_trees(policy, base, n_new, n_rows):
+    return max(policy.min_new_trees, math.ceil(base * n_new / n_rows))
+
+
+def _read_window(table_path, columns, files, window, recent_fraction):
+    """Histórico a partir do início da janela registrada (tudo, se a janela pedida é maior)."""
+    filters = None
+    if window["start"] is not None and recent_fraction <= window["fraction"]:
+        filters = [(DATE_COL, ">=", pd.Timestamp(window["start"]))]
+    return storage.read_table(table_path, columns=columns, files=files, filters=filters)
+
+
+def update(models_dir, table_path, specs, feature_cols, policy=None):
+    """Atualiza os modelos salvos em models_dir com as linhas novas de table_path.
+
+    Nada é gravado: o chamador salva result.fitted com result.record no
+    manifest (train.save_artifacts) e compila o artefato de inferência.
+
+    Args:
+        policy: RetrainPolicy; None usa os limites padrão.
+
+    Returns:
+        RetrainResult.
+    """
+    policy = RetrainPolicy() if policy is None else policy
+    models_dir = Path(models_dir)
+    manifest = load_manifest(models_dir) if (models_dir / MANIFEST_FILE).exists() else None
+    files = storage.table_files(table_path)
+    reason = full_refit_reason(manifest, files, specs, feature_cols)
+    if reason is not None:
+        return RetrainResult("full_refit", reason)
+    trained = manifest["training_data"]["files"]
+    new_files = [name for name in files if name not in trained]
+    if not new_files:
+        return RetrainResult("up_to_date")
+
+    record = manifest["incremental"]
+    targets = required_targets(specs)
+    columns = list(dict.fromkeys(list(feature_cols) + target_source_columns(targets) + [DATE_COL]))
+    df_new = storage.read_table(table_path, columns=columns, files=new_files)
+    new_rows = record["new_rows"] + len(df_new)
+    if new_rows > policy.max_new_fraction * record["full_refit_rows"]:
+        return RetrainResult(
+            "full_refit",
+            f"{new_rows} linhas novas desde o último treino completo "
+            f"(limite: {policy.max_new_fraction:.0%} de "
+            f"{record['full_refit_rows']})",
+            n_new_rows=len(df_new),
+        )
+
+    preprocessor = joblib.load(models_dir / PREPROCESSOR_FILE)
+    unseen = sorted(
+        set(df_new[CATEGORICAL_COL].astype(str)) - set(preprocessor.categories_.astype(str))
+    )
+    if unseen:
+        return RetrainResult(
+            "full_refit",
+            f"oponentes fora do último treino completo: {unseen}",
+            n_new_rows=len(df_new),
+        )
+
+    models = {
+        spec.name: joblib.load(models_dir / manifest["models"][spec.name]["file"])
+        for spec in specs
+    }
+    n_rows = manifest["n_rows"] + len(df_new)
+    new_trees = {}
+    for spec in specs:
+        model = models[spec.name]
+        if update_mode(spec.estimator) == "normal_equations":
+            if not isinstance(getattr(model, "normal_equations_", None), NormalEquations):
+                return RetrainResult(
+                    "full_refit",
+                    f"{spec.name} foi treinado sem as estatísticas suficientes",
+                    n_new_rows=len(df_new),
+                )
+            continue
+        base = record["base_estimators"][spec.name]
+        new_trees[spec.name] = _new_trees(policy, base, len(df_new), n_rows)
+        if len(model.estimators_) + new_trees[spec.name] - base > policy.max_forest_growth * base:
+            return RetrainResult(
+                "full_refit",
+                f"{spec.name} passaria de {base} para "
+                f"{len(model.estimators_) + new_trees[spec.name]} árvores "
+                f"(limite: +{policy.max_forest_growth:.0%})",
+                n_new_rows=len(df_new),
+            )
+
+    X_new = preprocessor.transform(df_new[feature_cols])
+    targets_new = build_targets(df_new, targets)
+    class_counts = {}
+    for spec in _counted_specs(specs):
+        counts = Counter(record["class_counts"][spec.name])
+        counts.update(_class_counts(target_array(targets_new, spec)))
+        class_counts[spec.name] = dict(counts)
+    recent_window = record["recent_window"]
+    df_window = None
+    if new_trees:
+        # Só a parte recente do histórico: os arquivos anteriores à janela nem são abertos
+        df_old = _read_window(
+            table_path, columns, list(trained), recent_window, policy.recent_fraction
+        )
+        df_window = _recent_window(df_old, df_new, n_rows, policy.recent_fraction)
+        del df_old
+        recent_window = {
+            "fraction": policy.recent_fraction,
+            "start": df_window[DATE_COL].min().isoformat(),
+        }
+    fitted = {}
+    for spec in specs:
+        start = time.perf_counter()
+        model = models[spec.name]
+        y_new = target_array(targets_new, spec)
+        if spec.name not in new_trees:
+            statistics = model.normal_equations_.merge(
+                NormalEquations.from_matrix(X_new, y_new, preprocessor.n_categories)
+            )
+            model = statistics.solve(clone(spec.estimator))
+            model.normal_equations_ = statistics
+        else:
+            # warm_start: as árvores existentes ficam; as novas são treinadas só na janela recente
+            X_window = preprocessor.transform(df_window[feature_cols])
+            y_window = target_array(build_targets(df_window, spec.targets), spec)
+            class_weight = getattr(model, "class_weight", None)
+            if class_weight == "balanced":
+                # Pesos das classes de todas as linhas, como no treino completo, e não só da janela
+                counts = np.array(
+                    [class_counts[spec.name].get(str(label), 0) for label in model.classes_]
+                )
+                weights = counts.sum() / (len(counts) * counts)
+                model.set_params(class_weight=dict(zip(model.classes_, weights)))
+            model.set_params(
+                warm_start=True, n_estimators=len(model.estimators_) + new_trees[spec.name]
+            )
+            model.fit(X_window, y_window)
+            model.set_params(warm_start=False)
+            if class_weight == "balanced":
+                model.set_params(class_weight=class_weight)
+        fitted[spec.name] = (model, time.perf_counter() - start)
+
+    updated = {
+        "n_rows": int(n_rows),
+        "training_data": {"files": dict(files)},
+        "incremental": {
+            **record,
+            "new_rows": int(new_rows),
+            "updates": record["updates"] + 1,
+            "class_counts": class_counts,
+            "recent_window": recent_window,
+        },
+    }
+    return RetrainResult(
+        "updated", preprocessor=preprocessor, fitted=fitted, record=updated, n_new_rows=len(df_new)
+    )
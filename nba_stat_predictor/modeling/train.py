@@ -1,30 +1,270 @@
+"""Treino de vários modelos (alvo + estimador) sobre uma matriz pré-processada compartilhada.
+
+O pré-processamento roda uma única vez, em uma de duas codificações:
+
+- "onehot": ColumnTransformer com one-hot denso do OPPONENT (matriz float64);
+- "compact": CompactEncoder, com o código do OPPONENT numa coluna (matriz
+  float32, ~1/4 da memória); cada modelo a consome no formato que lhe é mais
+  barato (ver nba_stat_predictor/modeling/encoding.py).
+
+A matriz resultante é gravada em um .npy e aberta como memmap somente
+leitura, então os processos de treino a leem do mesmo arquivo em vez de
+receber uma cópia cada um. Cada ModelSpec (nome, estimador, alvos) é treinado
+em paralelo com joblib e todos os artefatos são salvos com um manifest.json.
+
+Exemplo de uso (ver src/models/train_model.py):
+
+    preprocessor, X = fit_preprocessor(df[feature_cols], encoding="compact")
+    fitted = fit_models(X, build_targets(df, required_targets(specs)), specs, n_jobs=4,
+                        encoder=preprocessor)
+    save_artifacts(MODELS_DIR, preprocessor, fitted, specs, feature_cols)
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
 from pathlib import Path
+import re
+import tempfile
+import time
+import uuid
+
+import joblib
+from joblib import Parallel, cpu_count, delayed, effective_n_jobs
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import OneHotEncoder
+
+from nba_stat_predictor.config import MODELS_DIR
+from nba_stat_predictor.modeling.compiled import (
+    CATEGORICAL_COL,
+    MANIFEST_FILE,
+    PREPROCESSOR_FILE,
+    REG_TARGETS,
+)
+from nba_stat_predictor.modeling.encoding import CompactEncoder, fit_compact
+
+ENCODINGS = ("onehot", "compact")
+DEFAULT_ENCODING = "compact"
+
+# Alvos derivados: "<STAT>_GE_<N>" vira a classe (STAT >= N)
+THRESHOLD_TARGET = re.compile(r"^(?P<stat>[A-Z0-9_]+)_GE_(?P<value>\d+)$")
+DD_CATEGORIES = ["PTS", "REB", "AST", "STL", "BLK"]
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Um modelo a treinar: nome do artefato, estimador (não treinado) e alvo(s)."""
+
+    name: str
+    estimator: object
+    targets: tuple = field(default_factory=tuple)
+
+    def __post_init__(self):
+        targets = (self.targets,) if isinstance(self.targets, str) else tuple(self.targets)
+        object.__setattr__(self, "targets", targets)
+
+
+DEFAULT_SPECS = (
+    ModelSpec("reg_model_ridge", Ridge(alpha=1.0), tuple(REG_TARGETS)),
+    ModelSpec(
+        "clf_model_rf",
+        RandomForestClassifier(
+            n_estimators=100,
+            random_state=42,
+            n_jobs=-1,
+            class_weight="balanced",
+            max_depth=15,
+            min_samples_leaf=5,
+        ),
+        "DOUBLE_DOUBLE",
+    ),
+)
+
+
+def double_double(df):
+    """1 quando o jogador chega a 10 em pelo menos duas categorias (PTS, REB, AST, STL, BLK)."""
+    return ((df[DD_CATEGORIES] >= 10).sum(axis=1) >= 2).astype(np.int8)
+
+
+TARGET_BUILDERS = {"DOUBLE_DOUBLE": double_double}
+
+
+def required_targets(specs):
+    """Alvos usados pelas specs, sem repetição e na ordem em que aparecem."""
+    return list(dict.fromkeys(target for spec in specs for target in spec.targets))
+
+
+def target_source_columns(targets):
+    """Colunas da tabela processada necessárias para montar os alvos."""
+    columns = []
+    for target in targets:
+        if target in TARGET_BUILDERS:
+            columns.extend(DD_CATEGORIES)
+        elif (match := THRESHOLD_TARGET.match(target)) is not None:
+            columns.append(match["stat"])
+        else:
+            columns.append(target)
+    return list(dict.fromkeys(columns))
+
+
+def build_targets(df, targets):
+    """DataFrame com um alvo por coluna: colunas da tabela, derivados ou limiares (ex.: PTS_GE_20)."""
+    built = {}
+    for target in targets:
+        if target in TARGET_BUILDERS:
+            built[target] = TARGET_BUILDERS[target](df)
+        elif target in df.columns:
+            built[target] = df[target]
+        elif (match := THRESHOLD_TARGET.match(target)) is not None:
+            built[target] = (df[match["stat"]] >= int(match["value"])).astype(np.int8)
+        else:
+            raise KeyError(f"Alvo desconhecido: {target}")
+    return pd.DataFrame(built, index=df.index)
+
+
+def make_preprocessor(encoding="onehot"):
+    if encoding == "compact":
+        return CompactEncoder()
+    if encoding != "onehot":
+        raise ValueError(f"Codificação desconhecida: {encoding} (opções: {', '.join(ENCODINGS)})")
+    return ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), [CATEGORICAL_COL])
+        ],
+        remainder="passthrough",
+    )
+
+
+def fit_preprocessor(X, encoding="onehot"):
+    """Treina o pré-processador e devolve (preprocessor, matriz).
+
+    A matriz é densa float64 [one-hot | numéricas] em "onehot" e float32
+    [código do OPPONENT | numéricas] em "compact".
+    """
+    preprocessor = make_preprocessor(encoding)
+    X_processed = preprocessor.fit_transform(X)
+    if encoding == "compact":
+        return preprocessor, X_processed
+    return preprocessor, np.asarray(X_processed, dtype=np.float64)
+
+
+def encoding_of(preprocessor):
+    return "compact" if isinstance(preprocessor, CompactEncoder) else "onehot"
+
+
+def _fit_one(spec, X, y, n_categories=None, max_threads=None):
+    """Treina uma spec; com max_threads, limita o n_jobs do estimador durante o fit."""
+    start = time.perf_counter()
+    estimator = clone(spec.estimator)
+    n_jobs = estimator.get_params().get("n_jobs")
+    limit = max_threads is not None and n_jobs is not None and not 0 < n_jobs <= max_threads
+    if limit:
+        estimator.set_params(n_jobs=max_threads)
+    if n_categories is None:
+        estimator.fit(X, y)
+    else:
+        fit_compact(estimator, X, y, n_categories)
+    if limit:
+        # O artefato salvo mantém o n_jobs da spec
+        estimator.set_params(n_jobs=n_jobs)
+    return spec.name, estimator, time.perf_counter() - start
+
+
+def target_array(targets_df, spec):
+    y = targets_df[list(spec.targets)].to_numpy()
+    return y.ravel() if len(spec.targets) == 1 else y
+
+
+def fit_models(X, targets_df, specs, n_jobs=-1, tmp_dir=None, encoder=None):
+    """Treina cada spec sobre X em paralelo (um processo por spec, até n_jobs).
+
+    X é gravado uma vez em disco e cada processo o abre como memmap somente
+    leitura. Com n_jobs=1 os modelos são treinados em sequência, no próprio processo.
+    Em paralelo, os estimadores com n_jobs (ex.: a floresta) usam no máximo
+    cpu_count // processos threads cada, para não disputarem os núcleos.
+    Se X veio de um CompactEncoder, passe-o em `encoder`: cada modelo é
+    treinado no formato de encoding.compact_fit_mode.
+
+    Returns:
+        dict nome -> (estimador treinado, segundos de treino), na ordem das specs.
+    """
+    names = [spec.name for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Nomes de modelos repetidos: {names}")
+    n_categories = encoder.n_categories if encoder is not None else None
+
+    n_workers = min(len(specs), effective_n_jobs(n_jobs))
+    max_threads = max(1, cpu_count() // n_workers) if n_workers > 1 else None
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir, prefix="nba_train_") as tmp:
+        if n_workers == 1:
+            X_shared = X
+        else:
+            matrix_path = Path(tmp) / "X.npy"
+            np.save(matrix_path, X)
+            X_shared = np.load(matrix_path, mmap_mode="r")
+        results = Parallel(n_jobs=n_jobs, max_nbytes=None)(
+            delayed(_fit_one)(
+                spec, X_shared, target_array(targets_df, spec), n_categories, max_threads
+            )
+            for spec in specs
+        )
+        del X_shared
+    return {name: (estimator, seconds) for name, estimator, seconds in results}
+
+
+def json_params(estimator):
+    params = estimator.get_params(deep=False)
+    return {
+        key: (value if isinstance(value, (int, float, str, bool, type(None))) else repr(value))
+        for key, value in params.items()
+    }
 
-from loguru import logger
-from tqdm import tqdm
-import typer
 
-from nba_stat_predictor.config import MODELS_DIR, PROCESSED_DATA_DIR
+def save_artifacts(models_dir, preprocessor, fitted, specs, feature_cols, extra=None):
+    """Salva o pré-processador, um .joblib por modelo e o manifest.json.
 
-app = typer.Typer()
+    Returns:
+        Caminho do manifest.
+    """
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    joblib.dump(preprocessor, models_dir / PREPROCESSOR_FILE)
 
+    models = {}
+    for spec in specs:
+        estimator, seconds = fitted[spec.name]
+        file_name = f"{spec.name}.joblib"
+        joblib.dump(estimator, models_dir / file_name)
+        models[spec.name] = {
+            "file": file_name,
+            "estimator": type(estimator).__name__,
+            "targets": list(spec.targets),
+            "params": json_params(estimator),
+            "fit_seconds": round(seconds, 3),
+        }
 
-@app.command()
-def main(
-    # ---- REPLACE DEFAULT PATHS AS APPROPRIATE ----
-    features_path: Path = PROCESSED_DATA_DIR / "features.csv",
-    labels_path: Path = PROCESSED_DATA_DIR / "labels.csv",
-    model_path: Path = MODELS_DIR / "model.pkl",
-    # -----------------------------------------
-):
-    # ---- REPLACE THIS WITH YOUR OWN CODE ----
-    logger.info("Training some model...")
-    for i in tqdm(range(10), total=10):
-        if i == 5:
-            logger.info("Something happened for iteration 5.")
-    logger.success("Modeling training complete.")
-    # -----------------------------------------
+    created_at = datetime.now(timezone.utc)
+    manifest = {
+        # Identifica o treino: o artefato compilado guarda o mesmo run_id (ver compiled.py)
+        "run_id": f"{created_at.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}",
+        "created_at": created_at.isoformat(timespec="seconds"),
+        "feature_cols": list(feature_cols),
+        "encoding": encoding_of(preprocessor),
+        "n_features_processed": len(preprocessor.get_feature_names_out()),
+        "preprocessor": PREPROCESSOR_FILE,
+        "models": models,
+        **(extra or {}),
+    }
+    manifest_path = models_dir / MANIFEST_FILE
+    manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False))
+    return manifest_path
 
 
-if __name__ == "__main__":
-    app()
+def load_manifest(models_dir=MODELS_DIR):
+    return json.loads((Path(models_dir) / MANIFEST_FILE).read_text())
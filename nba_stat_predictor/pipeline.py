@@ -0,0 +1,581 @@
+"""Execução das etapas do pipeline com cache endereçado por conteúdo.
+
+    python -m nba_stat_predictor.pipeline run train          # fetch_data -> process_data -> train
+    python -m nba_stat_predictor.pipeline run train --force process_data
+    python -m nba_stat_predictor.pipeline update train       # só os jogos novos (retreino noturno)
+    python -m nba_stat_predictor.pipeline status
+
+Cada etapa (`Stage`) declara os comandos, as entradas (dados), o código
+(arquivos-fonte) e as saídas. A chave da etapa é o sha256 do conteúdo das
+entradas e do código, dos comandos e das versões do Python e das bibliotecas.
+Ao rodar um alvo, as dependências são resolvidas em ordem e cada etapa é:
+
+- pulada, se a última execução registrada tem a mesma chave e as saídas em
+  disco não mudaram desde então;
+- restaurada do cache, se alguma execução anterior já produziu as saídas
+  dessa chave (ex.: ao desfazer uma mudança no código);
+- executada, caso contrário, com as saídas guardadas no cache.
+
+Como a chave usa o conteúdo das entradas, uma etapa que roda de novo e gera
+as mesmas saídas não invalida as seguintes. A coleta (fetch_data) não tem
+entradas locais: saídas já existentes são aceitas enquanto o código e a
+configuração não mudarem, e os dados só são buscados de novo com
+`--force fetch_data` (ou com `make refresh_data` / `make update_data`).
+
+O modo incremental (`update`, usado por make update_data/update_features/
+update_models) roda os comandos incrementais das etapas (update_commands) e
+registra a nova chave e as saídas no estado, então o `run` seguinte (make
+train, make app) pula as etapas em vez de refazê-las do zero.
+
+O estado das etapas e o cache ficam em data/interim/pipeline/. Os hashes de
+arquivos são memorizados por (tamanho, mtime), então verificar uma etapa
+atualizada não relê os dados.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import hashlib
+from importlib import metadata
+import json
+import os
+from pathlib import Path
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from typing import Annotated
+import uuid
+
+from loguru import logger
+import typer
+
+from nba_stat_predictor.config import INTERIM_DATA_DIR, PROJ_ROOT
+
+app = typer.Typer()
+
+PIPELINE_DIR = INTERIM_DATA_DIR / "pipeline"
+STATE_FILE = "state.json"
+HASH_MEMO_FILE = "file_hashes.json"
+CACHE_KEEP = 3
+TRACKED_PACKAGES = ("numpy", "pandas", "pyarrow", "scikit-learn", "nba_api")
+
+STATUS_LABELS = {
+    "skipped": "pulada (atualizada)",
+    "restored": "restaurada do cache",
+    "ran": "executada",
+    "updated": "atualizada (incremental)",
+    "failed": "falhou",
+    "pending": "desatualizada",
+}
+
+
+@dataclass(frozen=True)
+class Stage:
+    """Uma etapa do pipeline.
+
+    Attributes:
+        name: nome da etapa (alvo do Makefile).
+        commands: argumentos do interpretador Python para cada comando, em ordem.
+        inputs: arquivos ou diretórios de dados lidos pela etapa.
+        code: arquivos-fonte que definem o resultado da etapa.
+        outputs: arquivos ou diretórios gravados pela etapa.
+        deps: etapas que produzem as entradas.
+        source: saídas vêm de fora (API); as existentes são aceitas sem registro anterior.
+        update_commands: comandos do modo incremental, que atualizam as saídas
+            existentes só com os dados novos.
+    """
+
+    name: str
+    commands: tuple
+    inputs: tuple = ()
+    code: tuple = ()
+    outputs: tuple = ()
+    deps: tuple = ()
+    source: bool = False
+    update_commands: tuple = ()
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str
+    key: str
+    seconds: float = 0.0
+
+
+RAW_OUTPUTS = (
+    "data/raw/nba_player_gamelogs_raw.parquet",
+    "data/raw/nba_team_defense_stats_raw.parquet",
+)
+PROCESSED_OUTPUTS = (
+    "data/processed/nba_player_gamelogs_processed.parquet",
+    "data/processed/feature_state.parquet",
+    "data/processed/player_latest_features.parquet",
+    "data/processed/defense_table.npz",
+    "data/processed/player_directory.parquet",
+)
+
+STAGES = (
+    Stage(
+        "fetch_data",
+        commands=(("src/data/make_dataset.py",), ("src/data/fetch_defense_stats.py",)),
+        code=(
+            "src/data/make_dataset.py",
+            "src/data/fetch_defense_stats.py",
+            "nba_stat_predictor/schema.py",
+            "nba_stat_predictor/storage.py",
+        ),
+        outputs=RAW_OUTPUTS,
+        source=True,
+        update_commands=(("src/data/make_dataset.py", "--incremental"),),
+    ),
+    Stage(
+        "process_data",
+        commands=(("src/features/build_features.py",),),
+        inputs=RAW_OUTPUTS,
+        code=(
+            "src/features/build_features.py",
+            "nba_stat_predictor/features.py",
+            "nba_stat_predictor/defense.py",
+            "nba_stat_predictor/directory.py",
+            "nba_stat_predictor/schema.py",
+            "nba_stat_predictor/storage.py",
+        ),
+        outputs=PROCESSED_OUTPUTS,
+        deps=("fetch_data",),
+        update_commands=(("src/features/build_features.py", "--incremental"),),
+    ),
+    Stage(
+        "train",
+        commands=(("src/models/train_model.py",),),
+        inputs=("data/processed/nba_player_gamelogs_processed.parquet",),
+        code=(
+            "src/models/train_model.py",
+            "nba_stat_predictor/modeling/train.py",
+            "nba_stat_predictor/modeling/encoding.py",
+            "nba_stat_predictor/modeling/retrain.py",
+            "nba_stat_predictor/modeling/compiled.py",
+            "nba_stat_predictor/modeling/forest.py",
+            "nba_stat_predictor/config.py",
+            "nba_stat_predictor/features.py",
+            "nba_stat_predictor/schema.py",
+            "nba_stat_predictor/storage.py",
+        ),
+        outputs=("models",),
+        deps=("process_data",),
+        update_commands=(("src/models/train_model.py", "--incremental"),),
+    ),
+)
+
+
+class ContentHasher:
+    """sha256 de arquivos e diretórios, memorizado por (tamanho, mtime) do arquivo."""
+
+    def __init__(self, memo_path=None):
+        self.memo_path = Path(memo_path) if memo_path else None
+        self.memo = {}
+        if self.memo_path and self.memo_path.exists():
+            self.memo = json.loads(self.memo_path.read_text())
+
+    def file(self, path):
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+        cached = self.memo.get(str(path))
+        if cached and cached[:2] == signature:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.memo[str(path)] = signature + [digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path(self, path):
+        """Hash do arquivo, ou dos caminhos relativos e hashes do diretório; None se não existe."""
+        path = Path(path)
+        if path.is_file():
+            return self.file(path)
+        if not path.is_dir():
+            return None
+        digest = hashlib.sha256()
+        for file in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(f"{file.relative_to(path).as_posix()}\0{self.file(file)}\n".encode())
+        return digest.hexdigest()
+
+    def save(self):
+        if self.memo_path:
+            # Só os arquivos que ainda existem
+            self.memo = {p: v for p, v in self.memo.items() if os.path.exists(p)}
+            self.memo_path.parent.mkdir(parents=True, exist_ok=True)
+            self.memo_path.write_text(json.dumps(self.memo))
+
+
+def environment():
+    """Versões que entram na chave de todas as etapas."""
+    versions = {"python": platform.python_version()}
+    for package in TRACKED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def stage_key(stage, root, hasher):
+    payload = {
+        "stage": stage.name,
+        "commands": [list(command) for command in stage.commands],
+        "inputs": {p: hasher.path(Path(root) / p) for p in stage.inputs},
+        "code": {p: hasher.path(Path(root) / p) for p in stage.code},
+        "environment": environment(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def code_key(stage, root, hasher):
+    """Como stage_key, sem as entradas: muda só com o código, os comandos ou o ambiente."""
+    payload = {
+        "stage": stage.name,
+        "commands": [list(command) for command in stage.commands],
+        "update_commands": [list(command) for command in stage.update_commands],
+        "code": {p: hasher.path(Path(root) / p) for p in stage.code},
+        "environment": environment(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def output_hashes(stage, root, hasher):
+    return {p: hasher.path(Path(root) / p) for p in stage.outputs}
+
+
+def resolve_order(target, stages):
+    """Etapas necessárias para `target`, dependências primeiro."""
+    by_name = {stage.name: stage for stage in stages}
+    if target not in by_name:
+        raise ValueError(f"Etapa desconhecida: {target} (disponíveis: {list(by_name)})")
+    order, visiting = [], set()
+
+    def visit(name):
+        if name in visiting:
+            raise ValueError(f"Dependência circular envolvendo a etapa {name}")
+        if any(stage.name == name for stage in order):
+            return
+        visiting.add(name)
+        for dep in by_name[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        order.append(by_name[name])
+
+    visit(target)
+    return order
+
+
+def _copy_path(src, dst):
+    """Copia arquivo ou diretório para `dst`, trocando-o só quando a cópia está completa."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    if src.is_dir():
+        shutil.copytree(src, tmp)
+        if dst.exists():
+            old = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.old")
+            os.replace(dst, old)
+            os.replace(tmp, dst)
+            shutil.rmtree(old)
+        else:
+            os.replace(tmp, dst)
+    else:
+        shutil.copy2(src, tmp)
+        if dst.is_dir():
+            shutil.rmtree(dst)
+        os.replace(tmp, dst)
+
+
+def _cache_entry(cache_dir, stage, key):
+    return Path(cache_dir) / stage.name / key
+
+
+def store_outputs(stage, key, root, cache_dir, hashes, keep=CACHE_KEEP):
+    """Guarda as saídas no cache e remove as entradas mais antigas da etapa além de `keep`."""
+    entry = _cache_entry(cache_dir, stage, key)
+    if entry.exists():
+        shutil.rmtree(entry)
+    for output in stage.outputs:
+        _copy_path(Path(root) / output, entry / output)
+    # meta.json por último: sem ele a entrada está incompleta e é ignorada
+    (entry / "meta.json").write_text(
+        json.dumps(
+            {
+                "stored_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "outputs": hashes,
+            },
+            indent=2,
+        )
+    )
+
+    entries = sorted(
+        (p for p in entry.parent.iterdir() if p.is_dir()),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in entries[keep:]:
+        shutil.rmtree(old)
+
+
+def restore_outputs(stage, key, root, cache_dir):
+    """Copia as saídas da entrada de cache para o projeto. Retorna os hashes registrados."""
+    entry = _cache_entry(cache_dir, stage, key)
+    for output in stage.outputs:
+        _copy_path(entry / output, Path(root) / output)
+    os.utime(entry)  # entrada usada recentemente não é a primeira a sair do cache
+    return json.loads((entry / "meta.json").read_text())["outputs"]
+
+
+def cached(stage, key, cache_dir):
+    return (_cache_entry(cache_dir, stage, key) / "meta.json").exists()
+
+
+def load_state(pipeline_dir):
+    path = Path(pipeline_dir) / STATE_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save_state(pipeline_dir, state):
+    path = Path(pipeline_dir) / STATE_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(state, indent=2, ensure_ascii=False))
+
+
+def decide(stage, key, outputs, previous, cache_dir, force=False):
+    """ "skipped", "restored" ou "ran": o que fazer com a etapa no estado atual."""
+    outputs_exist = all(h is not None for h in outputs.values())
+    if not force and outputs_exist:
+        if previous and previous["key"] == key and previous["outputs"] == outputs:
+            return "skipped"
+        if stage.source and (previous is None or previous["key"] == key):
+            return "skipped"
+    if not force and cached(stage, key, cache_dir):
+        return "restored"
+    return "ran"
+
+
+def run_command(command, root):
+    subprocess.run([sys.executable, *command], cwd=root, check=True)
+
+
+def _run_stage(stage, commands, root, hasher, result):
+    """Roda os comandos e retorna os hashes das saídas; erro marca `result` como "failed"."""
+    start = time.perf_counter()
+    try:
+        for command in commands:
+            run_command(command, root)
+        outputs = output_hashes(stage, root, hasher)
+        missing = [p for p, h in outputs.items() if h is None]
+        if missing:
+            raise RuntimeError(f"A etapa {stage.name} não gerou as saídas: {missing}")
+    except Exception:
+        result.status = "failed"
+        result.seconds = time.perf_counter() - start
+        _log_result(result)
+        raise
+    return outputs
+
+
+def _record(state, stage, result, outputs, code):
+    state[stage.name] = {
+        "key": result.key,
+        "code": code,
+        "outputs": outputs,
+        "status": result.status,
+        "seconds": round(result.seconds, 3),
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run_pipeline(
+    target,
+    stages=STAGES,
+    root=PROJ_ROOT,
+    pipeline_dir=PIPELINE_DIR,
+    force=(),
+    dry_run=False,
+    keep=CACHE_KEEP,
+):
+    """Roda `target` e suas dependências, pulando ou restaurando o que não mudou.
+
+    Args:
+        target: etapa final.
+        force: nomes das etapas a executar de qualquer forma.
+        dry_run: só informa o que seria feito, com os arquivos atuais ("pending" = rodaria).
+
+    Returns:
+        lista de StageResult na ordem de execução.
+
+    Raises:
+        subprocess.CalledProcessError: um comando da etapa falhou.
+        RuntimeError: a etapa terminou sem gerar alguma das saídas.
+    """
+    root, pipeline_dir = Path(root), Path(pipeline_dir)
+    cache_dir = pipeline_dir / "cache"
+    hasher = ContentHasher(pipeline_dir / HASH_MEMO_FILE)
+    state = load_state(pipeline_dir)
+    results = []
+
+    try:
+        for stage in resolve_order(target, stages):
+            key = stage_key(stage, root, hasher)
+            outputs = output_hashes(stage, root, hasher)
+            status = decide(
+                stage, key, outputs, state.get(stage.name), cache_dir, force=stage.name in force
+            )
+            result = StageResult(stage.name, status, key)
+            results.append(result)
+
+            if dry_run:
+                result.status = "pending" if status == "ran" else status
+                _log_result(result)
+                continue
+
+            start = time.perf_counter()
+            if status == "restored":
+                outputs = restore_outputs(stage, key, root, cache_dir)
+            elif status == "ran":
+                logger.info(f"[{stage.name}] executando (chave {key[:12]})...")
+                outputs = _run_stage(stage, stage.commands, root, hasher, result)
+                store_outputs(stage, key, root, cache_dir, outputs, keep=keep)
+            result.seconds = time.perf_counter() - start
+            _record(state, stage, result, outputs, code_key(stage, root, hasher))
+            save_state(pipeline_dir, state)
+            _log_result(result)
+    finally:
+        hasher.save()
+    return results
+
+
+def update_pipeline(
+    target, stages=STAGES, root=PROJ_ROOT, pipeline_dir=PIPELINE_DIR, keep=CACHE_KEEP
+):
+    """Atualiza `target` e suas dependências com os comandos incrementais.
+
+    O incremental só parte de saídas conhecidas: a etapa precisa ter
+    update_commands, as saídas em disco devem ser as registradas na última
+    execução e o código (code_key) o mesmo dela. Caso contrário a etapa é
+    tratada como em run_pipeline (pulada, restaurada ou executada por
+    inteiro). Etapas de origem (source) partem sempre das saídas existentes,
+    se houver: os dados vêm da API, não do código. As saídas incrementais não
+    vão para o cache (seria uma cópia dos dados a cada noite), só para o estado.
+
+    Returns:
+        lista de StageResult na ordem de execução.
+
+    Raises:
+        subprocess.CalledProcessError: um comando da etapa falhou.
+        RuntimeError: a etapa terminou sem gerar alguma das saídas.
+    """
+    root, pipeline_dir = Path(root), Path(pipeline_dir)
+    cache_dir = pipeline_dir / "cache"
+    hasher = ContentHasher(pipeline_dir / HASH_MEMO_FILE)
+    state = load_state(pipeline_dir)
+    results = []
+
+    try:
+        for stage in resolve_order(target, stages):
+            previous = state.get(stage.name)
+            key, code = stage_key(stage, root, hasher), code_key(stage, root, hasher)
+            outputs = output_hashes(stage, root, hasher)
+            known_outputs = stage.source or (
+                previous is not None
+                and previous.get("code") == code
+                and previous["outputs"] == outputs
+            )
+            incremental = (
+                bool(stage.update_commands)
+                and all(h is not None for h in outputs.values())
+                and known_outputs
+            )
+
+            start = time.perf_counter()
+            if incremental:
+                result = StageResult(stage.name, "updated", key)
+                logger.info(f"[{stage.name}] atualizando só com os dados novos...")
+                outputs = _run_stage(stage, stage.update_commands, root, hasher, result)
+            else:
+                result = StageResult(
+                    stage.name, decide(stage, key, outputs, previous, cache_dir), key
+                )
+                if result.status == "restored":
+                    outputs = restore_outputs(stage, key, root, cache_dir)
+                elif result.status == "ran":
+                    logger.info(f"[{stage.name}] executando por inteiro (chave {key[:12]})...")
+                    outputs = _run_stage(stage, stage.commands, root, hasher, result)
+                    store_outputs(stage, key, root, cache_dir, outputs, keep=keep)
+            results.append(result)
+            result.seconds = time.perf_counter() - start
+            _record(state, stage, result, outputs, code)
+            save_state(pipeline_dir, state)
+            _log_result(result)
+    finally:
+        hasher.save()
+    return results
+
+
+def _log_result(result):
+    elapsed = (
+        f" em {result.seconds:.1f}s"
+        if result.status in ("ran", "restored", "updated", "failed")
+        else ""
+    )
+    logger.info(
+        f"[{result.name}] {STATUS_LABELS[result.status]}{elapsed} (chave {result.key[:12]})"
+    )
+
+
+def log_summary(results):
+    counts = {status: sum(r.status == status for r in results) for status in STATUS_LABELS}
+    parts = [f"{STATUS_LABELS[status]}: {n}" for status, n in counts.items() if n]
+    logger.info(f"Pipeline: {', '.join(parts)}")
+
+
+@app.command()
+def run(
+    target: Annotated[
+        str, typer.Argument(help="Etapa final (fetch_data, process_data ou train).")
+    ] = "train",
+    force: Annotated[
+        list[str] | None, typer.Option("--force", help="Executa a etapa mesmo sem mudanças.")
+    ] = None,
+    dry_run: Annotated[
+        bool, typer.Option("--dry-run", help="Só mostra o que seria feito.")
+    ] = False,
+):
+    try:
+        results = run_pipeline(target, force=tuple(force or ()), dry_run=dry_run)
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        logger.error(f"Pipeline interrompido: {e}")
+        raise typer.Exit(code=1)
+    log_summary(results)
+
+
+@app.command()
+def update(
+    target: Annotated[
+        str, typer.Argument(help="Etapa final (fetch_data, process_data ou train).")
+    ] = "train",
+):
+    """Atualiza as etapas só com os jogos novos e registra o resultado no estado."""
+    try:
+        results = update_pipeline(target)
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        logger.error(f"Pipeline interrompido: {e}")
+        raise typer.Exit(code=1)
+    log_summary(results)
+
+
+@app.command()
+def status(target: str = typer.Argument("train")):
+    """Mostra, sem executar nada, quais etapas estão atualizadas."""
+    log_summary(run_pipeline(target, dry_run=True))
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,262 @@
+"""Instrumentação leve das etapas do pipeline (tempo, CPU, memória e linhas).
+
+Cada script do pipeline abre uma execução com `run` e marca etapas e
+sub-etapas com `stage` (context manager) ou `timed` (decorator):
+
+    with profiling.run("build_features", profile=args.profile):
+        with profiling.stage("load_raw") as s:
+            df = load()
+            s.rows = len(df)
+
+Ao final, um relatório JSON é gravado em reports/runs/<script>-<data>.json
+(e copiado para <script>-latest.json) com, por etapa:
+
+- wall_s e cpu_s: tempo de relógio e de CPU do processo principal;
+- rss_mb, peak_rss_mb e peak_rss_growth_mb: memória residente ao final da
+  etapa, pico do processo até ali e quanto o pico cresceu durante a etapa;
+- rows: linhas processadas (quando a etapa informa, ou len() do retorno);
+- status: "ok" ou "error".
+
+Etapas aninhadas aparecem como "pai/filho". Fora de uma execução ativa,
+`stage` e `timed` não medem nada, então as funções instrumentadas podem ser
+chamadas de testes e notebooks sem efeito colateral.
+
+Para detalhar uma etapa com cProfile, passe `--profile <etapa>` ao script ou
+defina NBA_PROFILE=<etapa> (nome simples ou caminho "pai/filho"). Todas as
+ocorrências da etapa são acumuladas em um único .prof, gravado com um resumo
+.txt (funções por tempo acumulado) ao lado do relatório. A medição de CPU não inclui os
+processos de trabalho do joblib.
+"""
+
+from contextlib import contextmanager
+import cProfile
+from datetime import datetime, timezone
+import functools
+import io
+import json
+import os
+from pathlib import Path
+import pstats
+import shutil
+import sys
+import time
+
+from loguru import logger
+
+from nba_stat_predictor.config import REPORTS_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUN_REPORT_DIR = REPORTS_DIR / "runs"
+PROFILE_ENV = "NBA_PROFILE"
+PROFILE_TOP_FUNCTIONS = 30
+
+_active = None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+class StageRecord:
+    """Medidas de uma etapa; `rows` pode ser definido dentro do bloco."""
+
+    def __init__(self, name, depth, rows=None):
+        self.name = name
+        self.depth = depth
+        self.rows = rows
+        self.status = "ok"
+        self.profiled = False
+        self.wall_s = self.cpu_s = None
+        self.rss_mb = self.peak_rss_mb = self.peak_rss_growth_mb = None
+
+    def to_dict(self):
+        record = {
+            "name": self.name,
+            "depth": self.depth,
+            "status": self.status,
+            "wall_s": _round(self.wall_s),
+            "cpu_s": _round(self.cpu_s),
+            "rss_mb": _round(self.rss_mb, 1),
+            "peak_rss_mb": _round(self.peak_rss_mb, 1),
+            "peak_rss_growth_mb": _round(self.peak_rss_growth_mb, 1),
+            "rows": None if self.rows is None else int(self.rows),
+        }
+        if self.profiled:
+            record["profiled"] = True
+        return record
+
+
+class RunReport:
+    """Execução de um script: etapas medidas, em ordem de início."""
+
+    def __init__(self, script, report_dir, profile=None):
+        self.script = script
+        self.report_dir = Path(report_dir)
+        self.profile = profile
+        self.started_at = datetime.now(timezone.utc)
+        self.run_id = f"{script}-{self.started_at.strftime('%Y%m%dT%H%M%S')}"
+        self.stages = []
+        self._stack = []
+        # Um único cProfile acumula todas as ocorrências da etapa escolhida
+        self._profiler = None
+        self._profiling = False
+
+    def _should_profile(self, path, name):
+        return self.profile is not None and not self._profiling and self.profile in (name, path)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        # A etapa raiz (o script inteiro) não entra no nome das etapas
+        path = "/".join(self._stack[1:] + [name])
+        record = StageRecord(path, len(self._stack), rows)
+        self.stages.append(record)
+        self._stack.append(name)
+
+        record.profiled = self._should_profile(path, name)
+        if record.profiled:
+            self._profiler = self._profiler or cProfile.Profile()
+            self._profiling = True
+
+        peak_before = _peak_rss_mb()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if record.profiled:
+            self._profiler.enable()
+        try:
+            yield record
+        except BaseException:
+            record.status = "error"
+            raise
+        finally:
+            if record.profiled:
+                self._profiler.disable()
+                self._profiling = False
+            record.wall_s = time.perf_counter() - wall_start
+            record.cpu_s = time.process_time() - cpu_start
+            record.rss_mb = _rss_mb()
+            record.peak_rss_mb = _peak_rss_mb()
+            if peak_before is not None:
+                record.peak_rss_growth_mb = record.peak_rss_mb - peak_before
+            self._stack.pop()
+
+    def _dump_profile(self):
+        """Grava o .prof e o resumo .txt da etapa perfilada. Retorna o nome do .prof."""
+        base = self.report_dir / f"{self.run_id}-{self.profile.replace('/', '.')}"
+        self._profiler.dump_stats(f"{base}.prof")
+        summary = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=summary)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        Path(f"{base}.txt").write_text(summary.getvalue())
+        logger.info(f"Perfil (cProfile) da etapa {self.profile} salvo em {base}.prof")
+        return f"{base.name}.prof"
+
+    def to_dict(self, total, profile_file=None):
+        return {
+            "run_id": self.run_id,
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "status": total.status,
+            "wall_s": _round(total.wall_s),
+            "cpu_s": _round(total.cpu_s),
+            "peak_rss_mb": _round(total.peak_rss_mb, 1),
+            "profile": self.profile,
+            "profile_file": profile_file,
+            "stages": [record.to_dict() for record in self.stages[1:]],
+        }
+
+    def save(self):
+        """Grava o relatório e a cópia <script>-latest.json. Retorna o caminho."""
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        profile_file = self._dump_profile() if self._profiler is not None else None
+        path = self.report_dir / f"{self.run_id}.json"
+        report = self.to_dict(self.stages[0], profile_file)
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        shutil.copyfile(path, self.report_dir / f"{self.script}-latest.json")
+        return path
+
+    def log_summary(self):
+        for record in self.stages[1:]:
+            rows = f", {record.rows} linhas" if record.rows is not None else ""
+            peak = f", pico {record.peak_rss_mb:.0f} MB" if record.peak_rss_mb is not None else ""
+            logger.info(
+                f"{'  ' * (record.depth - 1)}{record.name}: {record.wall_s:.2f}s "
+                f"(CPU {record.cpu_s:.2f}s{peak}{rows})"
+            )
+
+
+@contextmanager
+def run(script, report_dir=None, profile=None):
+    """Ativa a medição das etapas de um script e grava o relatório na saída.
+
+    Args:
+        script: nome do script (prefixo do relatório).
+        report_dir: diretório dos relatórios (padrão: RUN_REPORT_DIR).
+        profile: etapa a rodar sob cProfile (padrão: variável NBA_PROFILE).
+    """
+    global _active
+    report = RunReport(
+        script, report_dir or RUN_REPORT_DIR, profile or os.environ.get(PROFILE_ENV)
+    )
+    previous, _active = _active, report
+    try:
+        with report.stage(script):
+            yield report
+    finally:
+        _active = previous
+        path = report.save()
+        report.log_summary()
+        logger.info(f"Relatório de execução salvo em {path}")
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Mede uma etapa da execução ativa (sem execução ativa, não faz nada)."""
+    if _active is None:
+        yield StageRecord(name, 0, rows)
+        return
+    with _active.stage(name, rows) as record:
+        yield record
+
+
+def timed(name=None):
+    """Decorator que mede cada chamada da função como uma etapa.
+
+    Se a função devolver algo com len() (ex.: DataFrame), o tamanho vira `rows`.
+    """
+
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                if record.rows is None and hasattr(result, "__len__") and hasattr(result, "shape"):
+                    record.rows = len(result)
+                return result
+
+        return wrapper
+
+    return decorator
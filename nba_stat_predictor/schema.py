@@ -0,0 +1,156 @@
+"""Schema de tipos compactos das tabelas do pipeline.
+
+Os DataFrames do pandas saem com int64/float64/object por padrão. As
+tabelas do projeto cabem em tipos bem menores:
+
+- médias móveis (_MA_) e estatísticas de defesa (OPP_): float32;
+- estatísticas de contagem (PTS, REB, MIN...): int16 (Int16, anulável, se
+  houver valores ausentes);
+- flags (HOME, IS_B2B, WIN_LAST_GAME): int8;
+- times, temporadas e confrontos: category (códigos inteiros + dicionário).
+
+O schema é aplicado desde a coleta (make_dataset.py) e o Parquet preserva
+os tipos, então as etapas seguintes já leem as tabelas compactas.
+"""
+
+import numpy as np
+import pandas as pd
+
+CATEGORY = "category"
+
+COUNT_STATS = [
+    "MIN",
+    "FGM",
+    "FGA",
+    "FG3M",
+    "FG3A",
+    "FTM",
+    "FTA",
+    "OREB",
+    "DREB",
+    "REB",
+    "AST",
+    "STL",
+    "BLK",
+    "TOV",
+    "PF",
+    "PTS",
+    "PLUS_MINUS",
+]
+PCT_STATS = ["FG_PCT", "FG3_PCT", "FT_PCT"]
+
+# Game logs brutos (schema do PlayerGameLog)
+RAW_GAMELOG_DTYPES = {
+    "SEASON_ID": CATEGORY,
+    "Player_ID": "int32",
+    "MATCHUP": CATEGORY,
+    "WL": CATEGORY,
+    **{col: "int16" for col in COUNT_STATS},
+    **{col: "float32" for col in PCT_STATS},
+    "VIDEO_AVAILABLE": "int8",
+}
+
+# Tabelas de jogos limpos, estado por jogador e features
+FEATURE_DTYPES = {
+    "Player_ID": "int32",
+    "Season": CATEGORY,
+    "OPPONENT": CATEGORY,
+    "MATCHUP": CATEGORY,
+    "WL": CATEGORY,
+    **{col: "int16" for col in COUNT_STATS},
+    "HOME": "int8",
+    "DAYS_REST": "int16",
+    "IS_B2B": "int8",
+    "WIN_LAST_GAME": "int8",
+}
+
+# Colunas geradas (médias móveis, defesa do oponente), identificadas pelo nome
+FEATURE_PATTERN_DTYPES = [
+    (lambda col: "_MA_" in col, "float32"),
+    (lambda col: col.startswith("OPP_"), "float32"),
+]
+
+
+def column_dtype(col, dtypes=FEATURE_DTYPES):
+    """Tipo declarado da coluna (ou None se o schema não a define)."""
+    if col in dtypes:
+        return dtypes[col]
+    for matches, dtype in FEATURE_PATTERN_DTYPES:
+        if matches(col):
+            return dtype
+    return None
+
+
+def _as_category(series):
+    """Categoria com as categorias observadas em ordem alfabética.
+
+    Fixa a ordem das categorias independentemente da ordem de leitura dos
+    arquivos, para que tabelas com o mesmo conteúdo tenham o mesmo dtype.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.cat.remove_unused_categories()
+        categories = series.cat.categories
+        if categories.is_monotonic_increasing:
+            return series
+        return series.cat.reorder_categories(categories.sort_values())
+    return series.astype(CATEGORY)
+
+
+def _as_integer(series, dtype):
+    """Converte para inteiro pequeno; com NaN, para o inteiro anulável (ex.: Int16).
+
+    O tipo anulável mantém o mesmo tipo inteiro no Arrow, então uma partição
+    com NaN tem o mesmo schema das demais. Só frações (dado que não é de
+    contagem) ficam em float32.
+    """
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and series.dtype.kind in "iu":
+        return series.astype(dtype.capitalize() if series.isna().any() else dtype)
+    values = series.to_numpy()
+    if values.dtype.kind in "iub":
+        return series.astype(dtype)
+    values = values.astype(np.float64)
+    nan_mask = np.isnan(values)
+    if not np.array_equal(values[~nan_mask], np.round(values[~nan_mask])):
+        return series.astype("float32")
+    if nan_mask.any():
+        return series.astype(dtype.capitalize())
+    return series.astype(dtype)
+
+
+def apply_schema(df, dtypes=FEATURE_DTYPES):
+    """Converte as colunas de df para os tipos declarados (as demais ficam como estão)."""
+    converted = {}
+    for col in df.columns:
+        dtype = column_dtype(col, dtypes)
+        if dtype is None:
+            continue
+        if dtype == CATEGORY:
+            converted[col] = _as_category(df[col])
+        elif np.dtype(dtype).kind == "i":
+            if df[col].dtype != dtype:
+                converted[col] = _as_integer(df[col], dtype)
+        elif df[col].dtype != dtype:
+            converted[col] = df[col].astype(dtype)
+    if not converted:
+        return df
+    return df.assign(**converted)
+
+
+def memory_mb(df):
+    """Memória ocupada pelo DataFrame (incluindo strings), em MB."""
+    return df.memory_usage(deep=True, index=False).sum() / 2**20
+
+
+def memory_report(df):
+    """Resumo de memória por tipo, para os logs de cada etapa.
+
+    Ex.: '12.3 MB, 30000 linhas (float32: 8.1 MB, int16: 2.0 MB, category: 0.1 MB)'
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    by_dtype = (
+        usage.groupby(df.dtypes.astype(str).reindex(usage.index))
+        .sum()
+        .sort_values(ascending=False)
+    )
+    details = ", ".join(f"{dtype}: {nbytes / 2**20:.1f} MB" for dtype, nbytes in by_dtype.items())
+    return f"{usage.sum() / 2**20:.1f} MB, {len(df)} linhas ({details})"
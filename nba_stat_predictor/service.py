@@ -0,0 +1,313 @@
+"""Serviço HTTP assíncrono de predição.
+
+    python -m nba_stat_predictor.service --port 8000
+
+O artefato de inferência compilado (models/compiled/, arrays em memmap
+compartilhados entre processos), o último vetor de features de cada jogador
+e a tabela de defesa por (temporada, time) são carregados uma única vez, no
+startup. A montagem das features é a mesma da predição em lote e do app
+(nba_stat_predictor.modeling.predict). Confrontos já previstos saem do
+PredictionCache (nba_stat_predictor.modeling.cache), com a chave na versão
+dos dados e do modelo carregados no startup.
+
+Endpoints:
+    GET  /health          -> status e número de jogadores carregados
+    POST /predict         -> {"player_id": 201939, "opponent": "BOS", "home": 1}
+    POST /predict/batch   -> {"matchups": [{...}, {...}]}
+    GET  /metrics         -> contagem, erros e latências p50/p99 (ms) por endpoint (respostas
+                             de erro incluídas) e contadores do cache
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+import functools
+import math
+from pathlib import Path
+import threading
+import time
+
+from loguru import logger
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+import typer
+
+from nba_stat_predictor.config import MODELS_DIR
+from nba_stat_predictor.modeling.cache import (
+    DEFAULT_MAX_ENTRIES,
+    DEFAULT_TTL_SECONDS,
+    PredictionCache,
+    prediction_key,
+    version_of,
+)
+from nba_stat_predictor.modeling.predict import (
+    DEFENSE_TABLE_PATH,
+    LATEST_FEATURES_PATH,
+    PREDICTION_COLUMNS,
+    SLATE_COLUMNS,
+    build_feature_frame,
+    load_defense_table,
+    load_latest_features,
+    load_models,
+    predict_features,
+)
+
+cli = typer.Typer()
+
+LATENCY_WINDOW = 10_000
+MAX_BATCH_SIZE = 5_000
+
+
+class LatencyTracker:
+    """Guarda as últimas `window` latências de cada endpoint e calcula p50/p99.
+
+    Todas as respostas entram nas latências, inclusive as de erro (4xx/5xx),
+    que também são contadas à parte.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, error=False):
+        with self._lock:
+            if endpoint not in self._samples:
+                self._samples[endpoint] = deque(maxlen=self.window)
+                self._counts[endpoint] = 0
+                self._errors[endpoint] = 0
+            self._samples[endpoint].append(seconds * 1000)
+            self._counts[endpoint] += 1
+            self._errors[endpoint] += int(error)
+
+    def summary(self):
+        with self._lock:
+            snapshot = {name: np.array(samples) for name, samples in self._samples.items()}
+            counts = dict(self._counts)
+            errors = dict(self._errors)
+        return {
+            name: {
+                "count": counts[name],
+                "errors": errors[name],
+                "p50_ms": round(float(np.percentile(samples, 50)), 3),
+                "p99_ms": round(float(np.percentile(samples, 99)), 3),
+            }
+            for name, samples in snapshot.items()
+        }
+
+
+def _error(status_code, detail):
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+def _timed(endpoint):
+    """Registra a latência de toda chamada do handler no LatencyTracker, com ou sem erro."""
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            start = time.perf_counter()
+            status_code = 500
+            try:
+                response = await handler(request)
+                status_code = response.status_code
+                return response
+            finally:
+                request.app.state.latency.record(
+                    endpoint, time.perf_counter() - start, error=status_code >= 400
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def _parse_matchups(items, known_opponents):
+    """Valida os confrontos recebidos e devolve o slate como DataFrame.
+
+    Raises:
+        TypeError: um confronto não é um objeto JSON.
+        ValueError: campo ausente ou inválido.
+    """
+    rows = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise TypeError(f"confronto {i}: esperado um objeto JSON")
+        try:
+            player_id = int(item["player_id"])
+            opponent = str(item["opponent"]).upper()
+            home = int(item["home"])
+        except KeyError as e:
+            raise ValueError(f"confronto {i}: campo obrigatório ausente: {e.args[0]}")
+        except (TypeError, ValueError):
+            raise ValueError(f"confronto {i}: player_id e home devem ser inteiros")
+        if home not in (0, 1):
+            raise ValueError(f"confronto {i}: home deve ser 0 ou 1")
+        if opponent not in known_opponents:
+            raise ValueError(f"confronto {i}: oponente desconhecido: {opponent}")
+        rows.append((player_id, opponent, home))
+    return pd.DataFrame(rows, columns=SLATE_COLUMNS)
+
+
+def _to_records(slate, preds):
+    """Converte slate + previsões em dicionários JSON (NaN vira null)."""
+    records = []
+    for (player_id, opponent, home), values in zip(slate.itertuples(index=False), preds.tolist()):
+        record = {"player_id": int(player_id), "opponent": opponent, "home": int(home)}
+        record.update(
+            {
+                col: (None if math.isnan(value) else value)
+                for col, value in zip(PREDICTION_COLUMNS, values)
+            }
+        )
+        records.append(record)
+    return records
+
+
+def _predict(state, slate):
+    preds = np.full((len(slate), len(PREDICTION_COLUMNS)), np.nan)
+    found = np.zeros(len(slate), dtype=bool)
+    if state.cache is None:
+        pending = np.arange(len(slate))
+    else:
+        keys = [
+            prediction_key(player_id, opponent, home, state.data_version, state.model_version)
+            for player_id, opponent, home in slate.itertuples(index=False)
+        ]
+        pending = []
+        for i, cached in enumerate(state.cache.get_many(keys)):
+            if cached is None:
+                pending.append(i)
+            else:
+                preds[i], found[i] = cached, True
+        pending = np.asarray(pending, dtype=np.intp)
+    if len(pending) == 0:
+        return preds, found
+
+    X, found_pending = build_feature_frame(
+        slate.iloc[pending].reset_index(drop=True), state.df_latest, state.defense
+    )
+    if found_pending.any():
+        rows = pending[found_pending]
+        preds[rows] = predict_features(X[found_pending], state.predictor)
+        found[rows] = True
+        if state.cache is not None:
+            # Jogadores não encontrados não entram no cache
+            state.cache.put_many((keys[i], preds[i].copy()) for i in rows)
+    return preds, found
+
+
+async def _read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+@_timed("predict")
+async def predict_one(request):
+    body = await _read_json(request)
+    if not isinstance(body, dict):
+        return _error(422, "corpo da requisição deve ser um objeto JSON")
+    try:
+        slate = _parse_matchups([body], request.app.state.known_opponents)
+    except (TypeError, ValueError) as e:
+        return _error(422, str(e))
+
+    preds, found = await run_in_threadpool(_predict, request.app.state, slate)
+    if not found[0]:
+        return _error(
+            404, f"Player ID {slate.at[0, 'PLAYER_ID']} não encontrado nos dados processados"
+        )
+    return JSONResponse(_to_records(slate, preds)[0])
+
+
+@_timed("predict_batch")
+async def predict_batch(request):
+    body = await _read_json(request)
+    items = body.get("matchups") if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        return _error(422, 'corpo deve ter a forma {"matchups": [...]}')
+    if len(items) > MAX_BATCH_SIZE:
+        return _error(413, f"no máximo {MAX_BATCH_SIZE} confrontos por requisição")
+    try:
+        slate = _parse_matchups(items, request.app.state.known_opponents)
+    except (TypeError, ValueError) as e:
+        return _error(422, str(e))
+
+    preds, _ = await run_in_threadpool(_predict, request.app.state, slate)
+    return JSONResponse({"predictions": _to_records(slate, preds)})
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "players": len(request.app.state.df_latest)})
+
+
+async def metrics(request):
+    summary = request.app.state.latency.summary()
+    if request.app.state.cache is not None:
+        summary["cache"] = request.app.state.cache.stats()
+    return JSONResponse(summary)
+
+
+def create_app(
+    models_dir=MODELS_DIR,
+    latest_features_path=LATEST_FEATURES_PATH,
+    defense_table_path=DEFENSE_TABLE_PATH,
+    cache_entries=DEFAULT_MAX_ENTRIES,
+    cache_ttl=DEFAULT_TTL_SECONDS,
+):
+    """Cria a aplicação; artefatos e features são carregados no startup (lifespan).
+
+    cache_entries=0 desliga o cache de previsões.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app):
+        logger.info(f"Carregando modelos de {models_dir} e features de {latest_features_path}...")
+        app.state.predictor = load_models(models_dir)
+        app.state.df_latest = load_latest_features(latest_features_path)
+        app.state.defense = load_defense_table(defense_table_path)
+        app.state.known_opponents = frozenset(app.state.predictor.opponents.tolist())
+        app.state.latency = LatencyTracker()
+        # Versões do que foi carregado: entram na chave do cache
+        app.state.data_version = version_of(latest_features_path, defense_table_path)
+        app.state.model_version = version_of(models_dir)
+        app.state.cache = PredictionCache(cache_entries, cache_ttl) if cache_entries > 0 else None
+        logger.success(f"Serviço pronto ({len(app.state.df_latest)} jogadores).")
+        yield
+
+    routes = [
+        Route("/health", health, methods=["GET"]),
+        Route("/predict", predict_one, methods=["POST"]),
+        Route("/predict/batch", predict_batch, methods=["POST"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+@cli.command()
+def main(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    models_dir: Path = MODELS_DIR,
+    latest_features_path: Path = LATEST_FEATURES_PATH,
+    defense_table_path: Path = DEFENSE_TABLE_PATH,
+    cache_entries: int = DEFAULT_MAX_ENTRIES,
+    cache_ttl: float = DEFAULT_TTL_SECONDS,
+):
+    import uvicorn
+
+    app = create_app(
+        models_dir, latest_features_path, defense_table_path, cache_entries, cache_ttl
+    )
+    uvicorn.run(app, host=host, port=port)
+
+
+if __name__ == "__main__":
+    cli()
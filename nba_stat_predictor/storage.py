@@ -0,0 +1,207 @@
+"""Camada de armazenamento colunar (Parquet) das tabelas do pipeline.
+
+Cada tabela é um diretório com um arquivo Parquet por partição (temporada):
+
+    nba_player_gamelogs_processed.parquet/
+    ├── Season=2022-23/part-0.parquet
+    └── Season=2023-24/part-0.parquet
+
+A coluna de partição continua dentro dos arquivos, então os tipos (datas,
+categorias, inteiros pequenos) voltam exatamente como foram gravados, sem
+re-parsear texto. A leitura aceita projeção de colunas e poda de partições.
+"""
+
+import os
+from pathlib import Path
+import shutil
+import uuid
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION_FILE = "part-0.parquet"
+
+
+def _partition_dir(path, partition_col, value):
+    return Path(path) / f"{partition_col}={value}"
+
+
+def _write_file(df, file_path, schema=None):
+    """Grava um DataFrame em Parquet de forma atômica (arquivo temporário + rename)."""
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex}.tmp")
+    if schema is not None:
+        df = df[schema.names]
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, file_path)
+
+
+def write_table(df, path, partition_col=None):
+    """Grava (substituindo) a tabela inteira em `path`, particionada por `partition_col`.
+
+    A nova versão é montada em um diretório temporário e trocada no final, então
+    leitores nunca veem uma tabela pela metade.
+    """
+    path = Path(path)
+    tmp_dir = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    if partition_col is None:
+        _write_file(df, tmp_dir / PARTITION_FILE)
+    else:
+        for value, df_part in df.groupby(partition_col, observed=True, sort=True):
+            _write_file(df_part, _partition_dir(tmp_dir, partition_col, value) / PARTITION_FILE)
+    _swap_dir(tmp_dir, path)
+
+
+def write_table_chunks(chunks, path, partition_col=None):
+    """Grava (substituindo) a tabela a partir de um iterável de DataFrames.
+
+    Cada bloco é gravado assim que chega, em arquivos novos no diretório
+    temporário, e liberado antes do próximo: só um bloco fica em memória.
+    Os blocos seguintes são convertidos para o schema do primeiro. A tabela
+    só é trocada depois do último bloco (ou descartada se algum falhar).
+
+    Returns:
+        Número total de linhas gravadas.
+    """
+    path = Path(path)
+    tmp_dir = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    schema, n_rows = None, 0
+    try:
+        for df in chunks:
+            if df.empty:
+                continue
+            file_name = f"part-{uuid.uuid4().hex}.parquet"
+            if partition_col is None:
+                _write_file(df, tmp_dir / file_name, schema)
+            else:
+                for value, df_part in df.groupby(partition_col, observed=True, sort=True):
+                    _write_file(
+                        df_part, _partition_dir(tmp_dir, partition_col, value) / file_name, schema
+                    )
+            schema = schema if schema is not None else table_schema(tmp_dir)
+            n_rows += len(df)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    if n_rows == 0:
+        raise ValueError(f"Nenhuma linha para gravar em {path}")
+    _swap_dir(tmp_dir, path)
+    return n_rows
+
+
+def _swap_dir(tmp_dir, path):
+    """Troca `path` pelo diretório já completo `tmp_dir`."""
+    if path.exists():
+        old_dir = path.with_name(f".{path.name}.{uuid.uuid4().hex}.old")
+        os.replace(path, old_dir)
+        os.replace(tmp_dir, path)
+        shutil.rmtree(old_dir)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_dir, path)
+
+
+def append_table(df, path, partition_col=None):
+    """Acrescenta linhas à tabela gravando novos arquivos, sem reescrever os existentes.
+
+    As linhas novas são convertidas para o schema já gravado, para que todos os
+    arquivos da tabela continuem compatíveis.
+    """
+    schema = table_schema(path) if table_exists(path) else None
+    file_name = f"part-{uuid.uuid4().hex}.parquet"
+    if partition_col is None:
+        _write_file(df, Path(path) / file_name, schema)
+        return
+    for value, df_part in df.groupby(partition_col, observed=True, sort=True):
+        _write_file(df_part, _partition_dir(path, partition_col, value) / file_name, schema)
+
+
+def table_exists(path):
+    return Path(path).is_dir() and any(Path(path).rglob("*.parquet"))
+
+
+def _table_files(path, partitions=None, files=None):
+    path = Path(path)
+    if not path.is_dir():
+        raise FileNotFoundError(f"Tabela não encontrada: {path}")
+    if files is not None:
+        missing = [name for name in files if not (path / name).is_file()]
+        if missing:
+            raise FileNotFoundError(f"Arquivos não encontrados em {path}: {missing}")
+        return [str(path / name) for name in sorted(files)]
+    selected = []
+    for file_path in sorted(path.rglob("*.parquet")):
+        if partitions is not None:
+            partition = file_path.parent.name.partition("=")[2]
+            if partition not in partitions:
+                continue
+        selected.append(str(file_path))
+    return selected
+
+
+def table_files(path):
+    """{caminho relativo: [tamanho em bytes, mtime em ns]} de cada arquivo da tabela.
+
+    As gravações nunca alteram um arquivo existente (append_table cria
+    arquivos novos; write_table troca o diretório inteiro por arquivos
+    novos), então esta lista identifica o que já foi lido: arquivos novos
+    são linhas anexadas depois, e um arquivo com outro tamanho ou mtime
+    veio de uma nova gravação da tabela.
+    """
+    path = Path(path)
+    files = {}
+    for file_path in map(Path, _table_files(path)):
+        stat = file_path.stat()
+        files[file_path.relative_to(path).as_posix()] = [stat.st_size, stat.st_mtime_ns]
+    return files
+
+
+def read_table(path, columns=None, partitions=None, files=None, filters=None):
+    """Lê a tabela em `path` como DataFrame.
+
+    Args:
+        columns: lista de colunas a carregar (projeção); None carrega todas.
+        partitions: valores de partição (ex.: temporadas) a carregar; None carrega todas.
+        files: caminhos relativos (ver table_files) a carregar; None carrega todos.
+        filters: filtro de linhas no formato do pandas.read_parquet (ex.:
+            [("GAME_DATE", ">=", data)]); arquivos e row groups cujas
+            estatísticas do Parquet estão fora do filtro não são lidos.
+    """
+    selected = _table_files(path, partitions, files)
+    if not selected:
+        if partitions is None and files is None:
+            raise FileNotFoundError(f"Tabela vazia: {path}")
+        schema = table_schema(path)
+        names = columns if columns is not None else schema.names
+        return schema.empty_table().select(names).to_pandas()
+    dataset = ds.dataset(selected, format="parquet")
+    expression = pq.filters_to_expression(filters) if filters else None
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def table_schema(path):
+    """Schema da tabela, lido apenas dos metadados (sem carregar dados)."""
+    files = _table_files(path)
+    if not files:
+        raise FileNotFoundError(f"Tabela vazia: {path}")
+    return pq.read_schema(files[0])
+
+
+def table_columns(path):
+    """Nomes das colunas da tabela, sem carregar dados."""
+    return table_schema(path).names
+
+
+def table_partitions(path):
+    """Valores de partição existentes (ex.: temporadas), em ordem."""
+    return sorted(
+        {p.name.partition("=")[2] for p in Path(path).iterdir() if p.is_dir() and "=" in p.name}
+    )
+
+
+def table_nbytes(path):
+    """Tamanho total em disco da tabela."""
+    return sum(os.path.getsize(f) for f in _table_files(path))
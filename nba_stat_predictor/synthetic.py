@@ -0,0 +1,253 @@
+"""Gerador de dados sintéticos no mesmo schema da nba_api.
+
+Usado pelos testes e benchmarks para exercitar o pipeline sem acessar a API.
+Os valores são plausíveis (médias por jogador, jogos em dias distintos,
+adversários reais), mas não têm nenhuma relação com jogos reais.
+"""
+
+import numpy as np
+import pandas as pd
+
+TEAM_NAMES = {
+    "ATL": "Atlanta Hawks",
+    "BOS": "Boston Celtics",
+    "BKN": "Brooklyn Nets",
+    "CHA": "Charlotte Hornets",
+    "CHI": "Chicago Bulls",
+    "CLE": "Cleveland Cavaliers",
+    "DAL": "Dallas Mavericks",
+    "DEN": "Denver Nuggets",
+    "DET": "Detroit Pistons",
+    "GSW": "Golden State Warriors",
+    "HOU": "Houston Rockets",
+    "IND": "Indiana Pacers",
+    "LAC": "LA Clippers",
+    "LAL": "Los Angeles Lakers",
+    "MEM": "Memphis Grizzlies",
+    "MIA": "Miami Heat",
+    "MIL": "Milwaukee Bucks",
+    "MIN": "Minnesota Timberwolves",
+    "NOP": "New Orleans Pelicans",
+    "NYK": "New York Knicks",
+    "OKC": "Oklahoma City Thunder",
+    "ORL": "Orlando Magic",
+    "PHI": "Philadelphia 76ers",
+    "PHX": "Phoenix Suns",
+    "POR": "Portland Trail Blazers",
+    "SAC": "Sacramento Kings",
+    "SAS": "San Antonio Spurs",
+    "TOR": "Toronto Raptors",
+    "UTA": "Utah Jazz",
+    "WAS": "Washington Wizards",
+}
+TEAM_ABBRS = list(TEAM_NAMES)
+
+# Colunas do dataset PlayerGameLog da nba_api, na ordem original
+GAMELOG_COLUMNS = [
+    "SEASON_ID",
+    "Player_ID",
+    "Game_ID",
+    "GAME_DATE",
+    "MATCHUP",
+    "WL",
+    "MIN",
+    "FGM",
+    "FGA",
+    "FG_PCT",
+    "FG3M",
+    "FG3A",
+    "FG3_PCT",
+    "FTM",
+    "FTA",
+    "FT_PCT",
+    "OREB",
+    "DREB",
+    "REB",
+    "AST",
+    "STL",
+    "BLK",
+    "TOV",
+    "PF",
+    "PTS",
+    "PLUS_MINUS",
+    "VIDEO_AVAILABLE",
+]
+
+# Colunas (sem os _RANK) do dataset LeagueDashTeamStats da nba_api
+DEFENSE_COLUMNS = [
+    "TEAM_ID",
+    "TEAM_NAME",
+    "GP",
+    "W",
+    "L",
+    "W_PCT",
+    "MIN",
+    "FGM",
+    "FGA",
+    "FG_PCT",
+    "FG3M",
+    "FG3A",
+    "FG3_PCT",
+    "FTM",
+    "FTA",
+    "FT_PCT",
+    "OREB",
+    "DREB",
+    "REB",
+    "AST",
+    "TOV",
+    "STL",
+    "BLK",
+    "BLKA",
+    "PF",
+    "PFD",
+    "PTS",
+    "PLUS_MINUS",
+]
+
+DEFAULT_SEASONS = ("2022-23", "2023-24", "2024-25")
+
+
+def season_labels(n_seasons, last_start_year=2024):
+    """Rótulos das `n_seasons` temporadas terminando em last_start_year ('2024-25')."""
+    return [
+        f"{y}-{str(y + 1)[-2:]}"
+        for y in range(last_start_year - n_seasons + 1, last_start_year + 1)
+    ]
+
+
+def _pct(made, attempted):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(attempted > 0, np.round(made / attempted, 3), 0.0)
+
+
+def make_gamelogs(
+    n_players=50, seasons=DEFAULT_SEASONS, games_per_season=60, seed=0, first_player_id=1_600_000
+):
+    """Gera game logs no schema do endpoint PlayerGameLog (como make_dataset.py grava).
+
+    Cada jogador tem um time fixo e um "nível" que define suas médias; cada
+    temporada tem `games_per_season` jogos em datas crescentes a partir de outubro.
+    """
+    rng = np.random.default_rng(seed)
+    n_games = len(seasons) * games_per_season
+    n_rows = n_players * n_games
+
+    player_ids = np.repeat(np.arange(first_player_id, first_player_id + n_players), n_games)
+    team_idx = np.repeat(rng.integers(0, len(TEAM_ABBRS), n_players), n_games)
+    skill = np.repeat(rng.gamma(2.0, 0.5, n_players), n_games)
+
+    season_idx = np.tile(np.repeat(np.arange(len(seasons)), games_per_season), n_players)
+    game_num = np.tile(np.arange(games_per_season), n_players * len(seasons))
+    season_start = pd.to_datetime([f"{s[:4]}-10-20" for s in seasons]).values
+    gaps = rng.integers(1, 4, (n_players * len(seasons), games_per_season)).cumsum(axis=1)
+    game_dates = season_start[season_idx] + (gaps.ravel() - 1).astype("timedelta64[D]")
+
+    opp_idx = (team_idx + rng.integers(1, len(TEAM_ABBRS), n_rows)) % len(TEAM_ABBRS)
+    home = rng.random(n_rows) < 0.5
+    team = np.array(TEAM_ABBRS)[team_idx]
+    opponent = np.array(TEAM_ABBRS)[opp_idx]
+    matchup = np.where(
+        home,
+        np.char.add(np.char.add(team, " vs. "), opponent),
+        np.char.add(np.char.add(team, " @ "), opponent),
+    )
+
+    minutes = np.clip(rng.normal(12 + 10 * skill, 5), 0, 48).round().astype(int)
+    scale = minutes / 36
+    fga = rng.poisson(14 * skill * scale + 0.1)
+    fgm = rng.binomial(fga, 0.46)
+    fg3a = rng.binomial(fga, 0.38)
+    fg3m = rng.binomial(fg3a, 0.36)
+    fta = rng.poisson(4 * skill * scale + 0.1)
+    ftm = rng.binomial(fta, 0.78)
+    oreb = rng.poisson(1.5 * skill * scale + 0.05)
+    dreb = rng.poisson(4.5 * skill * scale + 0.05)
+    pts = 2 * fgm + fg3m + ftm
+    season_years = np.array([s[:4] for s in seasons])[season_idx]
+
+    df = pd.DataFrame(
+        {
+            "SEASON_ID": np.char.add("2", season_years),
+            "Player_ID": player_ids,
+            "Game_ID": [f"002{y[2:]}{n:05d}" for y, n in zip(season_years, game_num + 1)],
+            "GAME_DATE": pd.DatetimeIndex(game_dates).strftime("%b %d, %Y").str.upper(),
+            "MATCHUP": matchup,
+            "WL": np.where(rng.random(n_rows) < 0.5, "W", "L"),
+            "MIN": minutes,
+            "FGM": fgm,
+            "FGA": fga,
+            "FG_PCT": _pct(fgm, fga),
+            "FG3M": fg3m,
+            "FG3A": fg3a,
+            "FG3_PCT": _pct(fg3m, fg3a),
+            "FTM": ftm,
+            "FTA": fta,
+            "FT_PCT": _pct(ftm, fta),
+            "OREB": oreb,
+            "DREB": dreb,
+            "REB": oreb + dreb,
+            "AST": rng.poisson(4 * skill * scale + 0.05),
+            "STL": rng.poisson(1.0 * scale + 0.02),
+            "BLK": rng.poisson(0.6 * scale + 0.02),
+            "TOV": rng.poisson(1.8 * skill * scale + 0.05),
+            "PF": rng.poisson(2.2 * scale + 0.05),
+            "PTS": pts,
+            "PLUS_MINUS": rng.normal(0, 10, n_rows).round().astype(int),
+            "VIDEO_AVAILABLE": 1,
+        }
+    )
+    return df[GAMELOG_COLUMNS]
+
+
+def make_defense_stats(seasons=DEFAULT_SEASONS, seed=0):
+    """Gera estatísticas de defesa por time e temporada (como fetch_defense_stats.py grava)."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for season in seasons:
+        n = len(TEAM_ABBRS)
+        wins = rng.integers(15, 65, n)
+        fga = rng.normal(88, 2, n).round(1)
+        fgm = (fga * rng.normal(0.47, 0.015, n)).round(1)
+        fg3a = rng.normal(35, 2.5, n).round(1)
+        fg3m = (fg3a * rng.normal(0.36, 0.015, n)).round(1)
+        fta = rng.normal(22, 2, n).round(1)
+        ftm = (fta * 0.78).round(1)
+        oreb = rng.normal(10.5, 1, n).round(1)
+        dreb = rng.normal(33, 1.5, n).round(1)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "TEAM_ID": 1610612737 + np.arange(n),
+                    "TEAM_NAME": [TEAM_NAMES[abbr] for abbr in TEAM_ABBRS],
+                    "GP": 82,
+                    "W": wins,
+                    "L": 82 - wins,
+                    "W_PCT": (wins / 82).round(3),
+                    "MIN": 48.2,
+                    "FGM": fgm,
+                    "FGA": fga,
+                    "FG_PCT": (fgm / fga).round(3),
+                    "FG3M": fg3m,
+                    "FG3A": fg3a,
+                    "FG3_PCT": (fg3m / fg3a).round(3),
+                    "FTM": ftm,
+                    "FTA": fta,
+                    "FT_PCT": (ftm / fta).round(3),
+                    "OREB": oreb,
+                    "DREB": dreb,
+                    "REB": (oreb + dreb).round(1),
+                    "AST": rng.normal(26, 1.5, n).round(1),
+                    "TOV": rng.normal(13.5, 1, n).round(1),
+                    "STL": rng.normal(7.5, 0.6, n).round(1),
+                    "BLK": rng.normal(5, 0.5, n).round(1),
+                    "BLKA": rng.normal(5, 0.5, n).round(1),
+                    "PF": rng.normal(19.5, 1, n).round(1),
+                    "PFD": rng.normal(19.5, 1, n).round(1),
+                    "PTS": (2 * fgm + fg3m + ftm).round(1),
+                    "PLUS_MINUS": rng.normal(0, 4, n).round(1),
+                    "Season": season,
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
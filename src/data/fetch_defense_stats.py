@@ -1,9 +1,11 @@
 import pandas as pd
 import time
 import os
+import argparse
 import logging
 from nba_api.stats.endpoints import leaguedashteamstats
 from nba_api.stats.library.parameters import MeasureTypeDetailedDefense, PerModeDetailed, SeasonTypeAllStar
+from nba_stat_predictor import profiling, storage
 
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,12 +15,14 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 SEASONS_TO_FETCH = ['2022-23', '2023-24', '2024-25'] 
 
 # Caminho para salvar o arquivo final
-OUTPUT_RAW_PATH = os.path.join('data', 'raw', 'nba_team_defense_stats_raw.csv')
+# Tabela Parquet particionada por Season (ver nba_stat_predictor/storage.py)
+OUTPUT_RAW_PATH = os.path.join('data', 'raw', 'nba_team_defense_stats_raw.parquet')
 
 # Tempo de pausa entre as requisições à API (em segundos)
 SLEEP_TIME = 0.7 
 # ---------------------
 
+@profiling.timed()
 def fetch_season_defense_stats(season):
     """Busca as estatísticas defensivas (opponent stats) para uma temporada."""
     logging.info(f"Buscando dados defensivos para a temporada {season}...")
@@ -50,39 +54,45 @@ def fetch_season_defense_stats(season):
         logging.error(f" -> Erro ao buscar dados defensivos para a temporada {season}: {e}")
         return None
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Coleta as estatísticas defensivas dos times.")
+    parser.add_argument("--profile", metavar="ETAPA",
+                        help="Roda a etapa indicada sob cProfile (ver nba_stat_predictor/profiling.py).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Função principal para orquestrar a coleta de dados defensivos."""
-    all_defense_stats_list = []
+    args = parse_args(argv)
+    with profiling.run('fetch_defense_stats', profile=args.profile):
+        all_defense_stats_list = []
 
-    for season in SEASONS_TO_FETCH:
-        df_season_defense = fetch_season_defense_stats(season)
-        
-        if df_season_defense is not None:
-            all_defense_stats_list.append(df_season_defense)
-            
-        # PAUSA ESTRATÉGICA
-        logging.info(f"Aguardando {SLEEP_TIME} segundos...")
-        time.sleep(SLEEP_TIME)
+        for season in SEASONS_TO_FETCH:
+            df_season_defense = fetch_season_defense_stats(season)
+
+            if df_season_defense is not None:
+                all_defense_stats_list.append(df_season_defense)
 
-    if not all_defense_stats_list:
-        logging.warning("Nenhum dado defensivo foi coletado via API.")
-        return
+            # PAUSA ESTRATÉGICA
+            logging.info(f"Aguardando {SLEEP_TIME} segundos...")
+            with profiling.stage('sleep'):
+                time.sleep(SLEEP_TIME)
 
-    # Junta tudo em um DataFrame
-    logging.info("Combinando dados defensivos de todas as temporadas...")
-    df_complete_defense = pd.concat(all_defense_stats_list, ignore_index=True)
-    logging.info(f"DataFrame defensivo final criado com {len(df_complete_defense)} registros (Times x Temporadas).")
-    logging.info("Colunas disponíveis:")
-    logging.info(df_complete_defense.columns.tolist())
+        if not all_defense_stats_list:
+            logging.warning("Nenhum dado defensivo foi coletado via API.")
+            return
 
-    # Garante que a pasta de destino exista
-    output_dir = os.path.dirname(OUTPUT_RAW_PATH)
-    os.makedirs(output_dir, exist_ok=True)
+        # Junta tudo em um DataFrame
+        logging.info("Combinando dados defensivos de todas as temporadas...")
+        df_complete_defense = pd.concat(all_defense_stats_list, ignore_index=True)
+        logging.info(f"DataFrame defensivo final criado com {len(df_complete_defense)} registros (Times x Temporadas).")
+        logging.info("Colunas disponíveis:")
+        logging.info(df_complete_defense.columns.tolist())
 
-    # Salva o arquivo CSV
-    logging.info(f"Salvando dados defensivos brutos em: {OUTPUT_RAW_PATH}")
-    df_complete_defense.to_csv(OUTPUT_RAW_PATH, index=False)
-    logging.info("Dados defensivos salvos com sucesso!")
+        # Salva a tabela Parquet, uma partição por temporada
+        logging.info(f"Salvando dados defensivos brutos em: {OUTPUT_RAW_PATH}")
+        with profiling.stage('write_raw', rows=len(df_complete_defense)):
+            storage.write_table(df_complete_defense, OUTPUT_RAW_PATH, partition_col='Season')
+        logging.info("Dados defensivos salvos com sucesso!")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,9 +1,14 @@
 import pandas as pd
 import time
 import os
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from nba_api.stats.static import players
-from nba_api.stats.endpoints import playergamelog
+from nba_api.stats.endpoints import leaguegamelog, playergamelog
 import logging
+from nba_stat_predictor import profiling, schema, storage
 
 # Configuração básica do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -13,12 +18,112 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 SEASONS_TO_FETCH = ['2022-23', '2023-24', '2024-25'] 
 
 # Caminho para salvar o arquivo final (dentro da estrutura Cookiecutter)
-OUTPUT_RAW_PATH = os.path.join('data', 'raw', 'nba_player_gamelogs_raw.csv')
+# Tabela Parquet particionada por SEASON_ID (ver nba_stat_predictor/storage.py)
+OUTPUT_RAW_PATH = os.path.join('data', 'raw', 'nba_player_gamelogs_raw.parquet')
 
 # Tempo de pausa entre as requisições à API (em segundos)
 SLEEP_TIME = 0.7 
+
+# Orçamento de requisições por segundo (compartilhado entre todas as threads)
+REQUESTS_PER_SECOND = 1 / SLEEP_TIME
+
+# Número de requisições simultâneas (workers do pool)
+MAX_WORKERS = 8
+
+# Novas tentativas em caso de erro (timeout, 429, etc.) com backoff exponencial + jitter
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Cache persistente das respostas da API, uma entrada por (endpoint, temporada, jogador).
+# Cada resposta é gravada assim que chega, servindo também de checkpoint da coleta.
+CACHE_DIR = os.path.join('data', 'interim', 'api_cache')
+
+# Temporada em andamento: a única que muda entre uma coleta e outra
+CURRENT_SEASON = SEASONS_TO_FETCH[-1]
+
+# Respostas da temporada atual mais antigas que isso são rebuscadas (as das passadas valem sempre)
+REFRESH_MAX_AGE_HOURS = 12
+
+# Modo --bulk: um LeagueGameLog por temporada (todos os jogadores que entraram em
+# quadra) em vez de um PlayerGameLog por (jogador ativo, temporada)
+BULK_CACHE_KEY = 'league'
+
+# Colunas do PlayerGameLog, na ordem da API: o schema que o build_features.py espera
+PLAYER_GAMELOG_COLUMNS = playergamelog.PlayerGameLog.expected_data['PlayerGameLog']
+LEAGUE_TO_PLAYER_COLUMNS = {'PLAYER_ID': 'Player_ID', 'GAME_ID': 'Game_ID'}
 # ---------------------
 
+
+class TokenBucket:
+    """Limitador de taxa (token bucket) thread-safe.
+
+    Cada requisição consome um token; os tokens são repostos a `rate` por segundo
+    até o limite `capacity`. Com capacity=1 nunca há rajadas acima do orçamento.
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate deve ser positivo.")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloqueia até que haja um token disponível e o consome."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class ResponseCache:
+    """Cache em disco das respostas da API, chaveado por (player_id, season, endpoint).
+
+    Respostas vazias (jogador sem jogos na temporada) também são guardadas, para
+    não serem pedidas de novo. Erros nunca são guardados.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, player_id, season, endpoint_name):
+        return os.path.join(self.cache_dir, endpoint_name, season, f"{player_id}.pkl")
+
+    def get(self, player_id, season, endpoint_name, max_age=None):
+        """Retorna o DataFrame guardado (possivelmente vazio) ou None se não houver entrada válida."""
+        path = self._path(player_id, season, endpoint_name)
+        try:
+            if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+                return None
+            return pd.read_pickle(path)
+        except (FileNotFoundError, EOFError):
+            return None
+
+    def put(self, player_id, season, endpoint_name, df):
+        """Grava a resposta de forma atômica (arquivo temporário + rename)."""
+        path = self._path(player_id, season, endpoint_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        (df if df is not None else pd.DataFrame()).to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Backoff exponencial com 'full jitter' para a tentativa `attempt` (0, 1, 2...)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+@profiling.timed()
 def get_active_player_ids():
     """Busca todos os jogadores ativos na NBA e retorna seus IDs."""
     logging.info("Buscando lista de jogadores ativos...")
@@ -31,11 +136,19 @@ def get_active_player_ids():
         logging.error(f"Erro ao buscar lista de jogadores: {e}")
         return []
 
-def fetch_player_gamelogs(player_id, season):
-    """Busca os logs de jogos para um jogador e temporada específicos."""
+def fetch_player_gamelogs(player_id, season, endpoint=playergamelog.PlayerGameLog, raise_errors=False,
+                          date_from=None):
+    """Busca os logs de jogos para um jogador e temporada específicos.
+
+    Com raise_errors=True, erros da API são propagados (usado pelo mecanismo de retry).
+    Com date_from, pede apenas os jogos a partir dessa data (inclusive).
+    """
     logging.info(f"Buscando dados para jogador ID {player_id} na temporada {season}...")
     try:
-        gamelog = playergamelog.PlayerGameLog(player_id=player_id, season=season, timeout=30) # Aumenta timeout
+        params = {}
+        if date_from is not None:
+            params['date_from_nullable'] = date_from.strftime('%m/%d/%Y')
+        gamelog = endpoint(player_id=player_id, season=season, timeout=30, **params) # Aumenta timeout
         df_gamelog = gamelog.get_data_frames()[0]
         
         # Pequena verificação se retornou dados
@@ -47,47 +160,327 @@ def fetch_player_gamelogs(player_id, season):
         return df_gamelog
         
     except Exception as e:
+        if raise_errors:
+            raise
         logging.error(f" -> Erro ao buscar dados para jogador {player_id} na temporada {season}: {e}")
         return None
 
-def main():
+def call_with_retry(fetch, rate_limiter, max_retries, description):
+    """Chama fetch() com limite de taxa e novas tentativas com backoff.
+
+    Toda tentativa (inclusive as repetições) consome um token do rate_limiter,
+    então o orçamento de requisições nunca é ultrapassado.
+
+    Returns:
+        (True, resultado) ou (False, None) se todas as tentativas falharem.
+    """
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire()
+        try:
+            return True, fetch()
+        except Exception as e:
+            if attempt == max_retries:
+                logging.error(f" -> Desistindo de {description} após {attempt + 1} tentativas: {e}")
+                return False, None
+            delay = backoff_delay(attempt)
+            logging.warning(f" -> Erro em {description} ({e}). Nova tentativa em {delay:.1f}s...")
+            time.sleep(delay)
+
+def fetch_player_gamelogs_with_retry(player_id, season, rate_limiter, max_retries=MAX_RETRIES,
+                                     endpoint=playergamelog.PlayerGameLog, cache=None, date_from=None):
+    """Envolve fetch_player_gamelogs com limite de taxa e novas tentativas com backoff.
+
+    Respostas bem-sucedidas são gravadas no cache imediatamente.
+    """
+    ok, df = call_with_retry(
+        lambda: fetch_player_gamelogs(player_id, season, endpoint=endpoint, raise_errors=True,
+                                      date_from=date_from),
+        rate_limiter, max_retries, f"jogador {player_id} na temporada {season}")
+    if ok and cache is not None:
+        cache.put(player_id, season, endpoint.__name__, df)
+    return df
+
+def fetch_all_gamelogs(player_ids, seasons, max_workers=MAX_WORKERS,
+                       requests_per_second=REQUESTS_PER_SECOND, max_retries=MAX_RETRIES,
+                       endpoint=playergamelog.PlayerGameLog, cache=None,
+                       refresh_seasons=(CURRENT_SEASON,),
+                       refresh_max_age=REFRESH_MAX_AGE_HOURS * 3600, since=None):
+    """Busca os logs de todos os pares (jogador, temporada) em um pool de threads limitado.
+
+    Pares já presentes no cache não são requisitados de novo (retomada após falha).
+    Para as temporadas em `refresh_seasons` (por padrão a atual, que ganha jogos
+    novos), só valem entradas do cache mais novas que `refresh_max_age` segundos.
+    Uma execução retomada logo após a falha reaproveita o que já foi gravado.
+
+    `since` (dict Player_ID -> data) restringe a busca aos jogos a partir dessa data;
+    essas respostas parciais não passam pelo cache.
+
+    Retorna a lista de DataFrames não vazios na mesma ordem do loop sequencial
+    (temporada, jogador), independente da ordem em que as respostas chegam.
+    """
+    tasks = [(player_id, season) for season in seasons for player_id in player_ids]
+    results = [None] * len(tasks)
+    since = since or {}
+
+    pending = []
+    for i, (player_id, season) in enumerate(tasks):
+        cached = None
+        if cache is not None and player_id not in since:
+            max_age = refresh_max_age if season in refresh_seasons else None
+            cached = cache.get(player_id, season, endpoint.__name__, max_age=max_age)
+        if cached is None:
+            pending.append(i)
+        elif not cached.empty:
+            results[i] = cached
+    if cache is not None:
+        logging.info(f"{len(tasks) - len(pending)} de {len(tasks)} respostas reaproveitadas do cache.")
+
+    rate_limiter = TokenBucket(requests_per_second)
+    logging.info(f"Iniciando coleta de {len(pending)} requisições com {max_workers} workers "
+                 f"({requests_per_second:.2f} req/s)...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_player_gamelogs_with_retry, *tasks[i], rate_limiter,
+                            max_retries, endpoint,
+                            cache if tasks[i][0] not in since else None,
+                            since.get(tasks[i][0])): i
+            for i in pending
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if done % 100 == 0:
+                logging.info(f"Progresso: {done}/{len(pending)} requisições concluídas.")
+
+    return [df for df in results if df is not None]
+
+def normalize_league_gamelog(df_league):
+    """Converte as linhas do LeagueGameLog (modo jogador) para o schema do PlayerGameLog.
+
+    Renomeia PLAYER_ID/GAME_ID, escreve GAME_DATE como o PlayerGameLog ('OCT 22, 2024'),
+    descarta as colunas extras (nome, time, FANTASY_PTS) e ordena como a coleta por
+    jogador (Player_ID e jogos mais recentes primeiro).
+    """
+    df = df_league.rename(columns=LEAGUE_TO_PLAYER_COLUMNS)
+    missing = [col for col in PLAYER_GAMELOG_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas ausentes na resposta do LeagueGameLog: {missing}")
+    game_dates = pd.to_datetime(df['GAME_DATE'], format='mixed')
+    df = df.assign(GAME_DATE=game_dates.dt.strftime('%b %d, %Y').str.upper(), _date=game_dates)
+    df = df.sort_values(['Player_ID', '_date', 'Game_ID'], ascending=[True, False, False])
+    return df[PLAYER_GAMELOG_COLUMNS].reset_index(drop=True)
+
+def fetch_league_gamelogs(season, endpoint=leaguegamelog.LeagueGameLog, date_from=None):
+    """Busca os game logs de todos os jogadores de uma temporada em uma única requisição.
+
+    Com date_from, pede apenas os jogos a partir dessa data (inclusive).
+    Retorna o DataFrame já no schema do PlayerGameLog (possivelmente vazio).
+    """
+    logging.info(f"Buscando game logs da liga inteira na temporada {season}...")
+    params = {}
+    if date_from is not None:
+        params['date_from_nullable'] = date_from.strftime('%m/%d/%Y')
+    gamelog = endpoint(season=season, player_or_team_abbreviation='P',
+                       season_type_all_star='Regular Season', timeout=60, **params)
+    df_league = gamelog.get_data_frames()[0]
+    if df_league.empty:
+        logging.warning(f" -> Nenhum jogo encontrado na temporada {season}.")
+        return pd.DataFrame(columns=PLAYER_GAMELOG_COLUMNS)
+    df = normalize_league_gamelog(df_league)
+    logging.info(f" -> {len(df)} jogos de {df['Player_ID'].nunique()} jogadores.")
+    return df
+
+@profiling.timed()
+def fetch_bulk_gamelogs(seasons, requests_per_second=REQUESTS_PER_SECOND, max_retries=MAX_RETRIES,
+                        endpoint=leaguegamelog.LeagueGameLog, cache=None,
+                        refresh_seasons=(CURRENT_SEASON,),
+                        refresh_max_age=REFRESH_MAX_AGE_HOURS * 3600, date_from=None):
+    """Uma requisição LeagueGameLog por temporada, com o mesmo cache e retry da coleta por jogador.
+
+    Respostas com `date_from` (parciais) não passam pelo cache, e as temporadas em
+    `refresh_seasons` expiram como em fetch_all_gamelogs. Temporadas cuja
+    requisição falha após as novas tentativas ficam de fora (com erro no log).
+
+    Returns:
+        Lista de DataFrames não vazios no schema do PlayerGameLog, na ordem de `seasons`.
+    """
+    rate_limiter = TokenBucket(requests_per_second)
+    results = []
+    for season in seasons:
+        use_cache = cache is not None and date_from is None
+        df = None
+        if use_cache:
+            max_age = refresh_max_age if season in refresh_seasons else None
+            df = cache.get(BULK_CACHE_KEY, season, endpoint.__name__, max_age=max_age)
+            if df is not None:
+                logging.info(f"Temporada {season} reaproveitada do cache ({len(df)} jogos).")
+        if df is None:
+            ok, df = call_with_retry(lambda: fetch_league_gamelogs(season, endpoint, date_from),
+                                     rate_limiter, max_retries, f"LeagueGameLog da temporada {season}")
+            if ok and use_cache:
+                cache.put(BULK_CACHE_KEY, season, endpoint.__name__, df)
+        if df is not None and not df.empty:
+            results.append(df)
+    return results
+
+def season_id(season):
+    """Converte '2024-25' no SEASON_ID da temporada regular retornado pela API ('22024')."""
+    return f"2{season[:4]}"
+
+def latest_game_dates(df_existing):
+    """Data do jogo mais recente já armazenado, por Player_ID."""
+    game_dates = pd.to_datetime(df_existing['GAME_DATE'], format='mixed')
+    return game_dates.groupby(df_existing['Player_ID']).max().to_dict()
+
+def select_new_games(df_existing, new_gamelogs_list):
+    """Junta as respostas novas e descarta os jogos já armazenados (Player_ID, Game_ID)."""
+    if not new_gamelogs_list:
+        return pd.DataFrame()
+    df_new = pd.concat(new_gamelogs_list, ignore_index=True)
+    df_new = df_new.drop_duplicates(subset=['Player_ID', 'Game_ID'], keep='last')
+    existing_keys = pd.MultiIndex.from_frame(df_existing[['Player_ID', 'Game_ID']])
+    new_keys = pd.MultiIndex.from_frame(df_new[['Player_ID', 'Game_ID']])
+    return df_new[~new_keys.isin(existing_keys)]
+
+@profiling.timed()
+def run_incremental(player_ids, args):
+    """Busca apenas os jogos posteriores ao último GAME_DATE de cada jogador e os anexa à tabela.
+
+    Temporadas passadas já estão completas, então só a temporada atual é consultada
+    (e só a partição dela é lida do disco). Com --bulk, uma única requisição da liga
+    a partir da data mais recente armazenada substitui as requisições por jogador.
+    Retorna False se não houver dados anteriores (é preciso uma coleta completa).
+    """
+    if not storage.table_exists(OUTPUT_RAW_PATH):
+        logging.warning(f"{OUTPUT_RAW_PATH} não existe; executando a coleta completa.")
+        return False
+
+    df_existing = storage.read_table(OUTPUT_RAW_PATH, columns=['Player_ID', 'Game_ID', 'GAME_DATE'],
+                                     partitions=[season_id(CURRENT_SEASON)])
+    since = latest_game_dates(df_existing)
+    logging.info(f"Modo incremental: {len(df_existing)} jogos já armazenados "
+                 f"para {len(since)} jogadores.")
+
+    if args.bulk:
+        # Uma requisição para a liga inteira a partir da data mais recente já armazenada;
+        # jogos dessa data que já estão na tabela são descartados em select_new_games
+        new_gamelogs_list = fetch_bulk_gamelogs(
+            [CURRENT_SEASON],
+            requests_per_second=args.rate,
+            max_retries=args.retries,
+            date_from=max(since.values()) if since else None,
+        )
+    else:
+        new_gamelogs_list = fetch_all_gamelogs(
+            player_ids, [CURRENT_SEASON],
+            max_workers=args.workers,
+            requests_per_second=args.rate,
+            max_retries=args.retries,
+            since=since,
+        )
+    df_new_games = select_new_games(df_existing, new_gamelogs_list)
+
+    if df_new_games.empty:
+        logging.info("Nenhum jogo novo encontrado.")
+        return True
+
+    # Anexa somente as linhas novas, sem reescrever o histórico
+    logging.info(f"Anexando {len(df_new_games)} jogos novos em: {OUTPUT_RAW_PATH}")
+    df_new_games = schema.apply_schema(df_new_games, schema.RAW_GAMELOG_DTYPES)
+    storage.append_table(df_new_games, OUTPUT_RAW_PATH, partition_col='SEASON_ID')
+    logging.info("Dados brutos atualizados com sucesso!")
+    return True
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Coleta os game logs dos jogadores ativos.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Número de requisições simultâneas.")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND,
+                        help="Limite de requisições por segundo (todas as threads).")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES,
+                        help="Novas tentativas por requisição em caso de erro.")
+    parser.add_argument("--refresh-current", action="store_true",
+                        help="Obsoleta, não tem efeito: com cache, a temporada atual "
+                             f"({CURRENT_SEASON}) é sempre rebuscada após {REFRESH_MAX_AGE_HOURS}h "
+                             "e as passadas vêm do cache. Será removida.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignora o cache em disco e rebusca tudo.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Busca apenas os jogos posteriores ao último GAME_DATE armazenado "
+                             "e os anexa ao arquivo existente.")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Busca cada temporada com uma única requisição LeagueGameLog "
+                             "(todos os jogadores), em vez de uma por jogador.")
+    parser.add_argument("--profile", metavar="ETAPA",
+                        help="Roda a etapa indicada sob cProfile (ver nba_stat_predictor/profiling.py).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Função principal para orquestrar a coleta de dados."""
-    player_ids = get_active_player_ids()
-    
-    if not player_ids:
-        logging.error("Nenhum ID de jogador encontrado. Abortando.")
-        return
-
-    all_gamelogs_list = [] # Lista para guardar os DataFrames
-
-    # Loop principal de coleta
-    for season in SEASONS_TO_FETCH:
-        for player_id in player_ids:
-            df_player_season = fetch_player_gamelogs(player_id, season)
-            
-            if df_player_season is not None:
-                all_gamelogs_list.append(df_player_season)
-                
-            # PAUSA ESTRATÉGICA
-            time.sleep(SLEEP_TIME)
-
-    if not all_gamelogs_list:
-        logging.warning("Nenhum dado de jogo foi coletado. Verifique a API ou os parâmetros.")
-        return
-
-    # Junta tudo em um DataFrame
-    logging.info("Combinando todos os dados coletados...")
-    df_complete_raw = pd.concat(all_gamelogs_list, ignore_index=True)
-    logging.info(f"DataFrame final criado com {len(df_complete_raw)} registros.")
-
-    # Garante que a pasta de destino exista
-    output_dir = os.path.dirname(OUTPUT_RAW_PATH)
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Salva o arquivo CSV
-    logging.info(f"Salvando dados brutos em: {OUTPUT_RAW_PATH}")
-    df_complete_raw.to_csv(OUTPUT_RAW_PATH, index=False)
-    logging.info("Dados brutos salvos com sucesso!")
+    args = parse_args(argv)
+    if args.refresh_current:
+        logging.warning("--refresh-current está obsoleta e não tem efeito: a temporada atual já é "
+                        f"rebuscada quando o cache tem mais de {REFRESH_MAX_AGE_HOURS}h.")
+    with profiling.run('make_dataset', profile=args.profile):
+        # No modo --bulk a liga inteira vem em uma requisição por temporada: não há lista de jogadores
+        player_ids = None if args.bulk else get_active_player_ids()
+
+        if not args.bulk and not player_ids:
+            logging.error("Nenhum ID de jogador encontrado. Abortando.")
+            return
+
+        if args.incremental and run_incremental(player_ids, args):
+            return
+
+        # Coleta concorrente, respeitando o limite de taxa da API.
+        # Com cache, uma execução interrompida retoma de onde parou.
+        cache = None if args.no_cache else ResponseCache()
+        if args.no_cache:
+            logging.info("Cache desativado: todas as respostas serão buscadas na API.")
+        else:
+            logging.info(f"Temporada {CURRENT_SEASON}: respostas do cache com mais de "
+                         f"{REFRESH_MAX_AGE_HOURS}h serão rebuscadas.")
+        with profiling.stage('fetch_all_gamelogs') as etapa:
+            if args.bulk:
+                logging.info(f"Modo bulk: uma requisição LeagueGameLog por temporada "
+                             f"({len(SEASONS_TO_FETCH)} temporadas).")
+                all_gamelogs_list = fetch_bulk_gamelogs(
+                    SEASONS_TO_FETCH,
+                    requests_per_second=args.rate,
+                    max_retries=args.retries,
+                    cache=cache,
+                )
+            else:
+                all_gamelogs_list = fetch_all_gamelogs(
+                    player_ids, SEASONS_TO_FETCH,
+                    max_workers=args.workers,
+                    requests_per_second=args.rate,
+                    max_retries=args.retries,
+                    cache=cache,
+                )
+            etapa.rows = sum(len(df) for df in all_gamelogs_list)
+
+        if not all_gamelogs_list:
+            logging.warning("Nenhum dado de jogo foi coletado. Verifique a API ou os parâmetros.")
+            return
+
+        # Junta tudo em um DataFrame
+        logging.info("Combinando todos os dados coletados...")
+        with profiling.stage('concat') as etapa:
+            df_complete_raw = pd.concat(all_gamelogs_list, ignore_index=True)
+            etapa.rows = len(df_complete_raw)
+        logging.info(f"DataFrame final criado com {len(df_complete_raw)} registros.")
+
+        # Tipos compactos (int16/float32/category) desde a coleta
+        logging.info(f"Memória (tipos padrão): {schema.memory_report(df_complete_raw)}")
+        with profiling.stage('apply_schema', rows=len(df_complete_raw)):
+            df_complete_raw = schema.apply_schema(df_complete_raw, schema.RAW_GAMELOG_DTYPES)
+        logging.info(f"Memória (schema compacto): {schema.memory_report(df_complete_raw)}")
+
+        # Salva a tabela Parquet, uma partição por temporada
+        logging.info(f"Salvando dados brutos em: {OUTPUT_RAW_PATH}")
+        with profiling.stage('write_raw', rows=len(df_complete_raw)):
+            storage.write_table(df_complete_raw, OUTPUT_RAW_PATH, partition_col='SEASON_ID')
+        logging.info("Dados brutos salvos com sucesso!")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
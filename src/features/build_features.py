@@ -2,18 +2,44 @@ import pandas as pd
 import numpy as np
 import os
 import logging
+import argparse
+from nba_stat_predictor import profiling, schema, storage
+from nba_stat_predictor.defense import DEFENSE_TABLE_FILE, DefenseTable
+from nba_stat_predictor.directory import PLAYER_DIRECTORY_FILE, build_player_directory
+from nba_stat_predictor.features import (lagged_rolling_means, latest_feature_rows, parse_matchups,
+                                         season_from_dates)
 
 # Configuração do logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Definição de caminhos
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-RAW_GAMELOG_PATH = os.path.join(BASE_DIR, 'data', 'raw', 'nba_player_gamelogs_raw.csv')
-RAW_DEFENSE_PATH = os.path.join(BASE_DIR, 'data', 'raw', 'nba_team_defense_stats_raw.csv')
+RAW_GAMELOG_PATH = os.path.join(BASE_DIR, 'data', 'raw', 'nba_player_gamelogs_raw.parquet')
+RAW_DEFENSE_PATH = os.path.join(BASE_DIR, 'data', 'raw', 'nba_team_defense_stats_raw.parquet')
 PROCESSED_DIR = os.path.join(BASE_DIR, 'data', 'processed')
-PROCESSED_FILE_PATH = os.path.join(PROCESSED_DIR, 'nba_player_gamelogs_processed.csv')
+PROCESSED_FILE_PATH = os.path.join(PROCESSED_DIR, 'nba_player_gamelogs_processed.parquet')
+# Estado por jogador (últimos jogos) usado pela atualização incremental
+FEATURE_STATE_PATH = os.path.join(PROCESSED_DIR, 'feature_state.parquet')
+# Último vetor de features de cada jogador (consultado pelo app e pelos serviços de predição)
+LATEST_FEATURES_PATH = os.path.join(PROCESSED_DIR, 'player_latest_features.parquet')
+# Nomes dos jogadores do dataset, já ordenados para o seletor do app
+PLAYER_DIRECTORY_PATH = os.path.join(PROCESSED_DIR, PLAYER_DIRECTORY_FILE)
+# Estatísticas de defesa indexadas por (temporada, time), usadas no build, no app e nos serviços
+DEFENSE_TABLE_PATH = os.path.join(PROCESSED_DIR, DEFENSE_TABLE_FILE)
+
+# Estatísticas e janelas das médias móveis (NB02, Célula 2f2d667b)
+STATS_COLS_MA = ['MIN', 'PTS', 'AST', 'REB', 'FG3M', 'FGM', 'FGA', 'FTM', 'FTA', 
+                 'OREB', 'DREB', 'TOV', 'PF', 'PLUS_MINUS', 'STL', 'BLK']
+MA_WINDOWS = [5, 10]
+
+COLUNAS_RELEVANTES = [
+    'Player_ID', 'Game_ID', 'GAME_DATE', 'MATCHUP', 'WL', 'MIN', 'PTS', 
+    'AST', 'REB', 'FG3M', 'FGM', 'FGA', 'FTM', 'FTA', 'OREB', 'DREB', 
+    'TOV', 'PF', 'PLUS_MINUS', 'STL', 'BLK' 
+]
 
 # Funções auxiliares (do Notebook 02)
+# Versões escalares; o pipeline usa as vetorizadas de nba_stat_predictor.features
 
 def get_season_from_date(date):
     """Extrai a temporada (ex: 2022-23) de um datetime."""
@@ -33,105 +59,51 @@ def extrair_adversario(matchup):
     return None
 
 
-def main():
-    logging.info("Iniciando o script de engenharia de features (build_features.py)...")
-
-    # Carregar dados brutos
-    try:
-        logging.info(f"Carregando dados brutos de {RAW_GAMELOG_PATH}")
-        df_raw = pd.read_csv(RAW_GAMELOG_PATH)
-        logging.info(f"Carregando dados de defesa de {RAW_DEFENSE_PATH}")
-        df_defense = pd.read_csv(RAW_DEFENSE_PATH)
-    except FileNotFoundError as e:
-        logging.error(f"Erro: Arquivo de dados brutos não encontrado. {e}")
-        logging.error("Execute 'make fetch_data' primeiro.")
-        return
-
-    # Limpeza e seleção Inicial (NB02, Células 66d7ac15, 954eb890) ---
-    logging.info("Iniciando limpeza inicial e primeira engenharia de features...")
-    df_raw['GAME_DATE'] = pd.to_datetime(df_raw['GAME_DATE'])
-    
-    colunas_relevantes = [
-        'Player_ID', 'Game_ID', 'GAME_DATE', 'MATCHUP', 'WL', 'MIN', 'PTS', 
-        'AST', 'REB', 'FG3M', 'FGM', 'FGA', 'FTM', 'FTA', 'OREB', 'DREB', 
-        'TOV', 'PF', 'PLUS_MINUS', 'STL', 'BLK' 
-    ]
-
-    colunas_relevantes_existentes = [col for col in colunas_relevantes if col in df_raw.columns]
+@profiling.timed()
+def clean_gamelogs(df_raw):
+    """Limpeza e seleção inicial (NB02, Células 66d7ac15, 954eb890)."""
+    colunas_relevantes_existentes = [col for col in COLUNAS_RELEVANTES if col in df_raw.columns]
     df_limpo = df_raw[colunas_relevantes_existentes].copy()
+    df_limpo['GAME_DATE'] = pd.to_datetime(df_limpo['GAME_DATE'], format='mixed')
 
-    df_limpo['OPPONENT'] = df_limpo['MATCHUP'].apply(extrair_adversario)
-    df_limpo['HOME'] = df_limpo['MATCHUP'].apply(lambda x: 1 if 'vs.' in x else 0)
-    
-    df_limpo = df_limpo.sort_values(by=['Player_ID', 'GAME_DATE'], ascending=[True, True])
+    # Oponente e mando extraídos uma vez por MATCHUP distinto (ver features.parse_matchups)
+    df_limpo['OPPONENT'], df_limpo['HOME'] = parse_matchups(df_limpo['MATCHUP'])
 
-    # Processamento e merge dos dados de defesa (NB02, Célula 8eb271da)
-    logging.info("Processando e fazendo merge dos dados de defesa...")
-    
-    # Lista mestra de times da NBA
-    nba_teams_abbr = [team for team in df_limpo['OPPONENT'].unique() if team is not None]
-    
-    # Mapa de nomes
-    team_name_map = {
-        'Atlanta Hawks': 'ATL', 'Boston Celtics': 'BOS', 'Brooklyn Nets': 'BKN',
-        'Charlotte Hornets': 'CHA', 'Chicago Bulls': 'CHI', 'Cleveland Cavaliers': 'CLE',
-        'Dallas Mavericks': 'DAL', 'Denver Nuggets': 'DEN', 'Detroit Pistons': 'DET',
-        'Golden State Warriors': 'GSW', 'Houston Rockets': 'HOU', 'Indiana Pacers': 'IND',
-        'LA Clippers': 'LAC', 'Los Angeles Lakers': 'LAL', 'Memphis Grizzlies': 'MEM',
-        'Miami Heat': 'MIA', 'Milwaukee Bucks': 'MIL', 'Minnesota Timberwolves': 'MIN',
-        'New Orleans Pelicans': 'NOP', 'New York Knicks': 'NYK', 'Oklahoma City Thunder': 'OKC',
-        'Orlando Magic': 'ORL', 'Philadelphia 76ers': 'PHI', 'Phoenix Suns': 'PHX',
-        'Portland Trail Blazers': 'POR', 'Sacramento Kings': 'SAC', 'San Antonio Spurs': 'SAS',
-        'Toronto Raptors': 'TOR', 'Utah Jazz': 'UTA', 'Washington Wizards': 'WAS'
-    }
-    
-    # Mapeia e Filtra o df_defense
-    team_col_defense = 'TEAM_NAME' if 'TEAM_NAME' in df_defense.columns else 'Team'
-    df_defense['TEAM_ABBR_Mapped'] = df_defense[team_col_defense].map(team_name_map)
-    df_defense = df_defense[df_defense['TEAM_ABBR_Mapped'].isin(nba_teams_abbr)].copy()
-    
-    # Renomeia colunas de defesa
-    cols_rename_defense = {
-        'TEAM_ABBR_Mapped': 'OPPONENT', 'PTS': 'OPP_PTS_PER_G', 'FG_PCT': 'OPP_FG_PCT',
-        'FG3_PCT': 'OPP_FG3_PCT', 'AST': 'OPP_AST_PER_G', 'REB': 'OPP_REB_PER_G',
-        'STL': 'OPP_STL_PER_G', 'BLK': 'OPP_BLK_PER_G'
-    }
-    cols_to_rename_existing = {k: v for k, v in cols_rename_defense.items() if k in df_defense.columns}
-    df_defense_renamed = df_defense.rename(columns=cols_to_rename_existing)
-    
-    
-    # Selecionar explicitamente as colunas finais para df_defense_final
-    colunas_defensivas_desejadas = list(cols_to_rename_existing.values()) 
-    colunas_para_manter = ['Season', 'OPPONENT'] + colunas_defensivas_desejadas
-    
-    # Filtra colunas que realmente existem em df_defense_renamed
-    colunas_para_manter_existentes = [col for col in colunas_para_manter if col in df_defense_renamed.columns]
-    
-    # Remove duplicatas da LISTA de colunas
-    colunas_para_manter_unicas = list(dict.fromkeys(colunas_para_manter_existentes)) 
+    # Tipos compactos (int16/int8/category) já na entrada do cálculo das features
+    df_limpo = schema.apply_schema(df_limpo)
+    return df_limpo.sort_values(by=['Player_ID', 'GAME_DATE'], ascending=[True, True])
 
-    df_defense_final = df_defense_renamed[colunas_para_manter_unicas]
-    
-    logging.info(f"Colunas de defesa selecionadas para merge: {colunas_para_manter_unicas}")
+@profiling.timed()
+def merge_defense(df_limpo, defense):
+    """Adiciona a temporada e as estatísticas defensivas do oponente a cada jogo.
+
+    As colunas OPP_ saem de um gather na tabela densa (ver nba_stat_predictor.defense)
+    pelos códigos de Season e OPPONENT, equivalente ao merge left por (Season, OPPONENT).
+    `defense` pode ser a DefenseTable ou as estatísticas brutas.
+    """
+    logging.info("Adicionando estatísticas de defesa do oponente...")
+    if not isinstance(defense, DefenseTable):
+        defense = DefenseTable.from_frame(defense)
 
     # Cria a chave 'Season' no df_limpo
-    df_limpo['Season'] = df_limpo['GAME_DATE'].apply(get_season_from_date)
-    
-    # Executa o Merge
-    df_merged = pd.merge(df_limpo, df_defense_final, on=['Season', 'OPPONENT'], how='left')
+    df_merged = df_limpo.reset_index(drop=True)
+    df_merged['Season'] = season_from_dates(df_merged['GAME_DATE'])
+
+    df_opp = defense.features_for(df_merged['Season'], df_merged['OPPONENT'])
+    df_merged = pd.concat([df_merged, df_opp], axis=1)
+    return schema.apply_schema(df_merged)
 
-    # Engenharia de Features Finais 
+@profiling.timed()
+def add_game_features(df_merged):
+    """Médias móveis, descanso e resultado do último jogo (linhas ordenadas por jogador e data)."""
     logging.info("Calculando médias móveis e features de descanso...")
     
     # Médias Móveis (NB02, Célula 2f2d667b)
-    stats_cols_ma = ['MIN', 'PTS', 'AST', 'REB', 'FG3M', 'FGM', 'FGA', 'FTM', 'FTA', 
-                     'OREB', 'DREB', 'TOV', 'PF', 'PLUS_MINUS', 'STL', 'BLK']
-    stats_cols_ma_existentes = [col for col in stats_cols_ma if col in df_merged.columns]
-    
-    grouped = df_merged.groupby('Player_ID')
-    for window in [5, 10]:
-        for col in stats_cols_ma_existentes:
-            df_merged[f'{col}_MA_{window}'] = grouped[col].shift(1).rolling(window, min_periods=1).mean()
+    # Todas as colunas e janelas em uma única passada, sem cruzar jogadores
+    stats_cols_ma_existentes = [col for col in STATS_COLS_MA if col in df_merged.columns]
+    df_medias_moveis = lagged_rolling_means(df_merged, 'Player_ID', stats_cols_ma_existentes, MA_WINDOWS,
+                                            dtype=np.float32)
+    df_merged = pd.concat([df_merged, df_medias_moveis], axis=1)
             
     # Trata NaNs das MAs
     cols_medias_moveis = [col for col in df_merged.columns if '_MA_' in col]
@@ -147,20 +119,245 @@ def main():
     df_merged['WIN_LAST_GAME'] = df_merged.groupby('Player_ID')['WIN'].shift(1)
     df_merged['WIN_LAST_GAME'] = df_merged['WIN_LAST_GAME'].fillna(0) # Preenche primeiro jogo com 0
 
-    # Limpeza final e salvamento
-    logging.info("Limpando colunas finais e salvando...")
-    
     # Remove colunas que não são features ou alvos (NB02, Célula 4d9b1f2e)
     cols_to_drop = ['MATCHUP', 'WL', 'WIN']
-    df_final_features = df_merged.drop(columns=cols_to_drop)
+    return schema.apply_schema(df_merged.drop(columns=cols_to_drop))
 
-    # Garante que o diretório de saída exista
-    os.makedirs(PROCESSED_DIR, exist_ok=True)
-    
-    # Salva o arquivo
-    df_final_features.to_csv(PROCESSED_FILE_PATH, index=False)
-    
-    logging.info(f"--- Script de features concluído! Dados salvos em {PROCESSED_FILE_PATH} ---")
+def build_features(df_raw, df_defense):
+    """Pipeline completo: game logs brutos + defesa -> tabela de features."""
+    logging.info("Iniciando limpeza inicial e primeira engenharia de features...")
+    df_merged = merge_defense(clean_gamelogs(df_raw), df_defense)
+    return add_game_features(df_merged)
+
+# Atualização incremental
+
+@profiling.timed()
+def build_state(df_games):
+    """Estado por jogador: os últimos max(MA_WINDOWS) jogos, só com as colunas necessárias.
+
+    É tudo o que add_game_features precisa do histórico para calcular as features
+    dos próximos jogos (janelas das médias móveis, data e resultado do último jogo).
+    """
+    state_cols = ['Player_ID', 'GAME_DATE', 'WL'] + [col for col in STATS_COLS_MA if col in df_games.columns]
+    df_games = df_games.sort_values(by=['Player_ID', 'GAME_DATE'], kind='stable')
+    df_state = df_games.groupby('Player_ID').tail(max(MA_WINDOWS))[state_cols].reset_index(drop=True)
+    return schema.apply_schema(df_state)
+
+def select_new_games(df_raw, state):
+    """Linhas brutas de jogos posteriores ao último jogo de cada jogador no estado."""
+    last_dates = state.groupby('Player_ID')['GAME_DATE'].max()
+    game_dates = pd.to_datetime(df_raw['GAME_DATE'], format='mixed')
+    last_known = df_raw['Player_ID'].map(last_dates)
+    return df_raw[last_known.isna() | (game_dates > last_known)]
+
+@profiling.timed()
+def update_features(df_new_raw, df_defense, state):
+    """Calcula as features apenas dos jogos novos, a partir do estado por jogador.
+
+    O resultado é idêntico às linhas correspondentes de um build_features completo.
+
+    Returns:
+        (df_new_features, new_state)
+    """
+    df_new = merge_defense(clean_gamelogs(df_new_raw), df_defense)
+    if df_new.empty:
+        return add_game_features(df_new), state
+
+    # Junta o histórico compacto (estado) aos jogos novos e recalcula só esse trecho
+    df_state = state[state['Player_ID'].isin(df_new['Player_ID'])].assign(_IS_STATE=True)
+    df_combined = pd.concat([df_state, df_new.assign(_IS_STATE=False)], ignore_index=True)
+    df_combined = df_combined.sort_values(by=['Player_ID', 'GAME_DATE'], kind='stable')
+    df_combined = df_combined.reset_index(drop=True)[list(df_new.columns) + ['_IS_STATE']]
+
+    df_features = add_game_features(df_combined)
+    df_new_features = df_features[~df_features.pop('_IS_STATE')].reset_index(drop=True)
+    df_new_features = schema.apply_schema(df_new_features)
+
+    new_state = build_state(pd.concat([state, df_new[state.columns]], ignore_index=True))
+    return df_new_features, new_state
+
+def update_latest_features(df_latest, df_new_features):
+    """Substitui a linha mais recente dos jogadores que tiveram jogos novos."""
+    df_new_latest = latest_feature_rows(df_new_features)
+    df_latest = df_latest[~df_latest.index.isin(df_new_latest.index)]
+    # Blocos vazios ficam fora do concat (o pandas deixará de ignorá-los ao decidir os dtypes)
+    blocos = [df for df in (df_latest, df_new_latest[df_latest.columns]) if not df.empty]
+    if not blocos:
+        return df_latest
+    return schema.apply_schema(pd.concat(blocos).sort_index())
+
+def save_latest_features(df_latest):
+    """Grava o último vetor de cada jogador e o diretório de jogadores lido pelo app."""
+    storage.write_table(df_latest.reset_index(), LATEST_FEATURES_PATH)
+    storage.write_table(build_player_directory(df_latest.index), PLAYER_DIRECTORY_PATH)
+
+def load_latest_features():
+    return storage.read_table(LATEST_FEATURES_PATH).set_index('Player_ID')
+
+@profiling.timed()
+def load_defense_table():
+    """Monta a tabela densa de defesa a partir dos dados brutos e a salva para o app e os serviços."""
+    defense = DefenseTable.from_frame(storage.read_table(RAW_DEFENSE_PATH))
+    defense.save(DEFENSE_TABLE_PATH)
+    logging.info(f"Tabela de defesa: {len(defense.seasons)} temporadas x {len(defense.teams)} times, "
+                 f"colunas {defense.columns} (salva em {DEFENSE_TABLE_PATH})")
+    return defense
+
+@profiling.timed()
+def load_raw_gamelogs(partitions=None):
+    """Carrega apenas as colunas relevantes dos game logs brutos."""
+    logging.info(f"Carregando dados brutos de {RAW_GAMELOG_PATH}")
+    colunas_raw = storage.table_columns(RAW_GAMELOG_PATH)
+    colunas_relevantes_existentes = [col for col in COLUNAS_RELEVANTES if col in colunas_raw]
+    return storage.read_table(RAW_GAMELOG_PATH, columns=colunas_relevantes_existentes,
+                              partitions=partitions)
+
+@profiling.timed()
+def run_incremental(df_defense):
+    """Anexa à tabela processada as features dos jogos novos. Retorna False sem estado salvo."""
+    if not all(storage.table_exists(path) for path in
+               (FEATURE_STATE_PATH, PROCESSED_FILE_PATH, LATEST_FEATURES_PATH)):
+        logging.warning("Estado de features não encontrado; executando o build completo.")
+        return False
+
+    state = storage.read_table(FEATURE_STATE_PATH)
+
+    # Só as temporadas a partir da última data conhecida podem ter jogos novos
+    first_season = get_season_from_date(state['GAME_DATE'].max())
+    partitions = [p for p in storage.table_partitions(RAW_GAMELOG_PATH) if p[1:] >= first_season[:4]]
+    df_new_raw = select_new_games(load_raw_gamelogs(partitions), state)
+    logging.info(f"Modo incremental: {len(df_new_raw)} jogos novos "
+                 f"(estado de {state['Player_ID'].nunique()} jogadores).")
+    if df_new_raw.empty:
+        return True
+
+    df_new_features, new_state = update_features(df_new_raw, df_defense, state)
+    storage.append_table(df_new_features, PROCESSED_FILE_PATH, partition_col='Season')
+    storage.write_table(new_state, FEATURE_STATE_PATH)
+    save_latest_features(update_latest_features(load_latest_features(), df_new_features))
+    logging.info(f"--- {len(df_new_features)} linhas anexadas em {PROCESSED_FILE_PATH} ---")
+    return True
+
+# Build em blocos (uma temporada por vez)
+
+def stream_features(raw_chunks, df_defense):
+    """Features de blocos de game logs brutos em ordem cronológica, um bloco por vez.
+
+    O primeiro bloco é processado por completo; os seguintes passam por
+    update_features com o estado por jogador (últimos max(MA_WINDOWS) jogos)
+    acumulado até ali, então o resultado é idêntico ao build_features de tudo.
+    Cada bloco deve ter apenas jogos posteriores aos dos blocos anteriores.
+
+    Yields:
+        (df_features, state) de cada bloco, com o estado já incluindo o bloco.
+    """
+    state = None
+    for df_raw in raw_chunks:
+        if state is None:
+            df_limpo = clean_gamelogs(df_raw)
+            df_features = add_game_features(merge_defense(df_limpo, df_defense))
+            state = build_state(df_limpo)
+        else:
+            df_features, state = update_features(df_raw, df_defense, state)
+        yield df_features, state
+
+def raw_partitions_in_order():
+    """Partições (SEASON_ID) dos game logs brutos em ordem cronológica.
+
+    O SEASON_ID é o tipo de temporada seguido do ano ('22023' = temporada
+    regular 2023-24), então a ordem é pelo ano e, no mesmo ano, pelo tipo.
+    """
+    return sorted(storage.table_partitions(RAW_GAMELOG_PATH), key=lambda p: (p[1:], p))
+
+def run_streaming(df_defense):
+    """Build completo lendo, processando e gravando uma temporada por vez.
+
+    Em memória ficam só a temporada atual, o estado por jogador e a última
+    linha de cada jogador, independente do tamanho do histórico. Retorna False
+    se os dados brutos não forem particionados por temporada.
+    """
+    partitions = raw_partitions_in_order()
+    if not partitions:
+        logging.warning("Dados brutos sem partições por temporada; executando o build em memória.")
+        return False
+
+    resultado = {}
+
+    def blocos_de_features():
+        raw_chunks = (load_raw_gamelogs([partition]) for partition in partitions)
+        blocos = stream_features(raw_chunks, df_defense)
+        df_latest = None
+        for partition in partitions:
+            # A gravação do bloco acontece fora da etapa, no write_table_chunks
+            with profiling.stage(f'partition={partition}') as etapa:
+                df_features, state = next(blocos)
+                if df_latest is None:
+                    df_latest = latest_feature_rows(df_features)
+                else:
+                    df_latest = update_latest_features(df_latest, df_features)
+                etapa.rows = len(df_features)
+            resultado.update(state=state, latest=df_latest)
+            logging.info(f"Partição {partition}: {len(df_features)} linhas "
+                         f"({schema.memory_report(df_features)})")
+            yield df_features
+
+    logging.info(f"Build em blocos: {len(partitions)} partições de {RAW_GAMELOG_PATH}")
+    with profiling.stage('stream_partitions') as etapa:
+        n_rows = storage.write_table_chunks(blocos_de_features(), PROCESSED_FILE_PATH, partition_col='Season')
+        etapa.rows = n_rows
+    with profiling.stage('write_state_and_latest'):
+        storage.write_table(resultado['state'], FEATURE_STATE_PATH)
+        save_latest_features(resultado['latest'])
+    logging.info(f"--- {n_rows} linhas gravadas em {PROCESSED_FILE_PATH} ---")
+    return True
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Limpa os dados brutos e cria as features.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Calcula apenas as features dos jogos novos, a partir do estado salvo.")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Carrega todo o histórico de uma vez em vez de processar uma temporada por vez.")
+    parser.add_argument("--profile", metavar="ETAPA",
+                        help="Roda a etapa indicada sob cProfile (ver nba_stat_predictor/profiling.py).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling.run('build_features', profile=args.profile):
+        logging.info("Iniciando o script de engenharia de features (build_features.py)...")
+
+        # Carregar dados brutos (apenas as colunas relevantes)
+        try:
+            logging.info(f"Carregando dados de defesa de {RAW_DEFENSE_PATH}")
+            df_defense = load_defense_table()
+            if args.incremental and run_incremental(df_defense):
+                return
+            if not args.in_memory and run_streaming(df_defense):
+                return
+            df_raw = load_raw_gamelogs()
+            logging.info(f"Memória (game logs brutos): {schema.memory_report(df_raw)}")
+        except FileNotFoundError as e:
+            logging.error(f"Erro: Arquivo de dados brutos não encontrado. {e}")
+            logging.error("Execute 'make fetch_data' primeiro.")
+            return
+
+        # Limpeza uma única vez: serve às features e ao estado por jogador
+        with profiling.stage('build_features', rows=len(df_raw)):
+            df_limpo = clean_gamelogs(df_raw)
+            df_final_features = add_game_features(merge_defense(df_limpo, df_defense))
+        logging.info(f"Memória (tabela de features): {schema.memory_report(df_final_features)}")
+
+        # Limpeza final e salvamento
+        logging.info("Salvando features e estado por jogador...")
+
+        # Salva a tabela Parquet, uma partição por temporada
+        with profiling.stage('write_processed', rows=len(df_final_features)):
+            storage.write_table(df_final_features, PROCESSED_FILE_PATH, partition_col='Season')
+        storage.write_table(build_state(df_limpo), FEATURE_STATE_PATH)
+        with profiling.stage('write_latest'):
+            save_latest_features(latest_feature_rows(df_final_features))
+
+        logging.info(f"--- Script de features concluído! Dados salvos em {PROCESSED_FILE_PATH} ---")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
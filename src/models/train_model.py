@@ -3,117 +3,172 @@
 # A ideia aqui é carregar os dados de data/processed, treinar esses modelos e salvar os
 # artefatos finais (arquivo .joblib na pasta models)
 # alem disso, aqui da pra treinar com 100% dos dados
+# O pré-processamento roda uma vez e os modelos de MODEL_SPECS são treinados em
+# paralelo (ver nba_stat_predictor/modeling/train.py)
+# Por padrão a matriz de treino é a compacta (código do oponente em vez do one-hot,
+# float32); --encoding onehot volta à matriz densa do ColumnTransformer
+# Com --incremental, só as linhas anexadas desde o último treino são lidas: o Ridge é
+# atualizado pelas estatísticas suficientes salvas e a floresta ganha árvores novas
+# (ver nba_stat_predictor/modeling/retrain.py); cai para o treino completo quando a
+# política de retreino exige
 
 
-import pandas as pd
-import numpy as np
-import joblib
-import os
+import argparse
 import logging
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.linear_model import Ridge
-from sklearn.ensemble import RandomForestClassifier
+from nba_stat_predictor import profiling, schema, storage
+from nba_stat_predictor.features import get_feature_columns
+from nba_stat_predictor.modeling import evaluate, retrain, train
+from nba_stat_predictor.modeling.compiled import CompiledPredictor
 
 # Configuração do Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # dados
-PROCESSED_DATA_PATH = 'data/processed/nba_player_gamelogs_processed.csv'
+PROCESSED_DATA_PATH = 'data/processed/nba_player_gamelogs_processed.parquet'
 MODEL_OUTPUT_DIR = 'models'
 
-def main():
-    os.makedirs(MODEL_OUTPUT_DIR, exist_ok=True)
-
-    # Carregamento e preparação dos dados
-    try:
-        logging.info(f"Carregando dados processados de {PROCESSED_DATA_PATH}")
-        df = pd.read_csv(PROCESSED_DATA_PATH, parse_dates=['GAME_DATE'])
-        
-        if 'STL' not in df.columns or 'BLK' not in df.columns:
-            logging.error("Erro: 'STL' ou 'BLK' não encontradas no arquivo processado.")
-            logging.error("Certifique-se que 'build_features.py' foi executado corretamente.")
-            exit()
-            
-        logging.info("Dados processados carregados com sucesso.")
-
-    except FileNotFoundError:
-        logging.error(f"ERRO: Arquivo de dados processados não encontrado em {PROCESSED_DATA_PATH}.")
-        logging.error("Por favor, execute 'make process_data' primeiro.")
-        exit()
-    except Exception as e:
-        logging.error(f"Erro ao carregar dados: {e}")
-        exit()
-
-    # Definição das features e targets
-    logging.info("Definindo features e alvos...")
-
-    target_cols_regressao = ['PTS', 'AST', 'REB', 'FG3M']
-    y_reg = df[target_cols_regressao]
-
-    df['PTS_10'] = (df['PTS'] >= 10).astype(int)
-    df['REB_10'] = (df['REB'] >= 10).astype(int)
-    df['AST_10'] = (df['AST'] >= 10).astype(int)
-    df['STL_10'] = (df['STL'] >= 10).astype(int)
-    df['BLK_10'] = (df['BLK'] >= 10).astype(int)
-    df['DD_Categories'] = df[['PTS_10', 'REB_10', 'AST_10', 'STL_10', 'BLK_10']].sum(axis=1)
-    y_class = (df['DD_Categories'] >= 2).astype(int)
-
-    # FEATURES (X)
-    feature_cols = [
-        'MIN', 'HOME', 'DAYS_REST', 'IS_B2B', 'WIN_LAST_GAME',
-        'OPPONENT',
-    ] + [col for col in df.columns if '_MA_' in col]
-
-    opp_cols = [col for col in df.columns if col.startswith('OPP_')]
-    feature_cols.extend(opp_cols)
-    feature_cols = list(dict.fromkeys(feature_cols)) 
-
-    X = df[feature_cols]
-
-    logging.info(f"Features selecionadas: {len(feature_cols)} colunas")
-
-    # Definição e Fit do Pré-processador
-    logging.info("Definindo e treinando o pré-processador (OneHotEncoder)...")
-    categorical_features = ['OPPONENT']
-
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_features)
-        ],
-        remainder='passthrough'
-    )
-
-    X_processed = preprocessor.fit_transform(X)
-    logging.info(f"Dados processados. Novo formato de X: {X_processed.shape}")
-
-    # Treinamento dos modelos escolhidos
-    logging.info("Treinando modelo de Regressão (Ridge)...")
-    reg_model = Ridge(alpha=1.0)
-    reg_model.fit(X_processed, y_reg)
-    logging.info("Modelo Ridge treinado.")
-
-    logging.info("Treinando modelo de Classificação (RandomForestClassifier)...")
-    clf_model = RandomForestClassifier(
-        n_estimators=100,
-        random_state=42,
-        n_jobs=-1,
-        class_weight='balanced',
-        max_depth=15,
-        min_samples_leaf=5
-    )
-    clf_model.fit(X_processed, y_class)
-    logging.info("Modelo RandomForestClassifier treinado.")
-
-    # Serialização dos Artefatos
+# Modelos treinados (nome do artefato, estimador, alvos). Para treinar mais alvos,
+# acrescente specs aqui, ex.: train.ModelSpec('clf_model_pts20', RandomForestClassifier(...), 'PTS_GE_20')
+MODEL_SPECS = train.DEFAULT_SPECS
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Treina os modelos e salva os artefatos em models/.")
+    parser.add_argument("--workers", type=int, default=-1,
+                        help="Processos de treino em paralelo (-1 = todos os núcleos).")
+    parser.add_argument("--tuned", nargs="?", const=str(evaluate.REPORT_PATH), default=None,
+                        metavar="RELATORIO",
+                        help="Usa os melhores parâmetros do relatório de avaliação (make evaluate).")
+    parser.add_argument("--encoding", choices=train.ENCODINGS, default=train.DEFAULT_ENCODING,
+                        help="Codificação da matriz de treino (ver nba_stat_predictor/modeling/encoding.py).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Atualiza os modelos salvos só com as linhas novas da tabela processada.")
+    parser.add_argument("--profile", metavar="ETAPA",
+                        help="Roda a etapa indicada sob cProfile (ver nba_stat_predictor/profiling.py).")
+    return parser.parse_args(argv)
+
+def salvar_modelos(preprocessor, fitted, specs, feature_cols, extra):
+    """Grava os artefatos, o manifest e o artefato de inferência compilado."""
     logging.info(f"Salvando artefatos em {MODEL_OUTPUT_DIR}...")
+    with profiling.stage('save_artifacts'):
+        manifest_path = train.save_artifacts(MODEL_OUTPUT_DIR, preprocessor, fitted, specs, feature_cols,
+                                             extra=extra)
+    logging.info(f"Manifest salvo em {manifest_path}")
+
+    # Artefato de inferência (one-hot como tabela de índices, pesos do Ridge e nós da
+    # floresta em .npy), aberto em memmap pelo app, pela predição em lote e pelo serviço
+    with profiling.stage('compile_bundle'):
+        bundle_path = CompiledPredictor.from_models(
+            preprocessor, fitted['reg_model_ridge'][0], fitted['clf_model_rf'][0], train.REG_TARGETS
+        ).save(MODEL_OUTPUT_DIR)
+    logging.info(f"Artefato de inferência compilado salvo em {bundle_path}/")
+
+def treino_incremental(specs, feature_cols):
+    """Tenta atualizar os modelos salvos; retorna False quando é preciso um treino completo."""
+    with profiling.stage('incremental_update') as etapa:
+        resultado = retrain.update(MODEL_OUTPUT_DIR, PROCESSED_DATA_PATH, specs, feature_cols)
+        etapa.rows = resultado.n_new_rows
+    if resultado.status == 'up_to_date':
+        logging.info("Nenhuma linha nova desde o último treino; modelos mantidos.")
+        return True
+    if resultado.status == 'full_refit':
+        logging.info(f"Treino completo necessário: {resultado.reason}.")
+        return False
+
+    for name, (estimator, seconds) in resultado.fitted.items():
+        extra = f", {len(estimator.estimators_)} árvores" if hasattr(estimator, 'estimators_') else ""
+        logging.info(f"Modelo {name} ({type(estimator).__name__}) atualizado em {seconds:.1f}s{extra}.")
+    logging.info(f"Modo incremental: {resultado.n_new_rows} linhas novas "
+                 f"(atualização {resultado.record['incremental']['updates']} desde o último treino completo).")
+    salvar_modelos(resultado.preprocessor, resultado.fitted, specs, feature_cols, resultado.record)
+    logging.info("--- Script de treinamento concluído com sucesso! ---")
+    return True
+
+def main(argv=None):
+    args = parse_args(argv)
+    with profiling.run('train_model', profile=args.profile):
+        specs = MODEL_SPECS
+        if args.tuned:
+            # Só parâmetros avaliados na mesma codificação do treino
+            try:
+                specs = evaluate.tuned_specs(MODEL_SPECS, evaluate.load_report(args.tuned),
+                                             encoding=args.encoding)
+            except ValueError as e:
+                logging.error(f"Erro: {e}")
+                exit()
+            logging.info(f"Parâmetros ajustados carregados de {args.tuned}")
+        target_cols = train.required_targets(specs)
+        if args.incremental and args.encoding != 'compact':
+            logging.warning("O modo incremental usa a codificação compacta; fazendo o treino completo.")
+        elif args.incremental and storage.table_exists(PROCESSED_DATA_PATH):
+            feature_cols = get_feature_columns(storage.table_columns(PROCESSED_DATA_PATH))
+            if treino_incremental(specs, feature_cols):
+                return
+
+        # Carregamento e preparação dos dados (apenas as colunas usadas no treino)
+        try:
+            logging.info(f"Carregando dados processados de {PROCESSED_DATA_PATH}")
+            colunas_processadas = storage.table_columns(PROCESSED_DATA_PATH)
+
+            colunas_alvo = train.target_source_columns(target_cols)
+            colunas_faltando = [col for col in colunas_alvo if col not in colunas_processadas]
+            if colunas_faltando:
+                logging.error(f"Erro: colunas dos alvos não encontradas no arquivo processado: {colunas_faltando}")
+                logging.error("Certifique-se que 'build_features.py' foi executado corretamente.")
+                exit()
+
+            feature_cols = get_feature_columns(colunas_processadas)
+            # GAME_DATE: início da janela recente do modo incremental
+            colunas_usadas = list(dict.fromkeys(feature_cols + colunas_alvo + ['GAME_DATE']))
+            with profiling.stage('load_data') as etapa:
+                # Arquivos lidos neste treino: o modo incremental parte deles
+                arquivos = storage.table_files(PROCESSED_DATA_PATH)
+                df = storage.read_table(PROCESSED_DATA_PATH, columns=colunas_usadas, files=arquivos)
+                etapa.rows = len(df)
+
+            logging.info("Dados processados carregados com sucesso.")
+            logging.info(f"Memória (dados de treino): {schema.memory_report(df)}")
+
+        except FileNotFoundError:
+            logging.error(f"ERRO: Arquivo de dados processados não encontrado em {PROCESSED_DATA_PATH}.")
+            logging.error("Por favor, execute 'make process_data' primeiro.")
+            exit()
+        except Exception as e:
+            logging.error(f"Erro ao carregar dados: {e}")
+            exit()
 
-    joblib.dump(preprocessor, os.path.join(MODEL_OUTPUT_DIR, 'preprocessor.joblib'))
-    joblib.dump(reg_model, os.path.join(MODEL_OUTPUT_DIR, 'reg_model_ridge.joblib'))
-    joblib.dump(clf_model, os.path.join(MODEL_OUTPUT_DIR, 'clf_model_rf.joblib'))
+        # Definição das features e targets
+        logging.info("Definindo features e alvos...")
+        with profiling.stage('build_targets', rows=len(df)):
+            targets = train.build_targets(df, target_cols)
 
-    logging.info("--- Script de treinamento concluído com sucesso! ---")
+        # FEATURES (X), na ordem definida em nba_stat_predictor.features
+        X = df[feature_cols]
+        logging.info(f"Features selecionadas: {len(feature_cols)} colunas; alvos: {target_cols}")
+
+        # Pré-processamento, feito uma única vez para todos os modelos
+        logging.info(f"Definindo e treinando o pré-processador (codificação {args.encoding})...")
+        with profiling.stage('fit_preprocessor', rows=len(X)):
+            preprocessor, X_processed = train.fit_preprocessor(X, encoding=args.encoding)
+        datas = df['GAME_DATE'].to_numpy()
+        del df, X
+        logging.info(f"Dados processados. Novo formato de X: {X_processed.shape} "
+                     f"({X_processed.dtype}, {X_processed.nbytes / 1024 ** 2:.1f} MB)")
+        encoder = preprocessor if args.encoding == 'compact' else None
+
+        # Treinamento dos modelos em paralelo sobre a mesma matriz
+        logging.info(f"Treinando {len(specs)} modelos ({args.workers} workers)...")
+        with profiling.stage('fit_models', rows=len(X_processed)):
+            fitted = train.fit_models(X_processed, targets, specs, n_jobs=args.workers,
+                                      encoder=encoder)
+        for name, (estimator, seconds) in fitted.items():
+            logging.info(f"Modelo {name} ({type(estimator).__name__}) treinado em {seconds:.1f}s.")
+
+        # Serialização dos Artefatos (com os arquivos lidos, ponto de partida do modo incremental)
+        salvar_modelos(preprocessor, fitted, specs, feature_cols,
+                       retrain.training_record(arquivos, specs, targets, datas))
+
+        logging.info("--- Script de treinamento concluído com sucesso! ---")
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,50 @@
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import OneHotEncoder
+
+from nba_stat_predictor import profiling, synthetic
+from nba_stat_predictor.features import get_feature_columns, latest_feature_rows
+from nba_stat_predictor.modeling import predict
+from nba_stat_predictor.modeling.compiled import CompiledPredictor
+from src.features import build_features as bf
+
+
+@pytest.fixture(autouse=True)
+def run_report_dir(tmp_path, monkeypatch):
+    """Relatórios de execução dos scripts (profiling.run) vão para o tmp_path do teste."""
+    monkeypatch.setattr(profiling, 'RUN_REPORT_DIR', tmp_path / 'runs')
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    return tmp_path / 'runs'
+
+
+@pytest.fixture(scope='session')
+def df_features():
+    raw = synthetic.make_gamelogs(n_players=12, games_per_season=15, seed=3)
+    return bf.build_features(raw, synthetic.make_defense_stats())
+
+
+@pytest.fixture(scope='session')
+def models(df_features):
+    X = df_features[get_feature_columns(df_features.columns)]
+    preprocessor = ColumnTransformer(
+        transformers=[('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False),
+                       ['OPPONENT'])],
+        remainder='passthrough')
+    X_processed = preprocessor.fit_transform(X)
+    reg_model = Ridge(alpha=1.0).fit(X_processed, df_features[predict.REG_TARGETS])
+    y_class = (df_features['PTS'] >= 15).astype(int)
+    clf_model = RandomForestClassifier(n_estimators=10, random_state=42, max_depth=5)
+    clf_model.fit(X_processed, y_class)
+    return preprocessor, reg_model, clf_model
+
+
+@pytest.fixture(scope='session')
+def df_latest(df_features):
+    return latest_feature_rows(df_features)
+
+
+@pytest.fixture(scope='session')
+def predictor(models):
+    return CompiledPredictor.from_models(*models)
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from benchmarks import suite
+
+
+def test_compare_normalizes_by_calibration():
+    baseline = {'calibration_s': 0.1, 'cases': {'ingest': {'seconds': 1.0}, 'train': {'seconds': 2.0}}}
+    results = {'ingest': {'seconds': 3.0, 'rows': 10}, 'train': {'seconds': 7.0, 'rows': 10},
+               'predict_batch': {'seconds': 1.0, 'rows': 10}}
+
+    # Máquina 2x mais lenta (calibração dobrou): ingest 1.5x, train 1.75x o baseline
+    rows = {row['case']: row for row in suite.compare(results, 0.2, baseline, tolerance=0.6)}
+    assert rows['ingest']['ratio'] == pytest.approx(1.5)
+    assert rows['ingest']['status'] == 'ok'
+    assert rows['train']['status'] == 'regression'
+    assert rows['predict_batch']['status'] == 'new'
+
+
+def test_suite_fails_on_regression(tmp_path, capsys):
+    args = ['--players', '4', '--seasons', '2', '--games', '12', '--repeat', '1', '--slate', '50',
+            '--baseline', str(tmp_path / 'baseline.json')]
+    assert suite.main(args + ['--update-baseline']) == 0
+    baseline = json.loads((tmp_path / 'baseline.json').read_text())
+    cases = baseline['scales']['4x2x12']['cases']
+    assert set(cases) == {'ingest', 'build_features', 'train', 'predict_single', 'predict_batch'}
+
+    # Um baseline 1000x mais rápido faz a suíte falhar
+    for case in cases.values():
+        case['seconds'] /= 1000
+    (tmp_path / 'baseline.json').write_text(json.dumps(baseline))
+    assert suite.main(args) == 1
+    assert 'FALHA' in capsys.readouterr().err
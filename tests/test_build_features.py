@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from nba_stat_predictor import schema, storage, synthetic
+from src.features import build_features as bf
+
+
+@pytest.fixture
+def raw():
+    return synthetic.make_gamelogs(n_players=15, games_per_season=20, seed=7)
+
+
+@pytest.fixture
+def defense():
+    return synthetic.make_defense_stats()
+
+
+def canonical(df):
+    # pd.concat de categorias diferentes vira object; o schema normaliza os tipos
+    return schema.apply_schema(df.sort_values(['Player_ID', 'GAME_DATE']).reset_index(drop=True))
+
+
+def test_build_features_output(raw, defense):
+    df = bf.build_features(raw, defense)
+    assert len(df) == len(raw)
+    assert {'PTS_MA_5', 'PTS_MA_10', 'DAYS_REST', 'IS_B2B', 'WIN_LAST_GAME',
+            'OPP_PTS_PER_G', 'Season', 'OPPONENT', 'HOME'} <= set(df.columns)
+    assert not {'MATCHUP', 'WL', 'WIN'} & set(df.columns)
+    first_games = canonical(df).groupby('Player_ID').head(1)
+    assert (first_games['PTS_MA_5'] == 0).all()
+    assert (first_games['DAYS_REST'] == 7).all()
+
+
+@pytest.mark.parametrize('split_date', ['2023-01-15', '2024-10-20', '2024-12-01'])
+def test_incremental_update_matches_full_rebuild(raw, defense, split_date):
+    game_dates = pd.to_datetime(raw['GAME_DATE'], format='mixed')
+    # Um jogador só aparece nos jogos novos, para cobrir o caso sem estado
+    history = raw[(game_dates < split_date) & (raw['Player_ID'] != raw['Player_ID'].max())]
+
+    state = bf.build_state(bf.clean_gamelogs(history))
+    assert state.groupby('Player_ID').size().max() <= max(bf.MA_WINDOWS)
+
+    df_new_raw = bf.select_new_games(raw, state)
+    assert len(df_new_raw) == len(raw) - len(history)
+    df_new_features, new_state = bf.update_features(df_new_raw, defense, state)
+
+    full = bf.build_features(raw, defense)
+    incremental = pd.concat([bf.build_features(history, defense), df_new_features])
+    pd.testing.assert_frame_equal(canonical(incremental), canonical(full))
+    pd.testing.assert_frame_equal(new_state, bf.build_state(bf.clean_gamelogs(raw)))
+
+
+def test_latest_features_incremental_update(raw, defense):
+    game_dates = pd.to_datetime(raw['GAME_DATE'], format='mixed')
+    history = raw[game_dates < '2024-12-01']
+    state = bf.build_state(bf.clean_gamelogs(history))
+    df_new_features, _ = bf.update_features(bf.select_new_games(raw, state), defense, state)
+
+    latest = bf.update_latest_features(
+        bf.latest_feature_rows(bf.build_features(history, defense)), df_new_features)
+    expected = bf.latest_feature_rows(bf.build_features(raw, defense))
+    pd.testing.assert_frame_equal(latest, expected)
+    assert latest.index.is_unique and latest.columns[0] == 'MIN'
+
+
+@pytest.mark.filterwarnings('error::FutureWarning')
+def test_streaming_build_matches_in_memory(tmp_path, monkeypatch, raw, defense):
+    raw_path, defense_path = tmp_path / 'raw.parquet', tmp_path / 'defense.parquet'
+    storage.write_table(raw, raw_path, partition_col='SEASON_ID')
+    storage.write_table(defense, defense_path)
+    monkeypatch.setattr(bf, 'RAW_GAMELOG_PATH', str(raw_path))
+    monkeypatch.setattr(bf, 'RAW_DEFENSE_PATH', str(defense_path))
+    monkeypatch.setattr(bf, 'DEFENSE_TABLE_PATH', str(tmp_path / 'defense_table.npz'))
+
+    outputs = {}
+    for mode, argv in (('streaming', []), ('in_memory', ['--in-memory'])):
+        out = tmp_path / mode
+        monkeypatch.setattr(bf, 'PROCESSED_FILE_PATH', str(out / 'processed.parquet'))
+        monkeypatch.setattr(bf, 'FEATURE_STATE_PATH', str(out / 'state.parquet'))
+        monkeypatch.setattr(bf, 'LATEST_FEATURES_PATH', str(out / 'latest.parquet'))
+        monkeypatch.setattr(bf, 'PLAYER_DIRECTORY_PATH', str(out / 'players.parquet'))
+        bf.main(argv)
+        outputs[mode] = [storage.read_table(out / name)
+                         for name in ('processed.parquet', 'state.parquet', 'latest.parquet')]
+
+    assert storage.table_partitions(tmp_path / 'streaming' / 'processed.parquet') == \
+        storage.table_partitions(tmp_path / 'in_memory' / 'processed.parquet')
+    (processed, state, latest), expected = outputs['streaming'], outputs['in_memory']
+    pd.testing.assert_frame_equal(canonical(processed), canonical(expected[0]))
+    pd.testing.assert_frame_equal(state, expected[1])
+    pd.testing.assert_frame_equal(latest, expected[2])
+    directory = storage.read_table(tmp_path / 'streaming' / 'players.parquet')
+    assert sorted(directory['Player_ID']) == sorted(latest['Player_ID'])
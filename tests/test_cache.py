@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pytest
+
+from nba_stat_predictor import storage
+from nba_stat_predictor.modeling.cache import PredictionCache, prediction_key, version_of
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get_many(['a', 'c']) == [1, 3]
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions']) == (2, 1)
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (3, 1, 0.75)
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_seconds=10, clock=clock)
+    cache.put('a', 1)
+    clock.now = 9.9
+    assert cache.get('a') == 1
+    clock.now = 10.0
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.stats()['expirations'] == 1
+
+
+def test_version_change_invalidates_entries():
+    cache = PredictionCache()
+    assert not cache.sync_versions('d1', 'm1')
+    key = prediction_key(1600000, 'BOS', 1, 'd1', 'm1')
+    cache.put(key, np.ones(5))
+    assert not cache.sync_versions('d1', 'm1')
+    assert cache.get(key) is not None
+
+    assert cache.sync_versions('d1', 'm2')
+    assert cache.get(key) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_version_changes_when_table_or_model_is_published(tmp_path, df_latest):
+    table, model = tmp_path / 'latest.parquet', tmp_path / 'models' / 'manifest.json'
+    model.parent.mkdir()
+    missing = version_of(table)
+    storage.write_table(df_latest.reset_index(), table)
+    model.write_text('{"run_id": "a"}')
+    data_version, model_version = version_of(table), version_of(model.parent)
+    assert data_version != missing
+    assert version_of(table) == data_version and version_of(model.parent) == model_version
+
+    # Mesma tabela regravada: diretório novo, versão nova
+    storage.write_table(df_latest.reset_index(), table)
+    assert version_of(table) != data_version
+    model.write_text('{"run_id": "b"}')
+    os.utime(model, ns=(0, 0))
+    assert version_of(model.parent) != model_version
+
+
+def test_rejects_empty_cache():
+    with pytest.raises(ValueError):
+        PredictionCache(max_entries=0)
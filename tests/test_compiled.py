@@ -0,0 +1,128 @@
+import json
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from nba_stat_predictor import synthetic
+from nba_stat_predictor.modeling import compiled, forest
+
+
+@pytest.fixture
+def X(df_features, models):
+    preprocessor = models[0]
+    # Acima de forest.BATCH_ROWS: cobre o caminho NumPy e o das árvores do scikit-learn
+    X = df_features[list(preprocessor.feature_names_in_)].iloc[:300].copy()
+    # Inclui oponentes fora do treino: o OneHotEncoder os ignora (linha de zeros)
+    X['OPPONENT'] = np.random.default_rng(1).choice(synthetic.TEAM_ABBRS + ['XXX'], len(X))
+    return X
+
+
+def reference(X, models):
+    preprocessor, reg_model, clf_model = models
+    X_processed = preprocessor.transform(X)
+    return reg_model.predict(X_processed), clf_model.predict_proba(X_processed)[:, 1]
+
+
+@pytest.mark.parametrize('n_rows', [1, 7, 60, 300])
+def test_predictions_are_bit_identical(X, models, predictor, n_rows):
+    X = X.iloc[:n_rows]
+    reg_expected, dd_expected = reference(X, models)
+    out = predictor.predict_frame(X)
+    np.testing.assert_array_equal(out[:, :4], reg_expected)
+    np.testing.assert_array_equal(out[:, 4], dd_expected)
+
+
+def test_design_matrix_matches_column_transformer(X, models, predictor):
+    numeric = X[predictor.numeric_cols].to_numpy(dtype=np.float64)
+    codes = predictor.encode_opponents(X['OPPONENT'].to_numpy())
+    np.testing.assert_array_equal(predictor.design_matrix(numeric, codes), models[0].transform(X))
+    assert (codes[X['OPPONENT'].to_numpy() == 'XXX'] == -1).all()
+
+
+def test_predict_dict(X, predictor):
+    row = X.iloc[3]
+    np.testing.assert_array_equal(predictor.predict_dict(row.to_dict()),
+                                  predictor.predict_frame(X.iloc[[3]])[0])
+
+
+@pytest.mark.parametrize('n_rows', [7, 300])
+def test_save_and_load(tmp_path, X, models, predictor, n_rows):
+    X = X.iloc[:n_rows]
+    predictor.save(tmp_path)
+    loaded = compiled.load_compiled(tmp_path)
+    # Arrays abertos do disco (memmap), sem as árvores do scikit-learn
+    assert isinstance(loaded.weights.base, np.memmap)
+    assert isinstance(loaded.forest.children.base, np.memmap)
+    assert loaded.forest._trees is None
+    np.testing.assert_array_equal(loaded.predict_frame(X), predictor.predict_frame(X))
+    np.testing.assert_array_equal(loaded.predict_frame(X), np.column_stack(reference(X, models)))
+    # Lotes grandes remontam as árvores só durante a chamada
+    assert loaded.forest._trees is None
+
+
+def test_load_rejects_stale_or_corrupted_artifact(tmp_path, X, predictor):
+    (tmp_path / compiled.MANIFEST_FILE).write_text(json.dumps({'run_id': 'run-1'}))
+    (tmp_path / compiled.PREPROCESSOR_FILE).write_bytes(b'v1')
+    compiled_dir = predictor.save(tmp_path)
+    manifest = json.loads((compiled_dir / compiled.COMPILED_MANIFEST).read_text())
+    assert manifest['run_id'] == 'run-1' and manifest['format_version'] == compiled.FORMAT_VERSION
+    compiled.load_compiled(tmp_path)
+
+    # Pré-processador de outro treino ao lado do artefato
+    (tmp_path / compiled.PREPROCESSOR_FILE).write_bytes(b'v2')
+    with pytest.raises(ValueError, match='desatualizado'):
+        compiled.load_compiled(tmp_path)
+    (tmp_path / compiled.PREPROCESSOR_FILE).write_bytes(b'v1')
+    (tmp_path / compiled.MANIFEST_FILE).write_text(json.dumps({'run_id': 'run-2'}))
+    with pytest.raises(ValueError, match='desatualizado'):
+        compiled.load_compiled(tmp_path)
+    (tmp_path / compiled.MANIFEST_FILE).write_text(json.dumps({'run_id': 'run-1'}))
+
+    threshold = np.load(compiled_dir / 'threshold.npy')
+    threshold[0] += 1.0
+    np.save(compiled_dir / 'threshold.npy', threshold)
+    with pytest.raises(ValueError, match='corrompido'):
+        compiled.load_compiled(tmp_path)
+
+    manifest['format_version'] = compiled.FORMAT_VERSION + 1
+    (compiled_dir / compiled.COMPILED_MANIFEST).write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match='formato'):
+        compiled.load_compiled(tmp_path)
+
+
+def test_forest_arrays_route_missing_values_like_sklearn():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5)).astype(np.float32)
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    X[rng.random(X.shape) < 0.2] = np.nan
+    clf = RandomForestClassifier(n_estimators=8, max_depth=6, random_state=0).fit(X, y)
+    expected = np.zeros((len(X), 2))
+    for tree in clf.estimators_:
+        expected += tree.predict_proba(X)
+    expected = expected[:, 1] / len(clf.estimators_)
+
+    flat = forest.ForestArrays.from_forest(clf)
+    rebuilt = forest.ForestArrays.from_arrays(flat.arrays(), flat.metadata())
+    for arrays in (flat, rebuilt):
+        np.testing.assert_array_equal(arrays.predict_positive(X[:50]), expected[:50])
+        np.testing.assert_array_equal(arrays.predict_positive(X), expected)
+
+
+def test_forest_arrays_reject_leaf_counts():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(200, 3))
+    clf = RandomForestClassifier(n_estimators=2, max_depth=3, random_state=0).fit(X, X[:, 0] > 0)
+    # Antes do scikit-learn 1.4, tree_.value guardava contagens em vez de frações
+    clf.estimators_[1].tree_.value[:] *= 10
+    with pytest.raises(ValueError, match='scikit-learn>=1.4'):
+        forest.ForestArrays.from_forest(clf)
+
+
+def test_load_compiles_from_separate_artifacts(tmp_path, X, models, predictor):
+    for name, obj in zip(['preprocessor', 'reg_model_ridge', 'clf_model_rf'], models):
+        joblib.dump(obj, tmp_path / f'{name}.joblib')
+    loaded = compiled.load_compiled(tmp_path)
+    assert not (tmp_path / compiled.COMPILED_DIR).exists()
+    np.testing.assert_array_equal(loaded.predict_frame(X), predictor.predict_frame(X))
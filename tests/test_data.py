@@ -1,5 +1,53 @@
-import pytest
+import numpy as np
+import pandas as pd
 
+from nba_stat_predictor import schema, synthetic
+from nba_stat_predictor.defense import TEAM_NAME_MAP, DefenseTable
 
-def test_code_is_tested():
-    assert False
+
+def test_gamelogs_match_api_schema_and_scale():
+    seasons = synthetic.season_labels(2)
+    df = synthetic.make_gamelogs(n_players=7, seasons=seasons, games_per_season=11)
+
+    assert seasons == ['2023-24', '2024-25']
+    assert list(df.columns) == synthetic.GAMELOG_COLUMNS
+    assert len(df) == 7 * 2 * 11
+    assert df.groupby('Player_ID').size().eq(22).all()
+    assert set(df['SEASON_ID']) == {'22023', '22024'}
+    # Datas no formato da API ('OCT 20, 2024'), crescentes e distintas por jogador
+    dates = pd.to_datetime(df['GAME_DATE'], format='%b %d, %Y')
+    assert dates.groupby(df['Player_ID']).apply(lambda d: d.is_monotonic_increasing and d.is_unique).all()
+    assert df['MATCHUP'].str.fullmatch(r'[A-Z]{3} (vs\.|@) [A-Z]{3}').all()
+    assert set(df['WL']) <= {'W', 'L'}
+    # Os dados brutos passam pelo mesmo schema aplicado pelo make_dataset.py
+    typed = schema.apply_schema(df, schema.RAW_GAMELOG_DTYPES)
+    assert len(typed) == len(df)
+
+
+def test_gamelog_box_scores_are_consistent():
+    df = synthetic.make_gamelogs(n_players=20, games_per_season=30, seed=3)
+    assert (df['PTS'] == 2 * df['FGM'] + df['FG3M'] + df['FTM']).all()
+    assert (df['REB'] == df['OREB'] + df['DREB']).all()
+    assert (df['FGM'] <= df['FGA']).all() and (df['FG3M'] <= df['FG3A']).all()
+    assert (df['FG3A'] <= df['FGA']).all() and (df['FTM'] <= df['FTA']).all()
+    assert df['MIN'].between(0, 48).all()
+    assert df['FG_PCT'].between(0, 1).all()
+    opponents = df['MATCHUP'].str[-3:]
+    assert (opponents != df['MATCHUP'].str[:3]).all()
+
+
+def test_gamelogs_are_deterministic_per_seed():
+    a = synthetic.make_gamelogs(n_players=5, games_per_season=10, seed=1)
+    pd.testing.assert_frame_equal(a, synthetic.make_gamelogs(n_players=5, games_per_season=10, seed=1))
+    assert not a.equals(synthetic.make_gamelogs(n_players=5, games_per_season=10, seed=2))
+
+
+def test_defense_stats_cover_every_team_and_season():
+    df = synthetic.make_defense_stats(seed=4)
+    assert list(df.columns) == synthetic.DEFENSE_COLUMNS + ['Season']
+    assert len(df) == len(synthetic.TEAM_ABBRS) * len(synthetic.DEFAULT_SEASONS)
+    assert set(df['TEAM_NAME']) <= set(TEAM_NAME_MAP)
+
+    table = DefenseTable.from_frame(df)
+    assert table.seasons == list(synthetic.DEFAULT_SEASONS)
+    assert not np.isnan(table.values).any()
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nba_stat_predictor import synthetic
+from nba_stat_predictor.defense import DEFENSE_COLUMNS, TEAM_NAME_MAP, DefenseTable
+from nba_stat_predictor.modeling import predict
+from src.features import build_features as bf
+
+
+@pytest.fixture(scope='module')
+def df_defense():
+    return synthetic.make_defense_stats()
+
+
+@pytest.fixture(scope='module')
+def defense(df_defense):
+    return DefenseTable.from_frame(df_defense)
+
+
+def merge_reference(df_limpo, df_defense):
+    """Merge por strings (Season, OPPONENT) que a tabela densa substitui."""
+    df_defense = df_defense.assign(OPPONENT=df_defense['TEAM_NAME'].map(TEAM_NAME_MAP))
+    df_defense = df_defense.rename(columns=DEFENSE_COLUMNS)[['Season', 'OPPONENT', *DEFENSE_COLUMNS.values()]]
+    df_limpo = df_limpo.assign(Season=df_limpo['GAME_DATE'].apply(bf.get_season_from_date))
+    return pd.merge(df_limpo.astype({'OPPONENT': str}), df_defense, on=['Season', 'OPPONENT'], how='left')
+
+
+def test_gather_matches_string_merge(df_defense):
+    raw = synthetic.make_gamelogs(n_players=10, games_per_season=20, seed=1)
+    df_limpo = bf.clean_gamelogs(raw)
+    # Um oponente sem estatísticas de defesa vira NaN, como no merge left
+    df_limpo['OPPONENT'] = df_limpo['OPPONENT'].cat.add_categories('XXX')
+    df_limpo.iloc[:3, df_limpo.columns.get_loc('OPPONENT')] = 'XXX'
+
+    merged = bf.merge_defense(df_limpo, df_defense)
+    expected = merge_reference(df_limpo, df_defense)
+    opp_cols = list(DEFENSE_COLUMNS.values())
+    assert [col for col in merged.columns if col.startswith('OPP_')] == opp_cols
+    np.testing.assert_array_equal(merged[opp_cols].to_numpy(),
+                                  expected[opp_cols].to_numpy(dtype=np.float32))
+    assert merged[opp_cols].iloc[:3].isna().all().all()
+    assert merged['Season'].astype(str).tolist() == expected['Season'].tolist()
+
+
+def test_lookup_and_roundtrip(tmp_path, defense, df_defense):
+    row = df_defense[(df_defense['Season'] == '2024-25') & (df_defense['TEAM_NAME'] == 'Boston Celtics')]
+    stats = defense.lookup('BOS')
+    assert defense.latest_season == '2024-25'
+    assert stats['OPP_PTS_PER_G'] == pytest.approx(row['PTS'].iloc[0])
+    assert defense.lookup('BOS', '2023-24') != stats
+    assert defense.lookup('XXX') is None and defense.lookup('BOS', '1999-00') is None
+
+    loaded = DefenseTable.load(defense.save(tmp_path / 'defense_table.npz'))
+    np.testing.assert_array_equal(loaded.values, defense.values)
+    assert (loaded.seasons, loaded.teams, loaded.columns) == (defense.seasons, defense.teams,
+                                                              defense.columns)
+
+
+def test_feature_frame_uses_selected_opponent(df_latest, defense):
+    player_id = df_latest.index[0]
+    slate = pd.DataFrame({'PLAYER_ID': [player_id, player_id, player_id],
+                          'OPPONENT': ['BOS', 'MIA', 'XXX'], 'HOME': [1, 0, 1]})
+    X, found = predict.build_feature_frame(slate, df_latest, defense)
+    assert found.all()
+    opp_cols = defense.columns
+    for i, team in enumerate(['BOS', 'MIA']):
+        np.testing.assert_array_equal(X.loc[i, opp_cols].to_numpy(dtype=np.float32),
+                                      np.array(list(defense.lookup(team).values()), dtype=np.float32))
+    # Oponente fora da tabela mantém as estatísticas do último jogo
+    np.testing.assert_array_equal(X.loc[2, opp_cols].to_numpy(dtype=np.float32),
+                                  df_latest.loc[player_id, opp_cols].to_numpy(dtype=np.float32))
+    assert list(X.columns) == list(df_latest.columns)
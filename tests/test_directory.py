@@ -0,0 +1,17 @@
+from nba_stat_predictor.directory import DIRECTORY_COLUMNS, build_player_directory, static_player_names
+
+
+def test_directory_sorted_by_name_with_id_fallback():
+    names = {3: 'Zach Test', 1: 'Aaron Test', 2: 'Aaron Test'}
+    directory = build_player_directory([3, 1, 2, 1_600_000], names=names)
+
+    assert list(directory.columns) == DIRECTORY_COLUMNS
+    assert directory['Player_ID'].tolist() == [1_600_000, 1, 2, 3]
+    assert directory['LABEL'].tolist() == ['1600000 (1600000)', 'Aaron Test (1)', 'Aaron Test (2)',
+                                           'Zach Test (3)']
+
+
+def test_static_names_come_from_nba_api():
+    names = static_player_names()
+    assert names[2544] == 'LeBron James'
+    assert build_player_directory([2544])['PLAYER_NAME'].tolist() == ['LeBron James']
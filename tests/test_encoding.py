@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+
+from nba_stat_predictor import synthetic
+from nba_stat_predictor.features import get_feature_columns
+from nba_stat_predictor.modeling import compiled, encoding, train
+
+
+@pytest.fixture(scope='module')
+def compact(df_features):
+    X = df_features[get_feature_columns(df_features.columns)]
+    onehot_preprocessor, X_onehot = train.fit_preprocessor(X, encoding='onehot')
+    encoder, X_compact = train.fit_preprocessor(X, encoding='compact')
+    return X, onehot_preprocessor, X_onehot, encoder, X_compact
+
+
+def test_compact_matrix_expands_to_column_transformer(compact):
+    X, onehot_preprocessor, X_onehot, encoder, X_compact = compact
+    assert X_compact.dtype == np.float32 and X_compact.shape[1] == len(encoder.numeric_cols_) + 1
+    np.testing.assert_array_equal(encoder.categories_, onehot_preprocessor.transformers_[0][1].categories_[0])
+    np.testing.assert_array_equal(encoding.onehot_matrix(X_compact, encoder.n_categories), X_onehot)
+
+    # Oponente fora do treino: código -1 e linha de zeros no one-hot, como no OneHotEncoder
+    X_new = X.iloc[:5].copy()
+    X_new['OPPONENT'] = X_new['OPPONENT'].cat.add_categories(['XXX'])
+    X_new.iloc[0, X_new.columns.get_loc('OPPONENT')] = 'XXX'
+    codes = encoder.transform(X_new)[:, 0]
+    assert codes[0] == -1 and (codes[1:] >= 0).all()
+    np.testing.assert_array_equal(encoding.onehot_matrix(encoder.transform(X_new), encoder.n_categories),
+                                  onehot_preprocessor.transform(X_new))
+
+
+@pytest.mark.parametrize('alpha, fit_intercept, n_targets', [
+    (1.0, True, 4), (np.array([0.5, 1.0, 2.0, 4.0]), True, 4), (10.0, False, 1),
+])
+def test_ridge_normal_equations_match_cholesky(compact, df_features, alpha, fit_intercept, n_targets):
+    _, _, X_onehot, encoder, X_compact = compact
+    y = df_features[train.REG_TARGETS[:n_targets]].to_numpy(dtype=np.float64)
+    y = y.ravel() if n_targets == 1 else y
+
+    expected = Ridge(alpha=alpha, fit_intercept=fit_intercept, solver='cholesky').fit(X_onehot, y)
+    # Blocos pequenos para passar pela acumulação em mais de um bloco
+    ridge = encoding.fit_ridge_normal_equations(Ridge(alpha=alpha, fit_intercept=fit_intercept),
+                                                X_compact, y, encoder.n_categories, chunk_rows=97)
+    assert ridge.coef_.shape == expected.coef_.shape
+    np.testing.assert_allclose(ridge.predict(X_onehot), expected.predict(X_onehot), rtol=0, atol=1e-8)
+    np.testing.assert_allclose(ridge.intercept_, expected.intercept_, rtol=0, atol=1e-6)
+
+
+def test_ridge_normal_equations_with_unseen_opponent(compact, df_features):
+    _, _, _, encoder, X_compact = compact
+    y = df_features[train.REG_TARGETS].to_numpy(dtype=np.float64)
+    # Oponentes fora do treino (código -1), como nas linhas novas de um retreino incremental
+    X_new = X_compact.copy()
+    X_new[::7, 0] = -1
+    X_onehot = encoding.onehot_matrix(X_new, encoder.n_categories)
+
+    expected = Ridge(alpha=1.0, solver='cholesky').fit(X_onehot, y)
+    ridge = encoding.fit_ridge_normal_equations(Ridge(alpha=1.0), X_new, y, encoder.n_categories,
+                                                chunk_rows=97)
+    np.testing.assert_allclose(ridge.predict(X_onehot), expected.predict(X_onehot), rtol=0, atol=1e-8)
+
+    half = len(X_new) // 2
+    merged = encoding.NormalEquations.from_matrix(X_new[:half], y[:half], encoder.n_categories).merge(
+        encoding.NormalEquations.from_matrix(X_new[half:], y[half:], encoder.n_categories))
+    np.testing.assert_allclose(merged.xx, ridge.normal_equations_.xx, rtol=0, atol=1e-6)
+
+
+def test_fit_modes():
+    assert encoding.compact_fit_mode(RandomForestClassifier()) == 'ordinal'
+    assert encoding.compact_fit_mode(Ridge()) == 'normal_equations'
+    assert encoding.compact_fit_mode(Ridge(solver='sag')) == 'onehot'
+    assert encoding.compact_fit_mode(Lasso()) == 'onehot'
+
+
+def test_compact_training_compiles_to_identical_predictions(compact, df_features):
+    X, _, _, encoder, X_compact = compact
+    specs = train.DEFAULT_SPECS[:1] + (
+        train.ModelSpec('clf_model_rf', RandomForestClassifier(n_estimators=5, random_state=0, max_depth=4),
+                        'DOUBLE_DOUBLE'),
+        train.ModelSpec('reg_model_ols', LinearRegression(), 'PTS'),
+    )
+    targets = train.build_targets(df_features, train.required_targets(specs))
+    fitted = train.fit_models(X_compact, targets, specs, n_jobs=1, encoder=encoder)
+    reg_model, clf_model = fitted['reg_model_ridge'][0], fitted['clf_model_rf'][0]
+    assert clf_model.n_features_in_ == X_compact.shape[1]
+    assert fitted['reg_model_ols'][0].n_features_in_ == reg_model.n_features_in_
+
+    predictor = compiled.CompiledPredictor.from_models(encoder, reg_model, clf_model)
+    assert predictor.forest_encoding == 'ordinal'
+    X_new = X.iloc[:40].copy()
+    X_new['OPPONENT'] = np.random.default_rng(2).choice(synthetic.TEAM_ABBRS + ['XXX'], len(X_new))
+    X_new_compact = encoder.transform(X_new)
+    out = predictor.predict_frame(X_new)
+    np.testing.assert_array_equal(
+        out[:, :4], reg_model.predict(encoding.onehot_matrix(X_new_compact, encoder.n_categories)))
+    np.testing.assert_array_equal(out[:, 4], clf_model.predict_proba(X_new_compact)[:, 1])
@@ -0,0 +1,131 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import Ridge
+import typer
+
+from nba_stat_predictor.features import get_feature_columns
+from nba_stat_predictor.modeling import evaluate, train
+
+SPACES = (
+    evaluate.SearchSpace('reg_model_ridge', Ridge(), tuple(train.REG_TARGETS),
+                         {'alpha': [0.1, 10.0, 1e6]}),
+    evaluate.SearchSpace('clf_model_rf', RandomForestClassifier(n_estimators=5, random_state=0),
+                         'PTS_GE_15', {'max_depth': [3, -1]}),
+)
+
+
+@pytest.fixture(scope='module')
+def df_sorted(df_features):
+    return df_features.sort_values('GAME_DATE', kind='stable').reset_index(drop=True)
+
+
+def test_walk_forward_splits_never_leak():
+    dates = pd.Series(pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-03',
+                                      '2024-01-04', '2024-01-04', '2024-01-05', '2024-01-06']))
+    folds = evaluate.walk_forward_splits(dates, n_splits=2, min_train_fraction=0.5)
+    assert len(folds) == 2
+    for fold in folds:
+        assert dates[fold.train_idx].max() < dates[fold.val_idx].min()
+    # Jogos da mesma data ficam juntos e os blocos de validação são consecutivos
+    assert folds[0].val_idx.tolist() == [4, 5]
+    assert folds[1].val_idx.tolist() == [6, 7]
+    assert folds[1].train_idx.tolist() == list(range(6))
+    with pytest.raises(ValueError):
+        evaluate.walk_forward_splits(dates, n_splits=10)
+
+
+def test_fold_matrices_are_cached(tmp_path, df_sorted):
+    X = df_sorted[get_feature_columns(df_sorted.columns)]
+    folds = evaluate.walk_forward_splits(df_sorted['GAME_DATE'], n_splits=2)
+    first = evaluate.prepare_fold_matrices(X, folds, tmp_path)
+    files = sorted(tmp_path.rglob('*.npy'))
+    assert len(files) == 4
+    mtimes = [f.stat().st_mtime_ns for f in files]
+
+    second = evaluate.prepare_fold_matrices(X, folds, tmp_path)
+    assert [f.stat().st_mtime_ns for f in sorted(tmp_path.rglob('*.npy'))] == mtimes
+    for (a_train, a_val, a_cats), (b_train, b_val, b_cats), fold in zip(first, second, folds):
+        assert isinstance(b_train, np.memmap)
+        assert a_train.shape[0] == len(fold.train_idx) and a_val.shape[0] == len(fold.val_idx)
+        np.testing.assert_array_equal(a_val, b_val)
+        # Codificação padrão (compacta): código do oponente + numéricas, em float32
+        assert b_train.dtype == np.float32 and a_cats == b_cats == int(b_train[:, 0].max()) + 1
+
+    # Outra codificação não reaproveita as matrizes da compacta e substitui a chave antiga
+    onehot = evaluate.prepare_fold_matrices(X, folds, tmp_path, encoding='onehot')
+    assert len(list(tmp_path.iterdir())) == 1
+    assert len(list(tmp_path.rglob('*.npy'))) == 4
+    assert onehot[0][0].shape[1] == first[0][0].shape[1] - 1 + first[0][2] and onehot[0][2] is None
+
+
+def test_main_rejects_unknown_encoding(tmp_path):
+    with pytest.raises(typer.BadParameter, match='onehot, compact'):
+        evaluate.main(tmp_path / 'missing.parquet', tmp_path / 'report.json', encoding='ordinal')
+
+
+def test_parallel_search_matches_sequential(tmp_path, df_sorted):
+    sequential = evaluate.evaluate(df_sorted, SPACES, n_splits=2, n_jobs=1, prune=False,
+                                   cache_dir=tmp_path)
+    parallel = evaluate.evaluate(df_sorted, SPACES, n_splits=2, n_jobs=2, prune=False,
+                                 cache_dir=tmp_path)
+    for name in ('reg_model_ridge', 'clf_model_rf'):
+        seq, par = sequential['models'][name], parallel['models'][name]
+        assert [c['metrics'] for c in seq['candidates'] if 'metrics' in c] == \
+               [c['metrics'] for c in par['candidates'] if 'metrics' in c]
+        assert seq['best_params'] == par['best_params']
+
+
+def test_search_prunes_and_reports(tmp_path, df_sorted):
+    report = evaluate.evaluate(df_sorted, SPACES, n_splits=3, n_jobs=1, cache_dir=tmp_path)
+    ridge = report['models']['reg_model_ridge']
+    statuses = {c['params']['alpha']: c['status'] for c in ridge['candidates']}
+    # alpha enorme prevê praticamente a média: não passa do baseline e é descartado cedo
+    assert statuses[1e6] in ('below_baseline', 'pruned')
+    assert next(c for c in ridge['candidates'] if c['params']['alpha'] == 1e6)['folds_evaluated'] < 3
+    assert ridge['best_params']['alpha'] in (0.1, 10.0)
+    assert set(ridge['best_metrics']) == set(train.REG_TARGETS)
+    assert set(ridge['best_metrics']['PTS']) == {'mae', 'rmse', 'r2'}
+
+    rf = report['models']['clf_model_rf']
+    failed = next(c for c in rf['candidates'] if c['params']['max_depth'] == -1)
+    assert failed['status'] == 'failed' and 'error' in failed
+    assert rf['best_params'] == {'max_depth': 3}
+    assert set(rf['best_metrics']['PTS_GE_15']) == {'roc_auc', 'log_loss', 'brier', 'accuracy'}
+    assert len(report['folds']) == 3
+
+    path = evaluate.save_report(report, tmp_path / 'evaluation.json')
+    assert json.loads(path.read_text())['models']['clf_model_rf']['best_params'] == {'max_depth': 3}
+
+
+def test_tuned_specs_apply_best_params():
+    report = {'encoding': 'compact',
+              'models': {'reg_model_ridge': {'best_params': {'alpha': 10.0}},
+                         'clf_model_rf': {'best_params': None}}}
+    tuned = evaluate.tuned_specs(train.DEFAULT_SPECS, report)
+    assert tuned[0].estimator.alpha == 10.0
+    assert train.DEFAULT_SPECS[0].estimator.alpha == 1.0
+    assert tuned[1].estimator is train.DEFAULT_SPECS[1].estimator
+
+    # Parâmetros avaliados em outra codificação não são aplicados
+    with pytest.raises(ValueError, match='make evaluate'):
+        evaluate.tuned_specs(train.DEFAULT_SPECS, {**report, 'encoding': 'onehot'})
+    with pytest.raises(ValueError):
+        evaluate.tuned_specs(train.DEFAULT_SPECS, {'models': report['models']})
+    assert evaluate.tuned_specs(train.DEFAULT_SPECS, {**report, 'encoding': 'onehot'},
+                                encoding='onehot')[0].estimator.alpha == 10.0
+
+
+def test_compact_search_matches_onehot(tmp_path, df_sorted):
+    # Na compacta o Ridge é treinado como no fit_models (equações normais): mesmas métricas
+    reports = {encoding: evaluate.evaluate(df_sorted, SPACES[:1], n_splits=2, n_jobs=1, prune=False,
+                                           cache_dir=tmp_path, encoding=encoding)
+               for encoding in ('compact', 'onehot')}
+    assert [reports[e]['encoding'] for e in reports] == ['compact', 'onehot']
+    compact, onehot = (reports[e]['models']['reg_model_ridge']['candidates'] for e in reports)
+    for candidate, expected in zip(compact, onehot):
+        for target, metrics in expected['metrics'].items():
+            assert candidate['metrics'][target]['mae'] == pytest.approx(metrics['mae'], rel=1e-6)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nba_stat_predictor import synthetic
+from nba_stat_predictor.features import lagged_rolling_means, parse_matchups, season_from_dates
+from src.features.build_features import extrair_adversario, get_season_from_date
+
+
+def naive_lagged_rolling_means(df, group_col, cols, windows):
+    """Implementação de referência: um rolling do pandas por jogador, coluna e janela."""
+    result = {}
+    for window in windows:
+        for col in cols:
+            result[f'{col}_MA_{window}'] = df.groupby(group_col)[col].transform(
+                lambda s: s.shift(1).rolling(window, min_periods=1).mean()
+            )
+    return pd.DataFrame(result, index=df.index)
+
+
+@pytest.fixture
+def gamelogs():
+    df = synthetic.make_gamelogs(n_players=12, games_per_season=15, seed=3)
+    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'], format='%b %d, %Y')
+    return df.sort_values(['Player_ID', 'GAME_DATE']).reset_index(drop=True)
+
+
+def test_matches_naive_per_player_rolling(gamelogs):
+    cols = ['MIN', 'PTS', 'AST', 'REB', 'PLUS_MINUS']
+    windows = [1, 3, 5, 10, 50]
+    expected = naive_lagged_rolling_means(gamelogs, 'Player_ID', cols, windows)
+    result = lagged_rolling_means(gamelogs, 'Player_ID', cols, windows)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_never_crosses_player_boundaries(gamelogs):
+    result = lagged_rolling_means(gamelogs, 'Player_ID', ['PTS'], [5])
+    first_games = ~gamelogs['Player_ID'].duplicated()
+    assert result.loc[first_games, 'PTS_MA_5'].isna().all()
+    assert result.loc[~first_games, 'PTS_MA_5'].notna().all()
+
+
+def test_handles_nans_and_unsorted_groups(gamelogs):
+    gamelogs.loc[gamelogs.sample(frac=0.1, random_state=0).index, 'PTS'] = np.nan
+    shuffled = gamelogs.sample(frac=1.0, random_state=1).sort_values('GAME_DATE', kind='stable')
+    expected = naive_lagged_rolling_means(shuffled, 'Player_ID', ['PTS'], [3, 10])
+    result = lagged_rolling_means(shuffled, 'Player_ID', ['PTS'], [3, 10])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('as_category', [False, True])
+def test_parse_matchups_matches_row_by_row(gamelogs, as_category):
+    matchups = pd.concat([gamelogs['MATCHUP'],
+                          pd.Series(['LAL vs.  BOS ', 'PHX @ DEN', 'sem separador'])],
+                         ignore_index=True)
+    if as_category:
+        matchups = matchups.astype('category')
+
+    opponent, home = parse_matchups(matchups)
+    expected_opp = matchups.astype(str).apply(extrair_adversario)
+    assert opponent.astype(object).where(opponent.notna(), None).tolist() == expected_opp.tolist()
+    assert home.tolist() == matchups.astype(str).apply(lambda x: 1 if 'vs.' in x else 0).tolist()
+    assert home.dtype == 'int8' and opponent.index.equals(matchups.index)
+
+
+def test_season_from_dates_matches_row_by_row(gamelogs):
+    dates = pd.concat([gamelogs['GAME_DATE'],
+                       pd.Series(pd.to_datetime(['2023-09-30', '2023-10-01', '1999-12-31']))],
+                      ignore_index=True)
+    seasons = season_from_dates(dates)
+    assert seasons.astype(str).tolist() == dates.apply(get_season_from_date).tolist()
+    assert list(seasons.cat.categories) == sorted(seasons.unique())
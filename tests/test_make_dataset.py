@@ -0,0 +1,302 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from nba_api.stats.library.http import NBAStatsHTTP
+import pandas as pd
+import pytest
+
+from nba_stat_predictor import schema, storage, synthetic
+from src.data import make_dataset
+
+
+class StubPlayerGameLog:
+    """Substituto local do endpoint PlayerGameLog da nba_api."""
+
+    calls = []
+    failures = {}
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def __init__(self, player_id, season, timeout=30, **kwargs):
+        cls = type(self)
+        with cls.lock:
+            cls.calls.append((player_id, season, time.monotonic()))
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            time.sleep(0.01)
+            with cls.lock:
+                remaining = cls.failures.get((player_id, season), 0)
+                if remaining:
+                    cls.failures[(player_id, season)] = remaining - 1
+                    raise ConnectionError("HTTP 429")
+        finally:
+            with cls.lock:
+                cls.active -= 1
+        self.player_id = player_id
+        self.season = season
+
+    def get_data_frames(self):
+        if self.player_id % 2:
+            return [pd.DataFrame()]
+        return [pd.DataFrame({"Player_ID": [self.player_id], "SEASON_ID": [self.season]})]
+
+    @classmethod
+    def reset(cls, failures=None):
+        cls.calls = []
+        cls.failures = dict(failures or {})
+        cls.active = 0
+        cls.max_active = 0
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(make_dataset, "backoff_delay", lambda attempt: 0)
+
+
+def test_token_bucket_respects_rate():
+    now = [0.0]
+    bucket = make_dataset.TokenBucket(rate=2, clock=lambda: now[0],
+                                      sleep=lambda s: now.__setitem__(0, now[0] + s))
+    for _ in range(5):
+        bucket.acquire()
+    # 1 token inicial + 4 tokens repostos a 2/s
+    assert now[0] == pytest.approx(2.0)
+
+
+def test_fetch_all_gamelogs_keeps_order_and_skips_empty():
+    StubPlayerGameLog.reset()
+    dfs = make_dataset.fetch_all_gamelogs(
+        [1, 2, 3, 4], ["2022-23", "2023-24"], max_workers=4, requests_per_second=1000,
+        endpoint=StubPlayerGameLog,
+    )
+    assert [(df["Player_ID"][0], df["SEASON_ID"][0]) for df in dfs] == [
+        (2, "2022-23"), (4, "2022-23"), (2, "2023-24"), (4, "2023-24"),
+    ]
+    assert len(StubPlayerGameLog.calls) == 8
+    assert StubPlayerGameLog.max_active <= 4
+
+
+def test_fetch_all_gamelogs_never_exceeds_rate():
+    StubPlayerGameLog.reset()
+    rate = 50
+    make_dataset.fetch_all_gamelogs(list(range(20)), ["2023-24"], max_workers=8,
+                                    requests_per_second=rate, endpoint=StubPlayerGameLog)
+    times = sorted(t for _, _, t in StubPlayerGameLog.calls)
+    elapsed = times[-1] - times[0]
+    # capacity=1: no máximo 1 + rate * t requisições em t segundos
+    assert len(times) <= 1 + rate * elapsed + 1
+
+
+def test_retries_transient_errors():
+    StubPlayerGameLog.reset(failures={(2, "2023-24"): 2, (4, "2023-24"): 5})
+    dfs = make_dataset.fetch_all_gamelogs([2, 4], ["2023-24"], max_workers=2,
+                                          requests_per_second=1000, max_retries=3,
+                                          endpoint=StubPlayerGameLog)
+    assert [df["Player_ID"][0] for df in dfs] == [2]
+    assert sum(1 for pid, _, _ in StubPlayerGameLog.calls if pid == 2) == 3
+    assert sum(1 for pid, _, _ in StubPlayerGameLog.calls if pid == 4) == 4
+
+
+def test_cache_resumes_interrupted_run(tmp_path):
+    cache = make_dataset.ResponseCache(tmp_path)
+    StubPlayerGameLog.reset(failures={(4, "2023-24"): 10})
+    make_dataset.fetch_all_gamelogs([1, 2, 4], ["2023-24"], requests_per_second=1000,
+                                    max_retries=0, endpoint=StubPlayerGameLog, cache=cache)
+    # 1 (vazio) e 2 ficaram no cache; 4 falhou e não foi gravado
+    assert cache.get(1, "2023-24", "StubPlayerGameLog").empty
+    assert cache.get(4, "2023-24", "StubPlayerGameLog") is None
+
+    StubPlayerGameLog.reset()
+    dfs = make_dataset.fetch_all_gamelogs([1, 2, 4], ["2023-24"], requests_per_second=1000,
+                                          endpoint=StubPlayerGameLog, cache=cache)
+    assert [pid for pid, _, _ in StubPlayerGameLog.calls] == [4]
+    assert [df["Player_ID"][0] for df in dfs] == [2, 4]
+
+
+def age_cache(cache_dir, hours):
+    """Recua o mtime de todas as entradas do cache em `hours` horas."""
+    past = time.time() - hours * 3600
+    for path in cache_dir.rglob("*.pkl"):
+        os.utime(path, (past, past))
+
+
+def test_stale_current_season_is_refetched(tmp_path):
+    cache = make_dataset.ResponseCache(tmp_path)
+    seasons = ["2023-24", make_dataset.CURRENT_SEASON]
+    StubPlayerGameLog.reset()
+    make_dataset.fetch_all_gamelogs([2], seasons, requests_per_second=1000,
+                                    endpoint=StubPlayerGameLog, cache=cache)
+
+    # Execução retomada logo depois: tudo vem do cache
+    StubPlayerGameLog.reset()
+    make_dataset.fetch_all_gamelogs([2], seasons, requests_per_second=1000,
+                                    endpoint=StubPlayerGameLog, cache=cache)
+    assert StubPlayerGameLog.calls == []
+
+    # Coleta padrão (sem --refresh-current) no dia seguinte: só a temporada atual é rebuscada
+    age_cache(tmp_path, make_dataset.REFRESH_MAX_AGE_HOURS + 1)
+    make_dataset.fetch_all_gamelogs([2], seasons, requests_per_second=1000,
+                                    endpoint=StubPlayerGameLog, cache=cache)
+    assert [season for _, season, _ in StubPlayerGameLog.calls] == [make_dataset.CURRENT_SEASON]
+
+
+class StubSeasonGameLog:
+    """Endpoint que devolve a temporada completa ou só os jogos a partir de DateFrom."""
+
+    games = pd.DataFrame({
+        "SEASON_ID": ["22024"] * 3,
+        "Player_ID": [7, 7, 7],
+        "Game_ID": ["0022400001", "0022400015", "0022400030"],
+        "GAME_DATE": ["OCT 22, 2024", "OCT 25, 2024", "OCT 28, 2024"],
+        "PTS": [10, 20, 30],
+    })
+    calls = []
+
+    def __init__(self, player_id, season, timeout=30, date_from_nullable=""):
+        type(self).calls.append((player_id, date_from_nullable))
+        df = self.games[self.games["Player_ID"] == player_id]
+        if date_from_nullable:
+            dates = pd.to_datetime(df["GAME_DATE"], format="%b %d, %Y")
+            df = df[dates >= pd.to_datetime(date_from_nullable, format="%m/%d/%Y")]
+        self.df = df.reset_index(drop=True)
+
+    def get_data_frames(self):
+        return [self.df]
+
+
+def test_incremental_appends_only_new_games(tmp_path, monkeypatch):
+    output_path = tmp_path / "raw.parquet"
+    storage.write_table(StubSeasonGameLog.games.iloc[:2], output_path, partition_col="SEASON_ID")
+    monkeypatch.setattr(make_dataset, "OUTPUT_RAW_PATH", str(output_path))
+    monkeypatch.setattr(make_dataset, "CURRENT_SEASON", "2024-25")
+    original_fetch_all = make_dataset.fetch_all_gamelogs
+    monkeypatch.setattr(make_dataset, "fetch_all_gamelogs",
+                        lambda *a, **kw: original_fetch_all(*a, endpoint=StubSeasonGameLog, **kw))
+    StubSeasonGameLog.calls = []
+
+    args = make_dataset.parse_args(["--incremental", "--rate", "1000"])
+    assert make_dataset.run_incremental([7], args)
+    assert StubSeasonGameLog.calls == [(7, "10/25/2024")]
+
+    df = storage.read_table(output_path).sort_values("Game_ID")
+    assert df["Game_ID"].tolist() == ["0022400001", "0022400015", "0022400030"]
+    assert df["PTS"].dtype == "int64"
+
+    # Rodar de novo sem jogos novos não duplica nada
+    assert make_dataset.run_incremental([7], args)
+    assert len(storage.read_table(output_path)) == 3
+
+
+def league_gamelog(df_player):
+    """Game logs no formato do LeagueGameLog (modo jogador) a partir do schema do PlayerGameLog."""
+    df = df_player.rename(columns={"Player_ID": "PLAYER_ID", "Game_ID": "GAME_ID"})
+    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], format="%b %d, %Y").dt.strftime("%Y-%m-%d")
+    df.insert(2, "PLAYER_NAME", "Player " + df["PLAYER_ID"].astype(str))
+    df.insert(3, "TEAM_ABBREVIATION", df["MATCHUP"].str[:3])
+    df["FANTASY_PTS"] = df["PTS"] * 1.0
+    # A liga vem ordenada por data, não por jogador
+    return df.sort_values(["GAME_DATE", "PLAYER_ID"]).reset_index(drop=True)
+
+
+@pytest.fixture
+def stats_server(monkeypatch):
+    """Servidor HTTP local no lugar de stats.nba.com, servindo o endpoint leaguegamelog."""
+    games = league_gamelog(synthetic.make_gamelogs(n_players=6, games_per_season=10, seed=5))
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+            requests.append((url.path, params))
+            rows = games[games["SEASON_ID"] == f"2{params['Season'][:4]}"]
+            if params.get("DateFrom"):
+                date_from = pd.to_datetime(params["DateFrom"], format="%m/%d/%Y")
+                rows = rows[pd.to_datetime(rows["GAME_DATE"]) >= date_from]
+            body = json.dumps({
+                "resource": "leaguegamelog", "parameters": params,
+                "resultSets": [{"name": "LeagueGameLog", "headers": list(rows.columns),
+                                "rowSet": json.loads(rows.to_json(orient="values"))}],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(NBAStatsHTTP, "base_url",
+                        f"http://127.0.0.1:{server.server_port}/stats/{{endpoint}}")
+    yield requests
+    server.shutdown()
+    server.server_close()
+
+
+def canonical_raw(df):
+    df = schema.apply_schema(df, schema.RAW_GAMELOG_DTYPES)
+    return df.sort_values(["Player_ID", "Game_ID"]).reset_index(drop=True)
+
+
+def test_bulk_fetch_one_request_per_season(tmp_path, monkeypatch, stats_server):
+    output_path = tmp_path / "raw.parquet"
+    monkeypatch.setattr(make_dataset, "OUTPUT_RAW_PATH", str(output_path))
+    monkeypatch.setattr(make_dataset, "SEASONS_TO_FETCH", list(synthetic.DEFAULT_SEASONS))
+    monkeypatch.setattr(make_dataset, "get_active_player_ids",
+                        lambda: pytest.fail("o modo bulk não usa a lista de jogadores"))
+
+    make_dataset.main(["--bulk", "--no-cache", "--rate", "1000"])
+
+    assert [path for path, _ in stats_server] == ["/stats/leaguegamelog"] * 3
+    assert [params["Season"] for _, params in stats_server] == list(synthetic.DEFAULT_SEASONS)
+    assert {params["PlayerOrTeam"] for _, params in stats_server} == {"P"}
+    # Mesmo schema e mesmas linhas que a coleta por jogador gravaria
+    expected = synthetic.make_gamelogs(n_players=6, games_per_season=10, seed=5)
+    df = storage.read_table(output_path)
+    assert list(df.columns) == make_dataset.PLAYER_GAMELOG_COLUMNS
+    pd.testing.assert_frame_equal(canonical_raw(df), canonical_raw(expected))
+
+
+def test_bulk_fetch_uses_cache(tmp_path, stats_server):
+    cache = make_dataset.ResponseCache(tmp_path)
+    first = make_dataset.fetch_bulk_gamelogs(["2023-24"], requests_per_second=1000, cache=cache)
+    second = make_dataset.fetch_bulk_gamelogs(["2023-24"], requests_per_second=1000, cache=cache)
+    assert len(stats_server) == 1
+    pd.testing.assert_frame_equal(first[0], second[0])
+    assert first[0].groupby("Player_ID").size().eq(10).all()
+
+    # Entradas antigas: a temporada atual é rebuscada, a passada continua do cache
+    make_dataset.fetch_bulk_gamelogs([make_dataset.CURRENT_SEASON], requests_per_second=1000,
+                                     cache=cache)
+    age_cache(tmp_path, make_dataset.REFRESH_MAX_AGE_HOURS + 1)
+    make_dataset.fetch_bulk_gamelogs(["2023-24", make_dataset.CURRENT_SEASON],
+                                     requests_per_second=1000, cache=cache)
+    assert [params["Season"] for _, params in stats_server] == [
+        "2023-24", make_dataset.CURRENT_SEASON, make_dataset.CURRENT_SEASON]
+
+
+def test_bulk_incremental_requests_from_last_date(tmp_path, monkeypatch, stats_server):
+    games = synthetic.make_gamelogs(n_players=6, games_per_season=10, seed=5)
+    games = games[games["SEASON_ID"] == "22024"]
+    dates = pd.to_datetime(games["GAME_DATE"], format="%b %d, %Y")
+    cutoff = dates.sort_values().iloc[len(dates) // 2]
+    output_path = tmp_path / "raw.parquet"
+    storage.write_table(schema.apply_schema(games[dates <= cutoff], schema.RAW_GAMELOG_DTYPES),
+                        output_path, partition_col="SEASON_ID")
+    monkeypatch.setattr(make_dataset, "OUTPUT_RAW_PATH", str(output_path))
+    monkeypatch.setattr(make_dataset, "CURRENT_SEASON", "2024-25")
+
+    args = make_dataset.parse_args(["--incremental", "--bulk", "--rate", "1000"])
+    assert make_dataset.run_incremental(None, args)
+    assert [params["DateFrom"] for _, params in stats_server] == [cutoff.strftime("%m/%d/%Y")]
+    pd.testing.assert_frame_equal(canonical_raw(storage.read_table(output_path)), canonical_raw(games))
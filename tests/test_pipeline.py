@@ -0,0 +1,139 @@
+import subprocess
+
+import pytest
+
+from nba_stat_predictor import pipeline
+
+# Etapa "upper": maiúsculas da primeira linha de in.txt; "count": diretório com o tamanho.
+# Cada execução deixa uma linha em runs.log.
+UPPER = """
+import pathlib
+pathlib.Path('runs.log').open('a').write('upper\\n')
+line = pathlib.Path('in.txt').read_text().splitlines()[0]
+pathlib.Path('upper.txt').write_text(line.upper())
+"""
+COUNT = """
+import pathlib
+pathlib.Path('runs.log').open('a').write('count\\n')
+out = pathlib.Path('count')
+out.mkdir(exist_ok=True)
+(out / 'n.txt').write_text(str(len(pathlib.Path('upper.txt').read_text())))
+"""
+
+STAGES = (
+    pipeline.Stage("upper", commands=(("upper.py",),), inputs=("in.txt",), code=("upper.py",),
+                   outputs=("upper.txt",)),
+    pipeline.Stage("count", commands=(("count.py",),), inputs=("upper.txt",), code=("count.py",),
+                   outputs=("count",), deps=("upper",)),
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "upper.py").write_text(UPPER)
+    (root / "count.py").write_text(COUNT)
+    (root / "in.txt").write_text("abc\nfirst\n")
+    return root
+
+
+def run(project, **kwargs):
+    results = pipeline.run_pipeline("count", STAGES, root=project,
+                                    pipeline_dir=project.parent / "pipeline", **kwargs)
+    return [r.status for r in results]
+
+
+def runs(project):
+    return (project / "runs.log").read_text().split()
+
+
+def test_unchanged_stages_are_skipped(project):
+    assert run(project) == ["ran", "ran"]
+    assert run(project) == ["skipped", "skipped"]
+    assert runs(project) == ["upper", "count"]
+    assert (project / "count" / "n.txt").read_text() == "3"
+
+    assert run(project, force=("count",)) == ["skipped", "ran"]
+    assert run(project, dry_run=True) == ["skipped", "skipped"]
+
+
+def test_same_outputs_do_not_invalidate_downstream(project):
+    run(project)
+    # Só a primeira linha importa: upper roda de novo e gera o mesmo arquivo
+    (project / "in.txt").write_text("abc\nsecond\n")
+    assert run(project, dry_run=True) == ["pending", "skipped"]
+    assert run(project) == ["ran", "skipped"]
+
+    (project / "upper.py").write_text(UPPER.replace(".upper()", ".upper() * 2"))
+    assert run(project) == ["ran", "ran"]
+    assert (project / "count" / "n.txt").read_text() == "6"
+
+
+def test_previous_outputs_are_restored_from_cache(project):
+    run(project)
+    (project / "in.txt").write_text("abcdef\n")
+    assert run(project) == ["ran", "ran"]
+
+    # De volta à entrada original: nada roda, as saídas vêm do cache
+    (project / "in.txt").write_text("abc\nfirst\n")
+    assert run(project) == ["restored", "restored"]
+    assert (project / "count" / "n.txt").read_text() == "3"
+    # Saída apagada ou alterada à mão também é restaurada
+    (project / "upper.txt").unlink()
+    assert run(project) == ["restored", "skipped"]
+    assert runs(project) == ["upper", "count", "upper", "count"]
+
+
+def test_failed_stage_is_not_recorded(project):
+    (project / "upper.py").write_text("raise SystemExit(3)")
+    with pytest.raises(subprocess.CalledProcessError):
+        run(project)
+    assert "upper" not in pipeline.load_state(project.parent / "pipeline")
+
+    # Comando que termina bem sem gravar as saídas também falha
+    (project / "upper.py").write_text("pass")
+    with pytest.raises(RuntimeError, match="upper.txt"):
+        run(project)
+
+
+def test_source_stage_accepts_existing_outputs(project):
+    source = pipeline.Stage("fetch", commands=(("-c", "raise SystemExit(1)"),), outputs=("in.txt",),
+                            source=True)
+    stages = (source, pipeline.Stage(**{**STAGES[0].__dict__, "deps": ("fetch",)}))
+    results = pipeline.run_pipeline("upper", stages, root=project, pipeline_dir=project.parent / "p")
+    assert [r.status for r in results] == ["skipped", "ran"]
+
+    with pytest.raises(ValueError, match="desconhecida"):
+        pipeline.resolve_order("train", stages)
+
+
+def test_update_is_recorded_for_the_next_run(project):
+    # Incremental de "upper": usa a última linha de in.txt (o "jogo novo")
+    upper_new = UPPER.replace("write('upper", "write('upper_new").replace("[0]", "[-1]")
+    (project / "upper_new.py").write_text(upper_new)
+    stages = (pipeline.Stage(**{**STAGES[0].__dict__, "update_commands": (("upper_new.py",),)}),
+              pipeline.Stage(**{**STAGES[1].__dict__, "update_commands": (("count.py",),)}))
+    pipeline_dir = project.parent / "pipeline"
+
+    def update():
+        results = pipeline.update_pipeline("count", stages, root=project, pipeline_dir=pipeline_dir)
+        return [r.status for r in results]
+
+    def run_stages():
+        results = pipeline.run_pipeline("count", stages, root=project, pipeline_dir=pipeline_dir)
+        return [r.status for r in results]
+
+    assert run_stages() == ["ran", "ran"]
+    (project / "in.txt").write_text("abc\nfirst\nnewest\n")
+    assert update() == ["updated", "updated"]
+    assert (project / "count" / "n.txt").read_text() == "6"
+    # O run seguinte (make train) não refaz as etapas atualizadas
+    assert run_stages() == ["skipped", "skipped"]
+    assert runs(project) == ["upper", "count", "upper_new", "count"]
+
+    # Código mudou desde a última execução: a etapa roda por inteiro
+    (project / "count.py").write_text(COUNT.replace("str(len(", "str(2 * len("))
+    assert update() == ["updated", "ran"]
+    assert (project / "count" / "n.txt").read_text() == "12"
+    assert run_stages() == ["skipped", "skipped"]
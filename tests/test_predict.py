@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from nba_stat_predictor import synthetic
+from nba_stat_predictor.modeling import predict
+
+
+@pytest.fixture
+def slate(df_latest):
+    rng = np.random.default_rng(0)
+    n = 40
+    return pd.DataFrame({
+        'PLAYER_ID': rng.choice(df_latest.index.to_numpy(), n),
+        'OPPONENT': rng.choice(synthetic.TEAM_ABBRS, n),
+        'HOME': rng.integers(0, 2, n),
+    })
+
+
+def predict_one(player_id, opponent, home, df_latest, models):
+    """Predição de uma linha pelo caminho original (ColumnTransformer + modelos)."""
+    preprocessor, reg_model, clf_model = models
+    input_df = df_latest.loc[[player_id]].reset_index(drop=True)
+    input_df['OPPONENT'] = opponent
+    input_df['HOME'] = home
+    input_processed = preprocessor.transform(input_df)
+    return np.append(reg_model.predict(input_processed)[0],
+                     clf_model.predict_proba(input_processed)[0, 1])
+
+
+@pytest.mark.parametrize('chunk_size', [7, 1000])
+def test_predict_slate_matches_row_by_row(slate, df_latest, models, predictor, chunk_size):
+    chunks = list(predict.predict_slate(slate, df_latest, predictor, chunk_size=chunk_size))
+    assert len(chunks) == -(-len(slate) // chunk_size)
+    result = pd.concat(chunks, ignore_index=True)
+
+    pd.testing.assert_frame_equal(result[predict.SLATE_COLUMNS], slate)
+    expected = np.array([predict_one(*row, df_latest, models)
+                         for row in slate.itertuples(index=False)])
+    np.testing.assert_allclose(result[predict.PREDICTION_COLUMNS].to_numpy(), expected)
+
+
+def test_unknown_players_get_nan(slate, df_latest, predictor):
+    slate.loc[[0, 5], 'PLAYER_ID'] = -1
+    result = pd.concat(predict.predict_slate(slate, df_latest, predictor, chunk_size=4))
+    predictions = result[predict.PREDICTION_COLUMNS]
+    assert predictions.iloc[[0, 5]].isna().all().all()
+    assert predictions.drop(index=[0, 5]).notna().all().all()
+
+
+def test_write_predictions_streams_chunks(tmp_path, slate, df_latest, predictor):
+    path = tmp_path / 'out' / 'predictions.csv'
+    chunks = predict.predict_slate(slate, df_latest, predictor, chunk_size=9)
+    assert predict.write_predictions(chunks, path) == len(slate)
+
+    written = pd.read_csv(path)
+    assert list(written.columns) == predict.SLATE_COLUMNS + predict.PREDICTION_COLUMNS
+    assert len(written) == len(slate)
@@ -0,0 +1,68 @@
+import json
+
+import pandas as pd
+import pytest
+
+from nba_stat_predictor import profiling
+
+
+@profiling.timed()
+def make_rows(n):
+    return pd.DataFrame({'x': range(n)})
+
+
+def load_latest(report_dir, script):
+    return json.loads((report_dir / f'{script}-latest.json').read_text())
+
+
+def test_stages_are_recorded_with_nesting(run_report_dir):
+    with profiling.run('script') as report:
+        with profiling.stage('load') as etapa:
+            etapa.rows = 3
+            make_rows(5)
+        make_rows(2)
+
+    data = load_latest(run_report_dir, 'script')
+    assert data['run_id'] == report.run_id and data['status'] == 'ok'
+    assert (run_report_dir / f'{report.run_id}.json').exists()
+    stages = {stage['name']: stage for stage in data['stages']}
+    assert [stage['name'] for stage in data['stages']] == ['load', 'load/make_rows', 'make_rows']
+    assert stages['load']['rows'] == 3 and stages['load/make_rows']['rows'] == 5
+    assert stages['load/make_rows']['depth'] == 2
+    for stage in data['stages']:
+        assert stage['wall_s'] >= 0 and stage['cpu_s'] >= 0 and stage['peak_rss_mb'] > 0
+    assert data['wall_s'] >= stages['load']['wall_s']
+
+
+def test_no_active_run_is_a_no_op(run_report_dir):
+    with profiling.stage('solto') as etapa:
+        etapa.rows = 1
+    assert len(make_rows(4)) == 4
+    assert not run_report_dir.exists()
+
+
+def test_errors_are_reported(run_report_dir):
+    with pytest.raises(ValueError):
+        with profiling.run('script'):
+            with profiling.stage('falha'):
+                raise ValueError('boom')
+    data = load_latest(run_report_dir, 'script')
+    assert data['status'] == 'error'
+    assert data['stages'][0]['name'] == 'falha' and data['stages'][0]['status'] == 'error'
+
+
+def test_profile_one_stage(run_report_dir, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, 'make_rows')
+    with profiling.run('script') as report:
+        make_rows(10)
+        with profiling.stage('outra'):
+            make_rows(3)
+
+    data = load_latest(run_report_dir, 'script')
+    assert data['profile'] == 'make_rows'
+    # As duas ocorrências vão para o mesmo arquivo
+    assert data['profile_file'] == f'{report.run_id}-make_rows.prof'
+    assert (run_report_dir / data['profile_file']).exists()
+    assert 'make_rows' in (run_report_dir / f'{report.run_id}-make_rows.txt').read_text()
+    assert [stage.get('profiled', False) for stage in data['stages']] == [True, False, True]
+    assert len(list(run_report_dir.glob('*.prof'))) == 1
@@ -0,0 +1,149 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import Ridge
+from sklearn.metrics import roc_auc_score
+
+from nba_stat_predictor import storage
+from nba_stat_predictor.features import get_feature_columns
+from nba_stat_predictor.modeling import compiled, encoding, retrain, train
+from src.models import train_model
+
+SPECS = (
+    train.ModelSpec('reg_model_ridge', Ridge(alpha=1.0), tuple(train.REG_TARGETS)),
+    train.ModelSpec('clf_model_rf', RandomForestClassifier(n_estimators=20, random_state=0, max_depth=5,
+                                                           class_weight='balanced'), 'DOUBLE_DOUBLE'),
+)
+
+
+def split_by_date(df, new_fraction=0.1):
+    """(histórico, jogos novos): os últimos dias somam ~new_fraction das linhas."""
+    cutoff = df['GAME_DATE'].quantile(1 - new_fraction)
+    return df[df['GAME_DATE'] < cutoff], df[df['GAME_DATE'] >= cutoff]
+
+
+@pytest.fixture
+def trained(tmp_path, monkeypatch, df_features):
+    """Treino completo sobre o histórico; devolve (caminho da tabela, diretório dos modelos, linhas novas)."""
+    df_old, df_new = split_by_date(df_features)
+    processed_path = tmp_path / 'processed.parquet'
+    storage.write_table(df_old, processed_path, partition_col='Season')
+    monkeypatch.setattr(train_model, 'PROCESSED_DATA_PATH', str(processed_path))
+    monkeypatch.setattr(train_model, 'MODEL_OUTPUT_DIR', str(tmp_path / 'models'))
+    monkeypatch.setattr(train_model, 'MODEL_SPECS', SPECS)
+    train_model.main(['--workers', '1'])
+    return processed_path, tmp_path / 'models', df_new
+
+
+@pytest.mark.parametrize('fit_intercept', [True, False])
+def test_merged_normal_equations_match_single_pass(df_features, fit_intercept):
+    X = df_features[get_feature_columns(df_features.columns)]
+    encoder, X_compact = train.fit_preprocessor(X, encoding='compact')
+    y = df_features[train.REG_TARGETS].to_numpy(dtype=np.float64)
+
+    parts = [encoding.NormalEquations.from_matrix(X_compact[rows], y[rows], encoder.n_categories)
+             for rows in (slice(0, 100), slice(100, 101), slice(101, None))]
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+    full = encoding.NormalEquations.from_matrix(X_compact, y, encoder.n_categories)
+    assert merged.n_rows == full.n_rows
+    np.testing.assert_allclose(merged.xx, full.xx, rtol=1e-10, atol=1e-8)
+
+    expected = full.solve(Ridge(fit_intercept=fit_intercept))
+    ridge = merged.solve(Ridge(fit_intercept=fit_intercept))
+    X_onehot = encoding.onehot_matrix(X_compact, encoder.n_categories)
+    np.testing.assert_allclose(ridge.predict(X_onehot), expected.predict(X_onehot), rtol=0, atol=1e-8)
+
+
+def test_incremental_update_matches_full_refit(trained, df_features, run_report_dir, monkeypatch):
+    processed_path, models_dir, df_new = trained
+    window_start = pd.Timestamp(train.load_manifest(models_dir)['incremental']['recent_window']['start'])
+    storage.append_table(df_new, processed_path, partition_col='Season')
+    reads, read_table = [], storage.read_table
+
+    def recording_read(*args, **kwargs):
+        reads.append(read_table(*args, **kwargs))
+        return reads[-1]
+
+    monkeypatch.setattr(storage, 'read_table', recording_read)
+    train_model.main(['--workers', '1', '--incremental'])
+
+    # Do histórico, só os jogos a partir do início da janela recente do último treino
+    assert len(reads) == 2 and len(reads[1]) < len(df_features) - len(df_new)
+    assert reads[1]['GAME_DATE'].min() >= window_start
+    manifest = train.load_manifest(models_dir)
+    assert manifest['n_rows'] == len(df_features)
+    assert manifest['incremental']['updates'] == 1
+    assert manifest['incremental']['new_rows'] == len(df_new)
+    y_all = train.build_targets(df_features, ['DOUBLE_DOUBLE'])['DOUBLE_DOUBLE']
+    assert manifest['incremental']['class_counts']['clf_model_rf'] == {
+        str(label): int(count) for label, count in y_all.value_counts().items()}
+    assert set(manifest['training_data']['files']) == set(storage.table_files(processed_path))
+    report = json.loads((run_report_dir / 'train_model-latest.json').read_text())
+    stages = {stage['name']: stage for stage in report['stages']}
+    assert stages['incremental_update']['rows'] == len(df_new) and 'fit_models' not in stages
+
+    # Referência: treino completo sobre todas as linhas
+    feature_cols = manifest['feature_cols']
+    encoder, X = train.fit_preprocessor(storage.read_table(processed_path)[feature_cols], encoding='compact')
+    df_all = storage.read_table(processed_path)
+    targets = train.build_targets(df_all, train.required_targets(SPECS))
+    full = train.fit_models(X, targets, SPECS, n_jobs=1, encoder=encoder)
+
+    ridge = joblib.load(models_dir / 'reg_model_ridge.joblib')
+    np.testing.assert_allclose(ridge.coef_, full['reg_model_ridge'][0].coef_, rtol=0, atol=1e-8)
+    np.testing.assert_allclose(ridge.intercept_, full['reg_model_ridge'][0].intercept_, rtol=0, atol=1e-8)
+
+    forest = joblib.load(models_dir / 'clf_model_rf.joblib')
+    assert len(forest.estimators_) > SPECS[1].estimator.n_estimators
+    assert forest.get_params()['warm_start'] is False and forest.class_weight == 'balanced'
+    y = targets['DOUBLE_DOUBLE']
+    auc_incremental = roc_auc_score(y, forest.predict_proba(X)[:, 1])
+    auc_full = roc_auc_score(y, full['clf_model_rf'][0].predict_proba(X)[:, 1])
+    assert auc_incremental == pytest.approx(auc_full, abs=0.02)
+
+    # O artefato compilado acompanha as árvores novas
+    predictor = compiled.load_compiled(models_dir)
+    assert predictor.forest.n_trees == len(forest.estimators_)
+    np.testing.assert_array_equal(predictor.predict_frame(df_all[feature_cols].iloc[:20])[:, 4],
+                                  forest.predict_proba(X[:20])[:, 1])
+
+
+def test_no_new_rows_keeps_models(trained):
+    processed_path, models_dir, _ = trained
+    result = retrain.update(models_dir, processed_path, SPECS, train.load_manifest(models_dir)['feature_cols'])
+    assert result.status == 'up_to_date'
+
+
+@pytest.mark.parametrize('case, reason', [
+    ('rebuilt', 'reconstruída'),
+    ('new_opponent', 'oponentes'),
+    ('too_many_rows', 'linhas novas'),
+    ('forest_growth', 'árvores'),
+    ('params', 'parâmetros'),
+])
+def test_policy_requires_full_refit(trained, case, reason):
+    processed_path, models_dir, df_new = trained
+    feature_cols = train.load_manifest(models_dir)['feature_cols']
+    specs, policy = SPECS, retrain.RetrainPolicy()
+    if case == 'rebuilt':
+        storage.write_table(storage.read_table(processed_path), processed_path, partition_col='Season')
+    if case == 'new_opponent':
+        df_new = df_new.copy()
+        df_new['OPPONENT'] = df_new['OPPONENT'].cat.add_categories(['XXX'])
+        df_new.iloc[0, df_new.columns.get_loc('OPPONENT')] = 'XXX'
+    if case == 'too_many_rows':
+        policy = retrain.RetrainPolicy(max_new_fraction=0.01)
+    if case == 'forest_growth':
+        policy = retrain.RetrainPolicy(max_forest_growth=0.01)
+    if case == 'params':
+        specs = (SPECS[0], train.ModelSpec('clf_model_rf', RandomForestClassifier(n_estimators=50),
+                                           'DOUBLE_DOUBLE'))
+    storage.append_table(df_new, processed_path, partition_col='Season')
+
+    result = retrain.update(models_dir, processed_path, specs, feature_cols, policy)
+    assert result.status == 'full_refit'
+    assert reason in result.reason
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from nba_stat_predictor import schema, storage, synthetic
+from src.features import build_features as bf
+
+
+def test_apply_schema_raw_gamelogs():
+    raw = synthetic.make_gamelogs(n_players=5, games_per_season=10)
+    compact = schema.apply_schema(raw, schema.RAW_GAMELOG_DTYPES)
+
+    assert compact['PTS'].dtype == 'int16'
+    assert compact['FG_PCT'].dtype == 'float32'
+    assert compact['VIDEO_AVAILABLE'].dtype == 'int8'
+    assert isinstance(compact['MATCHUP'].dtype, pd.CategoricalDtype)
+    # Colunas fora do schema ficam como estão
+    assert compact['GAME_DATE'].dtype == raw['GAME_DATE'].dtype
+    pd.testing.assert_frame_equal(compact.astype(raw.dtypes.to_dict()), raw)
+    numeric = schema.COUNT_STATS + schema.PCT_STATS
+    assert schema.memory_mb(compact[numeric]) <= schema.memory_mb(raw[numeric]) / 3
+
+
+def test_integer_columns_with_nan_become_nullable():
+    df = pd.DataFrame({'PTS': [10.0, np.nan], 'MIN': [35.5, 12.0], 'REB': [4.0, 7.0]})
+    compact = schema.apply_schema(df)
+    assert compact['PTS'].dtype == 'Int16'
+    assert compact['PTS'].isna().tolist() == [False, True]
+    assert compact['MIN'].dtype == 'float32'
+    assert compact['REB'].dtype == 'int16'
+
+
+def test_partitions_with_and_without_nan_share_arrow_schema(tmp_path):
+    path = tmp_path / 'gamelogs.parquet'
+    full = pd.DataFrame({'SEASON_ID': ['22023', '22023'], 'PTS': [10.0, 12.0]})
+    partial = pd.DataFrame({'SEASON_ID': ['22024', '22024'], 'PTS': [8.0, np.nan]})
+    storage.write_table(schema.apply_schema(full), path, partition_col='SEASON_ID')
+    storage.append_table(schema.apply_schema(partial), path, partition_col='SEASON_ID')
+
+    types = {pq.read_schema(path / f).field('PTS').type for f in storage.table_files(path)}
+    assert types == {pa.int16()}
+    df = schema.apply_schema(storage.read_table(path)).sort_values('SEASON_ID')
+    assert df['PTS'].dtype == 'Int16'
+    assert df['PTS'].isna().sum() == 1
+
+
+def test_categories_are_sorted_and_unused_dropped():
+    s = pd.Series(pd.Categorical(['MIA', 'BOS'], categories=['MIA', 'LAL', 'BOS']))
+    compact = schema.apply_schema(pd.DataFrame({'OPPONENT': s}))
+    assert list(compact['OPPONENT'].cat.categories) == ['BOS', 'MIA']
+    assert list(compact['OPPONENT']) == ['MIA', 'BOS']
+
+
+def test_feature_table_dtypes_survive_storage(tmp_path):
+    raw = synthetic.make_gamelogs(n_players=8, games_per_season=12, seed=2)
+    df = bf.build_features(raw, synthetic.make_defense_stats())
+
+    assert df['PTS_MA_5'].dtype == 'float32'
+    assert df['OPP_PTS_PER_G'].dtype == 'float32'
+    assert df['HOME'].dtype == 'int8' and df['WIN_LAST_GAME'].dtype == 'int8'
+    assert df['DAYS_REST'].dtype == 'int16'
+    assert isinstance(df['OPPONENT'].dtype, pd.CategoricalDtype)
+    assert isinstance(df['Season'].dtype, pd.CategoricalDtype)
+
+    storage.write_table(df, tmp_path / 'features.parquet', partition_col='Season')
+    df_read = schema.apply_schema(storage.read_table(tmp_path / 'features.parquet'))
+    df_read = df_read.sort_values(['Player_ID', 'GAME_DATE']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(df_read, df.reset_index(drop=True))
+
+
+def test_memory_report():
+    df = pd.DataFrame({'PTS_MA_5': np.zeros(1000, dtype=np.float32)})
+    assert schema.memory_report(df).startswith('0.0 MB, 1000 linhas (float32:')
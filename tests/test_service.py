@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from starlette.testclient import TestClient
+
+from nba_stat_predictor import service, storage
+from nba_stat_predictor.modeling import predict
+
+
+@pytest.fixture
+def client(tmp_path, predictor, df_latest):
+    models_dir = tmp_path / 'models'
+    models_dir.mkdir()
+    predictor.save(models_dir)
+    latest_path = tmp_path / 'player_latest_features.parquet'
+    storage.write_table(df_latest.reset_index(), latest_path)
+
+    with TestClient(service.create_app(models_dir, latest_path)) as client:
+        yield client
+
+
+def expected_predictions(matchups, df_latest, predictor):
+    slate = pd.DataFrame(
+        [(m['player_id'], m['opponent'], m['home']) for m in matchups],
+        columns=predict.SLATE_COLUMNS)
+    return next(predict.predict_slate(slate, df_latest, predictor))[predict.PREDICTION_COLUMNS]
+
+
+def test_health(client, df_latest):
+    response = client.get('/health')
+    assert response.status_code == 200
+    assert response.json() == {'status': 'ok', 'players': len(df_latest)}
+
+
+def test_predict_single_matches_batch_engine(client, df_latest, predictor):
+    matchup = {'player_id': int(df_latest.index[0]), 'opponent': 'BOS', 'home': 1}
+    response = client.post('/predict', json=matchup)
+    assert response.status_code == 200
+    body = response.json()
+    assert {k: body[k] for k in matchup} == matchup
+
+    expected = expected_predictions([matchup], df_latest, predictor).iloc[0]
+    np.testing.assert_allclose([body[col] for col in predict.PREDICTION_COLUMNS], expected)
+
+
+def test_predict_batch(client, df_latest, predictor):
+    matchups = [{'player_id': int(pid), 'opponent': opp, 'home': home}
+                for pid, opp, home in zip(df_latest.index[:5], ['ATL', 'BOS', 'MIA', 'LAL', 'NYK'],
+                                          [0, 1, 0, 1, 0])]
+    matchups.append({'player_id': -1, 'opponent': 'BOS', 'home': 1})
+    response = client.post('/predict/batch', json={'matchups': matchups})
+    assert response.status_code == 200
+    records = response.json()['predictions']
+    assert [r['player_id'] for r in records] == [m['player_id'] for m in matchups]
+
+    # Jogador desconhecido não derruba o lote: volta com previsões nulas
+    assert all(records[-1][col] is None for col in predict.PREDICTION_COLUMNS)
+    expected = expected_predictions(matchups[:-1], df_latest, predictor).to_numpy()
+    got = [[r[col] for col in predict.PREDICTION_COLUMNS] for r in records[:-1]]
+    np.testing.assert_allclose(got, expected)
+
+
+@pytest.mark.parametrize('body, status', [
+    ({'player_id': -1, 'opponent': 'BOS', 'home': 1}, 404),
+    ({'player_id': 1600000, 'opponent': 'XXX', 'home': 1}, 422),
+    ({'player_id': 1600000, 'opponent': 'BOS', 'home': 2}, 422),
+    ({'player_id': 1600000, 'home': 1}, 422),
+    ([1, 2, 3], 422),
+])
+def test_predict_errors(client, body, status):
+    assert client.post('/predict', json=body).status_code == status
+
+
+def test_predict_batch_rejects_malformed_body(client):
+    assert client.post('/predict/batch', json=[]).status_code == 422
+    assert client.post('/predict/batch', json={'matchups': [1, 2]}).status_code == 422
+    assert client.post('/predict/batch', content=b'not json').status_code == 422
+
+
+def test_metrics_report_latency_percentiles(client, df_latest):
+    matchup = {'player_id': int(df_latest.index[0]), 'opponent': 'BOS', 'home': 0}
+    for _ in range(5):
+        client.post('/predict', json=matchup)
+    client.post('/predict/batch', json={'matchups': [matchup] * 3})
+    client.post('/predict', json={**matchup, 'player_id': -1})
+    client.post('/predict', content=b'not json')
+
+    metrics = client.get('/metrics').json()
+    # Respostas de erro também entram nas latências
+    assert (metrics['predict']['count'], metrics['predict']['errors']) == (7, 2)
+    assert metrics['predict_batch']['count'] == 1
+    assert 0 < metrics['predict']['p50_ms'] <= metrics['predict']['p99_ms']
+
+
+def test_repeated_matchups_are_served_from_cache(client, df_latest, predictor):
+    player_ids = [int(pid) for pid in df_latest.index[:3]]
+    matchups = [{'player_id': pid, 'opponent': 'BOS', 'home': 1} for pid in player_ids]
+    first = client.post('/predict', json=matchups[0]).json()
+    assert client.post('/predict', json=matchups[0]).json() == first
+
+    # Lote com um confronto já previsto, dois novos e um jogador desconhecido
+    batch = matchups + [{'player_id': -1, 'opponent': 'BOS', 'home': 1}]
+    records = client.post('/predict/batch', json={'matchups': batch}).json()['predictions']
+    assert records[0] == first
+    assert all(records[-1][col] is None for col in predict.PREDICTION_COLUMNS)
+    expected = expected_predictions(matchups, df_latest, predictor).to_numpy()
+    np.testing.assert_allclose([[r[col] for col in predict.PREDICTION_COLUMNS] for r in records[:-1]],
+                               expected)
+
+    cache = client.get('/metrics').json()['cache']
+    assert (cache['hits'], cache['misses'], cache['entries']) == (2, 4, 3)
+
+
+def test_latency_tracker_window():
+    tracker = service.LatencyTracker(window=100)
+    for ms in range(1, 201):
+        tracker.record('x', ms / 1000)
+    summary = tracker.summary()['x']
+    assert summary['count'] == 200
+    assert summary['p50_ms'] == pytest.approx(150.5)
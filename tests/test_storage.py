@@ -0,0 +1,107 @@
+import pandas as pd
+import pytest
+
+from nba_stat_predictor import storage
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "Player_ID": [1, 1, 2, 2],
+        "GAME_DATE": pd.to_datetime(["2022-10-20", "2023-10-21", "2022-10-22", "2023-10-23"]),
+        "Season": ["2022-23", "2023-24", "2022-23", "2023-24"],
+        "OPPONENT": pd.Categorical(["BOS", "LAL", "MIA", "BOS"]),
+        "PTS_MA_5": [1.5, 2.5, 3.5, 4.5],
+    })
+
+
+def sort(df):
+    return df.sort_values(["Player_ID", "GAME_DATE"]).reset_index(drop=True)
+
+
+def test_roundtrip_preserves_dtypes(tmp_path, df):
+    path = tmp_path / "table.parquet"
+    storage.write_table(df, path, partition_col="Season")
+
+    assert storage.table_partitions(path) == ["2022-23", "2023-24"]
+    pd.testing.assert_frame_equal(sort(storage.read_table(path)), df, check_like=True,
+                                  check_categorical=False)
+    assert storage.read_table(path)["GAME_DATE"].dtype == "datetime64[ns]"
+    assert isinstance(storage.read_table(path)["OPPONENT"].dtype, pd.CategoricalDtype)
+
+
+def test_projection_and_partition_pruning(tmp_path, df):
+    path = tmp_path / "table.parquet"
+    storage.write_table(df, path, partition_col="Season")
+
+    assert storage.table_columns(path) == list(df.columns)
+    projected = storage.read_table(path, columns=["Player_ID", "PTS_MA_5"])
+    assert list(projected.columns) == ["Player_ID", "PTS_MA_5"]
+
+    season = storage.read_table(path, columns=["PTS_MA_5"], partitions=["2023-24"])
+    assert sorted(season["PTS_MA_5"]) == [2.5, 4.5]
+    assert storage.read_table(path, columns=["PTS_MA_5"], partitions=["2030-31"]).empty
+    recent = storage.read_table(path, columns=["PTS_MA_5"],
+                                filters=[("GAME_DATE", ">=", pd.Timestamp("2023-10-21"))])
+    assert sorted(recent["PTS_MA_5"]) == [2.5, 4.5]
+
+
+def test_write_replaces_and_append_adds(tmp_path, df):
+    path = tmp_path / "table.parquet"
+    storage.write_table(df, path, partition_col="Season")
+    storage.write_table(df.iloc[:1], path, partition_col="Season")
+    assert len(storage.read_table(path)) == 1
+
+    storage.append_table(df.iloc[3:], path, partition_col="Season")
+    assert storage.table_partitions(path) == ["2022-23", "2023-24"]
+    assert sorted(storage.read_table(path)["Player_ID"]) == [1, 2]
+
+
+def test_table_files_identify_appended_rows(tmp_path, df):
+    path = tmp_path / "table.parquet"
+    storage.write_table(df.iloc[:2], path, partition_col="Season")
+    before = storage.table_files(path)
+    assert sorted(before) == ["Season=2022-23/part-0.parquet", "Season=2023-24/part-0.parquet"]
+
+    storage.append_table(df.iloc[2:], path, partition_col="Season")
+    after = storage.table_files(path)
+    assert {name: after[name] for name in before} == before
+    new_files = [name for name in after if name not in before]
+    assert sorted(storage.read_table(path, files=new_files)["PTS_MA_5"]) == [3.5, 4.5]
+    assert storage.read_table(path, columns=["PTS_MA_5"], files=[]).empty
+
+    # Gravação completa: arquivos novos, mesmo com os mesmos nomes
+    storage.write_table(df, path, partition_col="Season")
+    assert all(storage.table_files(path).get(name) != signature for name, signature in before.items())
+    with pytest.raises(FileNotFoundError):
+        storage.read_table(path, files=new_files)
+
+
+def test_missing_table_raises(tmp_path):
+    assert not storage.table_exists(tmp_path / "nope.parquet")
+    with pytest.raises(FileNotFoundError):
+        storage.read_table(tmp_path / "nope.parquet")
+
+
+def test_write_table_chunks_streams_and_swaps(tmp_path, df):
+    path = tmp_path / "table.parquet"
+    storage.write_table(df.iloc[:1], path, partition_col="Season")
+
+    def chunks():
+        yield df.iloc[:2]
+        # A tabela antiga continua intacta enquanto os blocos são gravados
+        assert len(storage.read_table(path)) == 1
+        yield df.iloc[2:]
+
+    assert storage.write_table_chunks(chunks(), path, partition_col="Season") == len(df)
+    pd.testing.assert_frame_equal(sort(storage.read_table(path)), df, check_like=True,
+                                  check_categorical=False)
+
+    def failing():
+        yield df
+        raise RuntimeError("falhou no meio")
+
+    with pytest.raises(RuntimeError):
+        storage.write_table_chunks(failing(), path, partition_col="Season")
+    assert len(storage.read_table(path)) == len(df)
+    assert [p.name for p in tmp_path.iterdir()] == ["table.parquet"]
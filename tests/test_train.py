@@ -0,0 +1,119 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import Ridge
+
+from nba_stat_predictor import storage
+from nba_stat_predictor.features import get_feature_columns
+from nba_stat_predictor.modeling import compiled, train
+from src.models import train_model
+
+SPECS = (
+    train.ModelSpec('reg_model_ridge', Ridge(alpha=1.0), tuple(train.REG_TARGETS)),
+    train.ModelSpec('clf_model_rf', RandomForestClassifier(n_estimators=5, random_state=0,
+                                                           max_depth=4), 'DOUBLE_DOUBLE'),
+    train.ModelSpec('reg_model_stl', Ridge(alpha=10.0), 'STL'),
+    train.ModelSpec('clf_model_pts15', RandomForestClassifier(n_estimators=5, random_state=0,
+                                                              max_depth=4), 'PTS_GE_15'),
+)
+
+
+@pytest.fixture(scope='module')
+def matrix(df_features):
+    feature_cols = get_feature_columns(df_features.columns)
+    preprocessor, X = train.fit_preprocessor(df_features[feature_cols])
+    targets = train.build_targets(df_features, train.required_targets(SPECS))
+    return feature_cols, preprocessor, X, targets
+
+
+def test_build_targets():
+    df = pd.DataFrame({'PTS': [25, 12, 30], 'REB': [11, 3, 9], 'AST': [2, 10, 10],
+                       'STL': [0, 1, 2], 'BLK': [1, 0, 10]})
+    targets = train.build_targets(df, ['DOUBLE_DOUBLE', 'PTS_GE_20', 'STL'])
+    assert targets['DOUBLE_DOUBLE'].tolist() == [1, 1, 1]
+    assert targets['PTS_GE_20'].tolist() == [1, 0, 1]
+    assert targets['STL'].tolist() == [0, 1, 2]
+    assert train.target_source_columns(['PTS_GE_20', 'TOV']) == ['PTS', 'TOV']
+    with pytest.raises(KeyError):
+        train.build_targets(df, ['NOPE'])
+
+
+def test_parallel_fit_matches_sequential(matrix):
+    _, _, X, targets = matrix
+    sequential = train.fit_models(X, targets, SPECS, n_jobs=1)
+    parallel = train.fit_models(X, targets, SPECS, n_jobs=2)
+    assert list(parallel) == [spec.name for spec in SPECS]
+
+    for name in ['reg_model_ridge', 'reg_model_stl']:
+        np.testing.assert_array_equal(parallel[name][0].coef_, sequential[name][0].coef_)
+    for name in ['clf_model_rf', 'clf_model_pts15']:
+        np.testing.assert_array_equal(parallel[name][0].predict_proba(X),
+                                      sequential[name][0].predict_proba(X))
+    assert parallel['reg_model_ridge'][0].coef_.shape[0] == len(train.REG_TARGETS)
+
+
+class ThreadRecordingForest(RandomForestClassifier):
+    def fit(self, X, y, sample_weight=None):
+        self.fit_n_jobs_ = self.n_jobs
+        return super().fit(X, y, sample_weight)
+
+
+def test_parallel_fit_limits_estimator_threads(matrix, monkeypatch):
+    _, _, X, targets = matrix
+    monkeypatch.setattr(train, 'cpu_count', lambda: 8)
+    specs = (SPECS[0], train.ModelSpec('clf_model_rf', ThreadRecordingForest(n_estimators=5, n_jobs=-1),
+                                       'DOUBLE_DOUBLE'))
+    # Dois processos em 8 núcleos: 4 threads por floresta; o modelo salvo mantém n_jobs=-1
+    forest = train.fit_models(X, targets, specs, n_jobs=2)['clf_model_rf'][0]
+    assert (forest.fit_n_jobs_, forest.n_jobs) == (4, -1)
+    forest = train.fit_models(X, targets, specs, n_jobs=1)['clf_model_rf'][0]
+    assert forest.fit_n_jobs_ == -1
+
+
+def test_duplicate_spec_names_rejected(matrix):
+    _, _, X, targets = matrix
+    with pytest.raises(ValueError):
+        train.fit_models(X, targets, SPECS[:1] * 2, n_jobs=1)
+
+
+def test_save_artifacts_writes_manifest(tmp_path, matrix):
+    feature_cols, preprocessor, X, targets = matrix
+    fitted = train.fit_models(X, targets, SPECS, n_jobs=1)
+    train.save_artifacts(tmp_path, preprocessor, fitted, SPECS, feature_cols, extra={'n_rows': len(X)})
+
+    manifest = train.load_manifest(tmp_path)
+    assert manifest['feature_cols'] == feature_cols
+    assert manifest['n_rows'] == len(X)
+    assert manifest['n_features_processed'] == X.shape[1]
+    assert manifest['models']['clf_model_pts15']['targets'] == ['PTS_GE_15']
+    assert manifest['models']['reg_model_stl']['params']['alpha'] == 10.0
+    for entry in manifest['models'].values():
+        assert (tmp_path / entry['file']).exists()
+    assert joblib.load(tmp_path / manifest['preprocessor']).n_features_in_ == len(feature_cols)
+
+
+def test_train_model_main(tmp_path, monkeypatch, df_features, run_report_dir):
+    processed_path = tmp_path / 'processed.parquet'
+    storage.write_table(df_features, processed_path, partition_col='Season')
+    monkeypatch.setattr(train_model, 'PROCESSED_DATA_PATH', str(processed_path))
+    monkeypatch.setattr(train_model, 'MODEL_OUTPUT_DIR', str(tmp_path / 'models'))
+    monkeypatch.setattr(train_model, 'MODEL_SPECS', SPECS[:2])
+
+    train_model.main(['--workers', '1'])
+
+    models_dir = tmp_path / 'models'
+    manifest = train.load_manifest(models_dir)
+    assert set(manifest['models']) == {'reg_model_ridge', 'clf_model_rf'}
+    assert manifest['encoding'] == train.DEFAULT_ENCODING == 'compact'
+    predictor = compiled.load_compiled(models_dir)
+    X = df_features[predictor.feature_cols].iloc[:5]
+    assert predictor.predict_frame(X).shape == (5, len(train.REG_TARGETS) + 1)
+
+    report = json.loads((run_report_dir / 'train_model-latest.json').read_text())
+    stages = {stage['name']: stage for stage in report['stages']}
+    assert {'load_data', 'fit_preprocessor', 'fit_models', 'compile_bundle'} <= set(stages)
+    assert stages['load_data']['rows'] == len(df_features)